@@ -1,6 +1,6 @@
 {
     'name': 'ISO 17024 Certification Portal',
-    'version': '1.3',
+    'version': '1.9',
     'summary': 'Portal Pendaftaran Sertifikasi Coating (Benchmark AMPP)',
     'author': 'User Odoo',
     'category': 'Website',
@@ -8,6 +8,8 @@
     'data': [
         'security/ir.model.access.csv',
         'data/sequence.xml',
+        'data/scheme_data.xml',
+        'data/cron.xml',
         'data/email_templates.xml',
         'data/email_template_payment.xml',
         'data/email_template_revision.xml',
@@ -20,6 +22,7 @@
         'views/status_template.xml',
         'views/registration_views.xml',
         'views/backend_views.xml',
+        'views/scheme_views.xml',
         'views/quiz_views.xml',
         'views/quiz_template.xml',
         'views/session_views.xml',
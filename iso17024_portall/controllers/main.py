@@ -1,10 +1,26 @@
 from odoo import http, _, fields
+import hashlib
+import hmac
+import json
+import re
+from odoo.exceptions import MissingError
 from odoo.http import request
 from odoo.addons.auth_signup.controllers.main import AuthSignupHome
-import base64
+from ..models.application import DOCUMENT_FIELDS
+from ..models.document import DERIVATIVE_FORMATS, DERIVATIVE_SIZES
+from ..models.upload import ALLOWED_EXTENSIONS, CHUNK_SIZE, MAX_UPLOAD_SIZE
+from ..models.page_cache import (
+    CSRF_PLACEHOLDER, PAGE_CACHE_MAX_AGE, SNIPPET_THUMB_FORMATS, SNIPPET_THUMB_WIDTHS,
+    is_tracking_param,
+)
+
+SNIPPET_NAME_RE = re.compile(r'^s_[a-z_]+$')
 
 class IsoPortalController(AuthSignupHome):
 
+    # Slot dokumen yang diupload dari form step 1
+    STEP1_DOCUMENTS = ['pas_foto', 'ktp_file', 'cv_file', 'ijazah_file', 'training_cert', 'cert_level1_file']
+
     # ---------------------------------------------------------
     # HELPER: Smart redirect untuk user yang sudah login
     # ---------------------------------------------------------
@@ -15,9 +31,7 @@ class IsoPortalController(AuthSignupHome):
             return '/certification/pending'
         
         # Cari application yang ada
-        app = request.env['certification.application'].search([
-            ('partner_id', '=', partner.id)
-        ], limit=1)
+        app = partner.current_application_id
         
         if not app:
             # Belum punya application → ke apply (step 1)
@@ -34,6 +48,43 @@ class IsoPortalController(AuthSignupHome):
         # Default: step 1
         return '/certification/apply'
 
+    # ---------------------------------------------------------
+    # HELPER: Kuis aktif untuk skema (dari cache cert.scheme)
+    # ---------------------------------------------------------
+    def _get_scheme_quiz(self, scheme):
+        quiz_id = request.env['cert.scheme']._get_scheme_data(scheme).get('quiz_id')
+        return request.env['cert.quiz'].sudo().browse(quiz_id)
+
+    # ---------------------------------------------------------
+    # HELPER: Halaman publik dari cache (ETag + Cache-Control)
+    # ---------------------------------------------------------
+    def _render_public_page(self, template):
+        # Mode debug memuat asset berbeda -> jangan pakai / isi cache.
+        # Query selain tracking (utm_*, gclid, ...) bisa mengubah isi -> render biasa, private.
+        # Tracking saja (traffic kampanye iklan) tetap dilayani dari cache.
+        query_params = [name for name in request.httprequest.args if not is_tracking_param(name)]
+        if request.session.debug or query_params:
+            response = request.render(template)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        website = getattr(request, 'website', None)
+        html, etag = request.env['cert.page.cache']._get_rendered_page(
+            template, website.id if website else None, request.env.lang
+        )
+        # Bahasa selalu ada di URL: bahasa non-default memakai prefix /<lang>/, dan URL tanpa
+        # prefix di-redirect website ke bahasa cookie frontend_lang jika bukan default.
+        # Jadi satu URL = satu bahasa -> proxy boleh menyimpan tanpa Vary.
+        headers = [
+            ('Cache-Control', f'public, max-age={PAGE_CACHE_MAX_AGE}'),
+            ('ETag', f'"{etag}"'),
+        ]
+        if etag in request.httprequest.if_none_match:
+            return request.make_response(b'', headers=headers, status=304)
+
+        body = html.replace(CSRF_PLACEHOLDER.encode(), request.csrf_token(None).encode())
+        return request.make_response(body, headers=headers + [('Content-Type', 'text/html; charset=utf-8')])
+
     # ---------------------------------------------------------
     # ROUTE: Pengajuan Sertifikasi - Smart Redirect
     # ---------------------------------------------------------
@@ -56,8 +107,8 @@ class IsoPortalController(AuthSignupHome):
             partner = user.partner_id
             return request.redirect(self._get_smart_redirect_url(partner))
         
-        # Public user → render halaman dengan snippet
-        return request.render('iso17024_portall.pengajuan_sertifikasi_page')
+        # Public user → halaman dengan snippet dari cache
+        return self._render_public_page('iso17024_portall.pengajuan_sertifikasi_page')
 
     # ---------------------------------------------------------
     # ROUTE: Pilih Level - Smart Redirect  
@@ -81,8 +132,8 @@ class IsoPortalController(AuthSignupHome):
             partner = user.partner_id
             return request.redirect(self._get_smart_redirect_url(partner))
         
-        # Public user → render halaman dengan snippet
-        return request.render('iso17024_portall.pilih_level_page')
+        # Public user → halaman dengan snippet dari cache
+        return self._render_public_page('iso17024_portall.pilih_level_page')
 
     # ---------------------------------------------------------
     # 1. HALAMAN SIGN UP CUSTOM (Dengan Context dari Website)
@@ -147,6 +198,8 @@ class IsoPortalController(AuthSignupHome):
                     'pending_cert_level': cert_level,
                     'registration_date': fields.Datetime.now(),
                 })
+                # Hanya browser yang melakukan pendaftaran ini yang boleh memantau statusnya
+                request.session['cert_status_partner_id'] = user.partner_id.id
                 # Post message
                 user.partner_id.sudo().message_post(
                     body=f"<b style='color:blue'>📝 REGISTRASI BARU</b><br/>"
@@ -181,22 +234,65 @@ class IsoPortalController(AuthSignupHome):
             if partner.registration_state == 'approved':
                 return request.redirect('/certification/apply')
         
-        # Ambil info dari URL params (untuk user yang baru signup)
+        # Ambil info dari URL params (untuk user yang baru signup) - hanya untuk ditampilkan
         email = urllib.parse.unquote(kw.get('email', ''))
         name = urllib.parse.unquote(kw.get('name', ''))
         
-        # Cari partner berdasarkan email jika ada
-        partner = None
-        if email:
-            partner = request.env['res.partner'].sudo().search([('email', '=', email)], limit=1)
+        # Partner HANYA dari session pendaftar sendiri (diset saat signup submit),
+        # tidak pernah dari email di URL
+        partner = self._get_session_status_partner()
         
         return request.render('iso17024_portall.pending_verification_page', {
             'email': email,
             'name': name,
             'partner': partner,
             'user': request.env.user if not request.env.user._is_public() else None,
+            'status_url': '/certification/status/json?' + urllib.parse.urlencode({
+                'partner_id': partner.id,
+                'token': self._status_token(partner.id),
+            }) if partner else False,
+            'status_version': partner._get_portal_status()['version'] if partner else False,
         })
 
+    # ---------------------------------------------------------
+    # 3b. STATUS RINGKAS (JSON) UNTUK POLLING HALAMAN PENDING/STATUS
+    # ---------------------------------------------------------
+    def _get_session_status_partner(self):
+        """Partner yang baru mendaftar dari session ini (kosong jika tidak ada)"""
+        partner_id = request.session.get('cert_status_partner_id')
+        if not partner_id:
+            return None
+        return request.env['res.partner'].sudo().browse(partner_id).exists() or None
+
+    def _status_token(self, partner_id):
+        """Token polling halaman pending (kandidat belum bisa login), terikat ke id partner
+
+        Hanya diterbitkan di halaman pending untuk session yang melakukan pendaftaran.
+        """
+        secret = request.env['ir.config_parameter'].sudo().get_param('database.secret')
+        return hmac.new(secret.encode(), f'cert-status:{partner_id}'.encode(), hashlib.sha256).hexdigest()
+
+    @http.route('/certification/status/json', type='http', auth='public', methods=['GET'])
+    def status_json(self, partner_id=None, token=None, **kw):
+        """Status kandidat dalam JSON kecil; 304 jika version (ETag) tidak berubah"""
+        partner = None
+        if not request.env.user._is_public():
+            partner = request.env.user.partner_id
+        elif partner_id and partner_id.isdigit() and token \
+                and hmac.compare_digest(token, self._status_token(int(partner_id))):
+            partner = request.env['res.partner'].sudo().browse(int(partner_id)).exists()
+        if not partner:
+            raise request.not_found()
+
+        status = partner._get_portal_status()
+        headers = [
+            ('Cache-Control', 'private, no-cache'),
+            ('ETag', f'"{status["version"]}"'),
+        ]
+        if status['version'] in request.httprequest.if_none_match:
+            return request.make_response(b'', headers=headers, status=304)
+        return request.make_json_response(status, headers=headers)
+
     # ---------------------------------------------------------
     # 4. OVERRIDE LOGIN - BLOCK PENDING USERS
     # ---------------------------------------------------------
@@ -205,18 +301,20 @@ class IsoPortalController(AuthSignupHome):
         # Cek SEBELUM login apakah user ini pending
         login_email = kw.get('login', '')
         if login_email and request.httprequest.method == 'POST':
-            # Cari user berdasarkan email
-            user = request.env['res.users'].sudo().search([('login', '=', login_email)], limit=1)
-            if user and user.partner_id:
-                partner = user.partner_id
+            # Satu query: login -> registration_state (tanpa load record user/partner)
+            website = getattr(request, 'website', None)
+            registration_state = request.env['res.partner'].sudo()._get_registration_state_by_login(
+                login_email, website.id if website else None
+            )
+            if registration_state:
                 # BLOCK login jika status pending
-                if partner.registration_state == 'pending':
+                if registration_state == 'pending':
                     return request.render('web.login', {
                         'error': 'Akun Anda belum diverifikasi oleh Admin. Silakan tunggu email konfirmasi.',
                         'login': login_email,
                     })
                 # BLOCK login jika status rejected
-                elif partner.registration_state == 'rejected':
+                elif registration_state == 'rejected':
                     return request.render('web.login', {
                         'error': 'Pendaftaran Anda ditolak. Silakan hubungi admin untuk informasi lebih lanjut.',
                         'login': login_email,
@@ -227,7 +325,6 @@ class IsoPortalController(AuthSignupHome):
 
         if request.params.get('login_success'):
             user = request.env.user
-            partner = user.partner_id
 
             # === SESSION TRACKING: Create new session, kick old devices ===
             try:
@@ -244,11 +341,8 @@ class IsoPortalController(AuthSignupHome):
             # === END SESSION TRACKING ===
 
             # Jika BUKAN Internal User (artinya kandidat portal)
+            # Pending/rejected sudah ditolak di atas; approved & user lama (none) → apply
             if not user.has_group('base.group_user'):
-                # Cek status registrasi - approved bisa lanjut
-                if partner.registration_state == 'approved':
-                    return request.redirect('/certification/apply')
-                # Default untuk none/lainnya → apply (backward compatibility untuk user lama)
                 return request.redirect('/certification/apply')
 
         return response
@@ -264,9 +358,7 @@ class IsoPortalController(AuthSignupHome):
         if partner.registration_state == 'pending':
             return request.redirect('/certification/pending')
         
-        app = request.env['certification.application'].search([
-            ('partner_id', '=', partner.id)
-        ], limit=1)
+        app = partner.current_application_id
         
         if not app or app.state == 'draft':
             return request.redirect('/certification/apply')
@@ -278,6 +370,8 @@ class IsoPortalController(AuthSignupHome):
         return request.render('iso17024_portall.application_status_page', {
             'application': app,
             'user': request.env.user,
+            'status_url': '/certification/status/json',
+            'status_version': partner._get_portal_status()['version'],
         })
 
     # ---------------------------------------------------------
@@ -291,9 +385,7 @@ class IsoPortalController(AuthSignupHome):
         if partner.registration_state == 'pending':
             return request.redirect('/certification/pending')
         
-        app = request.env['certification.application'].search([
-            ('partner_id', '=', partner.id)
-        ], limit=1)
+        app = partner.current_application_id
         
         edit_mode = kw.get('edit')
         
@@ -326,12 +418,6 @@ class IsoPortalController(AuthSignupHome):
         user = request.env.user
         partner = user.partner_id
         
-        def get_file_data(field_name):
-            file = kw.get(field_name)
-            if file and hasattr(file, 'read'):
-                return base64.b64encode(file.read())
-            return False
-        
         # Core data
         vals = {
             'partner_id': partner.id,
@@ -342,40 +428,154 @@ class IsoPortalController(AuthSignupHome):
             'scheme': partner.pending_cert_level or 'level1',
         }
         
-        # File uploads mapping
-        files_map = {
-            'pas_foto': 'pas_foto',
-            'ktp_file': 'ktp_file',
-            'cv_file': 'cv_file',
-            'ijazah_file': 'ijazah_file',
-            'training_cert': 'training_cert',
-            'cert_level1_file': 'cert_level1_file',
-        }
+        # File sudah diupload bertahap via /certification/upload/*,
+        # form hanya mengirim Upload ID per dokumen (upload_<field>)
+        tokens = [kw.get(f'upload_{field_name}') for field_name in self.STEP1_DOCUMENTS]
+        uploads = request.env['certification.upload'].sudo().search([
+            ('token', 'in', [token for token in tokens if token]),
+            ('partner_id', '=', partner.id),
+            ('field_name', 'in', self.STEP1_DOCUMENTS),
+            ('state', '=', 'done'),
+        ])
 
-        for input_name, db_field in files_map.items():
-            file_data = get_file_data(input_name)
-            if file_data:
-                vals[db_field] = file_data
-
-        existing_app = request.env['certification.application'].sudo().search([
-            ('partner_id', '=', partner.id)
-        ], limit=1)
+        existing_app = partner.sudo().current_application_id
 
         if existing_app:
             existing_app.sudo().write(vals)
         else:
-            request.env['certification.application'].sudo().create(vals)
+            existing_app = request.env['certification.application'].sudo().create(vals)
+
+        existing_app._attach_uploads(uploads)
             
         return request.redirect('/certification/apply/step2')
+
+    # ---------------------------------------------------------
+    # UPLOAD DOKUMEN BERTAHAP (CHUNKED & RESUMABLE)
+    # ---------------------------------------------------------
+    def _get_own_upload(self, token):
+        return request.env['certification.upload'].sudo().search([
+            ('token', '=', token),
+            ('partner_id', '=', request.env.user.partner_id.id),
+        ], limit=1)
+
+    @http.route('/certification/upload/init', type='json', auth='user', methods=['POST'])
+    def upload_init(self, field_name=None, filename=None, size=0, **kw):
+        """Mulai (atau lanjutkan) sesi upload untuk satu slot dokumen"""
+        size = int(size or 0)
+        if field_name not in self.STEP1_DOCUMENTS:
+            return {'error': 'Dokumen tidak dikenal'}
+        if size <= 0 or size > MAX_UPLOAD_SIZE:
+            return {'error': f'Ukuran file maksimal {MAX_UPLOAD_SIZE // (1024 * 1024)}MB'}
+        if not (filename or '').lower().endswith(ALLOWED_EXTENSIONS):
+            return {'error': 'Format file harus PDF, JPG atau PNG'}
+
+        upload = request.env['certification.upload'].sudo()._start_or_resume(
+            request.env.user.partner_id, field_name, filename, size
+        )
+        return {
+            'upload_id': upload.token,
+            'offset': upload.received_size,
+            'chunk_size': CHUNK_SIZE,
+        }
+
+    @http.route('/certification/upload/<string:token>/chunk', type='http', auth='user', methods=['POST'])
+    def upload_chunk(self, token, offset=0, **kw):
+        """Terima satu chunk (body mentah, tanpa base64) dan tulis ke disk"""
+        upload = self._get_own_upload(token)
+        if not upload:
+            raise request.not_found()
+
+        try:
+            received = upload._append_chunk(int(offset), request.httprequest.stream)
+        except ValueError as e:
+            return request.make_json_response(
+                {'error': str(e), 'offset': upload.received_size}, status=409
+            )
+        return request.make_json_response({'offset': received})
+
+    @http.route('/certification/upload/<string:token>/finalize', type='json', auth='user', methods=['POST'])
+    def upload_finalize(self, token, **kw):
+        """Susun file di filestore setelah semua chunk diterima"""
+        upload = self._get_own_upload(token)
+        if not upload:
+            return {'error': 'Upload tidak ditemukan'}
+
+        try:
+            upload._finalize()
+        except ValueError as e:
+            # Termasuk format ditolak & tabrakan isi filestore
+            return {'error': str(e), 'offset': upload.received_size}
+        return {'upload_id': upload.token, 'state': upload.state}
     
+    # ---------------------------------------------------------
+    # DOWNLOAD DOKUMEN KANDIDAT (STREAM DARI FILESTORE)
+    # ---------------------------------------------------------
+    @http.route('/certification/document/<string:field_name>', type='http', auth='user', website=True)
+    def document_download(self, field_name, download=None, **kw):
+        """Stream dokumen milik kandidat dari filestore (tidak di-load ke memori worker)"""
+        if field_name not in DOCUMENT_FIELDS:
+            raise request.not_found()
+
+        app = request.env.user.partner_id.current_application_id
+
+        if not app:
+            raise request.not_found()
+
+        try:
+            stream = app._get_document_stream(field_name)
+        except MissingError:
+            raise request.not_found()
+
+        return stream.get_response(as_attachment=bool(download))
+
+    @http.route('/iso17024_portall/snippet/<string:name>/<int:width>.<string:fmt>', type='http', auth='public')
+    def snippet_thumbnail(self, name, width, fmt, **kw):
+        """Thumbnail snippet yang diperkecil (dibuat saat pertama diminta, lalu di-cache)
+
+        URL thumbnail di t-thumbnail statis (tidak bisa memuat hash isi), jadi kesegaran
+        dijaga ETag: browser selalu revalidasi dan mendapat 304 selama file sumber sama.
+        """
+        if (not SNIPPET_NAME_RE.match(name) or width not in SNIPPET_THUMB_WIDTHS
+                or fmt not in SNIPPET_THUMB_FORMATS):
+            raise request.not_found()
+        try:
+            content, mimetype, source_hash = request.env['cert.page.cache']._get_snippet_thumbnail(name, width, fmt)
+        except FileNotFoundError:
+            raise request.not_found()
+
+        etag = f'{source_hash}-{width}-{fmt}'
+        headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'public, no-cache')]
+        if etag in request.httprequest.if_none_match:
+            return request.make_response(b'', headers=headers, status=304)
+        return request.make_response(content, headers=[('Content-Type', mimetype)] + headers)
+
+    @http.route('/certification/document/<int:document_id>/thumb/<int:size>/<string:fmt>', type='http', auth='user')
+    def document_thumbnail(self, document_id, size, fmt, **kw):
+        """Thumbnail foto/KTP (URL berisi checksum -> boleh di-cache permanen)"""
+        if size not in DERIVATIVE_SIZES or fmt not in DERIVATIVE_FORMATS:
+            raise request.not_found()
+
+        user = request.env.user
+        doc = request.env['certification.document'].sudo().browse(document_id).exists()
+        if not doc or not doc.has_derivatives:
+            raise request.not_found()
+        # Hanya admin atau pemilik dokumen
+        if not user.has_group('base.group_user') and doc.application_id.partner_id != user.partner_id:
+            raise request.not_found()
+
+        try:
+            stream = request.env['ir.binary']._get_stream_from(doc, f'thumb_{size}_{fmt}')
+        except MissingError:
+            raise request.not_found()
+
+        return stream.get_response(immutable=True)
+
     # ---------------------------------------------------------
     # HALAMAN STEP 2: REVIEW & DECLARATION (NEW 2-STEP FLOW)
     # ---------------------------------------------------------
     @http.route('/certification/apply/step2', type='http', auth='user', website=True)
     def step2_page(self, **kw):
-        app = request.env['certification.application'].search([
-            ('partner_id', '=', request.env.user.partner_id.id)
-        ], limit=1)
+        app = request.env.user.partner_id.current_application_id
 
         if not app:
             return request.redirect('/certification/apply')
@@ -390,9 +590,7 @@ class IsoPortalController(AuthSignupHome):
     # ---------------------------------------------------------
     @http.route('/certification/apply/submit_final', type='http', auth='user', methods=['POST'], website=True)
     def submit_final(self, **kw):
-        app = request.env['certification.application'].search([
-            ('partner_id', '=', request.env.user.partner_id.id)
-        ], limit=1)
+        app = request.env.user.partner_id.current_application_id
 
         if app:
             app.sudo().write({
@@ -416,33 +614,25 @@ class IsoPortalController(AuthSignupHome):
     # ---------------------------------------------------------
     @http.route('/certification/payment', type='http', auth='user', website=True)
     def payment_page(self, **kw):
-        app = request.env['certification.application'].search([
-            ('partner_id', '=', request.env.user.partner_id.id)
-        ], limit=1)
+        app = request.env.user.partner_id.current_application_id
 
         if not app or app.state != 'payment':
             return request.redirect('/certification/status')
 
-        prices = {
-            'level1': {'base': 7200000, 'admin': 1600000, 'name': 'Coating Inspector Level 1'},
-            'level2': {'base': 13600000, 'admin': 1600000, 'name': 'Coating Inspector Level 2'},
-        }
-        scheme_data = prices.get(app.scheme, {'base': 7200000, 'admin': 1600000, 'name': 'Sertifikasi'})
+        scheme_data = request.env['cert.scheme']._get_scheme_data(app.scheme)
         
         return request.render('iso17024_portall.payment_page', {
             'application': app,
             'user': request.env.user,
-            'scheme_name': scheme_data['name'],
-            'base_price': scheme_data['base'],
-            'admin_fee': scheme_data['admin'],
-            'total_price': scheme_data['base'] + scheme_data['admin'],
+            'scheme_name': scheme_data.get('name', 'Sertifikasi'),
+            'base_price': scheme_data.get('base_price', 0),
+            'admin_fee': scheme_data.get('admin_fee', 0),
+            'total_price': scheme_data.get('total_price', 0),
         })
 
     @http.route('/certification/payment/confirm', type='http', auth='user', website=True)
     def payment_confirm(self, **kw):
-        app = request.env['certification.application'].search([
-            ('partner_id', '=', request.env.user.partner_id.id)
-        ], limit=1)
+        app = request.env.user.partner_id.current_application_id
 
         if app and app.state == 'payment':
             app.sudo().write({
@@ -457,50 +647,19 @@ class IsoPortalController(AuthSignupHome):
     # ---------------------------------------------------------
     @http.route('/xendit/callback', type='json', auth='public', csrf=False, methods=['POST'])
     def xendit_callback(self, **kw):
-        """Handle Xendit payment webhook callback"""
-        import json
+        """Handle Xendit payment webhook callback
+
+        Hanya mencatat event (dedup per id+status) lalu langsung ACK; transisi status
+        dikerjakan cron certification.xendit.event.
+        """
         import logging
         _logger = logging.getLogger(__name__)
         
         try:
-            # Get JSON data from request
             data = request.get_json_data()
-            _logger.info(f"Xendit callback received: {json.dumps(data)}")
-            
-            external_id = data.get('external_id', '')
-            status = data.get('status', '')
-            xendit_id = data.get('id', '')
-            
-            # Parse application ID from external_id (format: CERT-{id})
-            if external_id.startswith('CERT-'):
-                app_id = int(external_id.replace('CERT-', ''))
-                
-                app = request.env['certification.application'].sudo().browse(app_id)
-                
-                if app.exists():
-                    if status == 'PAID':
-                        app.write({
-                            'xendit_status': 'paid',
-                            'payment_status': 'paid',
-                            'state': 'verified',
-                            'payment_date': fields.Datetime.now(),
-                            'payment_method': data.get('payment_method', 'xendit'),
-                        })
-                        app.message_post(
-                            body=f"<b style='color:green'>✅ PEMBAYARAN DITERIMA (Xendit)</b><br/>"
-                                 f"ID: {xendit_id}<br/>"
-                                 f"Metode: {data.get('payment_method', '-')}"
-                        )
-                        _logger.info(f"Application {app_id} payment confirmed via Xendit")
-                        
-                    elif status == 'EXPIRED':
-                        app.write({'xendit_status': 'expired'})
-                        app.message_post(body="<b style='color:orange'>⏰ INVOICE XENDIT KADALUARSA</b>")
-                        
-                    elif status == 'FAILED':
-                        app.write({'xendit_status': 'failed'})
-                        app.message_post(body="<b style='color:red'>❌ PEMBAYARAN GAGAL</b>")
-                        
+            created = request.env['certification.xendit.event'].sudo()._ingest(data)
+            if not created:
+                _logger.info(f"Duplicate Xendit callback ignored: {data.get('id')} {data.get('status')}")
             return {'status': 'ok'}
             
         except Exception as e:
@@ -561,11 +720,8 @@ class IsoPortalController(AuthSignupHome):
             # Redirect to result page if already done
             return request.redirect(f'/certification/quiz/result/{existing_attempt.id}')
         
-        # Cari quiz berdasarkan scheme
-        quiz = request.env['cert.quiz'].sudo().search([
-            ('scheme', '=', app.scheme),
-            ('published', '=', True)
-        ], limit=1)
+        # Cari quiz berdasarkan scheme (katalog cert.scheme, di-cache)
+        quiz = self._get_scheme_quiz(app.scheme)
         
         if not quiz:
             return request.render('iso17024_portall.quiz_access_denied')
@@ -611,11 +767,8 @@ class IsoPortalController(AuthSignupHome):
         if done_attempt:
             return request.redirect(f'/certification/quiz/result/{done_attempt.id}')
         
-        # Cari quiz berdasarkan scheme
-        quiz = request.env['cert.quiz'].sudo().search([
-            ('scheme', '=', app.scheme),
-            ('published', '=', True)
-        ], limit=1)
+        # Cari quiz berdasarkan scheme (katalog cert.scheme, di-cache)
+        quiz = self._get_scheme_quiz(app.scheme)
         
         if not quiz:
             return request.render('iso17024_portall.quiz_access_denied')
@@ -656,10 +809,48 @@ class IsoPortalController(AuthSignupHome):
         if attempt.state == 'done':
             return request.redirect(f'/certification/quiz/result/{attempt.id}')
 
+        # Timer dilanjutkan dari waktu mulai (reload tidak mengulang waktu dari awal)
+        elapsed = (fields.Datetime.now() - attempt.started_at).total_seconds() if attempt.started_at else 0
+        remaining_seconds = max(0, int(attempt.time_limit_seconds - elapsed))
+
+        # Kartu soal dari cache bersama (dirender sekali per soal, bukan per peserta)
+        questions_html, saved_answers = request.env['cert.page.cache']._render_attempt_questions(attempt)
+
         return request.render('iso17024_portall.quiz_runner_page', {
             'attempt': attempt,
-            'lines': attempt.answer_line_ids,
+            'questions_html': questions_html,
+            'saved_answers': json.dumps(saved_answers),
+            'remaining_seconds': remaining_seconds,
         })
+
+    @http.route('/certification/quiz/autosave/<int:attempt_id>', type='json', auth='user', methods=['POST'])
+    def quiz_autosave(self, attempt_id, answers=None, **post):
+        """Simpan jawaban sementara dari quiz runner (delta {line_id: pilihan}, di-debounce di browser)"""
+        attempt = request.env['cert.quiz.attempt'].sudo().browse(attempt_id)
+
+        if not attempt.exists():
+            return {'error': 'Attempt not found'}
+
+        # Validasi user
+        if attempt.user_id.id != request.env.user.id:
+            return {'error': 'Access denied'}
+
+        # Jika sudah selesai, ignore
+        if attempt.state == 'done':
+            return {'error': 'Quiz already finished'}
+
+        # Device yang sudah digantikan login lain tidak boleh menimpa jawaban
+        session_valid = request.env['cert.user.session'].sudo().validate_session(
+            user_id=request.env.user.id,
+            session_token=request.session.sid
+        )
+        if not session_valid:
+            return {'error': 'Session invalid'}
+
+        if not isinstance(answers, dict):
+            return {'error': 'Invalid payload'}
+
+        return {'saved': attempt._save_answers(answers)}
     
     @http.route('/certification/quiz/submit/<int:attempt_id>', type='http', auth='user', methods=['POST'], website=True)
     def quiz_submit(self, attempt_id, **post):
@@ -677,18 +868,14 @@ class IsoPortalController(AuthSignupHome):
         if attempt.state == 'done':
             return request.redirect(f'/certification/quiz/result/{attempt.id}')
         
-        # Simpan jawaban
-        for field_name, value in post.items():
-            if field_name.startswith('question_'):
-                try:
-                    line_id = int(field_name.split('_')[1])
-                    line = request.env['cert.answer.line'].sudo().browse(line_id)
-                    if line.exists() and line.attempt_id.id == attempt.id:
-                        line.write({'selected': value})
-                except (ValueError, IndexError):
-                    continue
-        
-        # Finish attempt and calculate scores
+        # Simpan jawaban: validasi semua baris dalam satu query, write dikelompokkan per pilihan
+        attempt._save_answers({
+            field_name[len('question_'):]: value
+            for field_name, value in post.items()
+            if field_name.startswith('question_')
+        })
+
+        # Finish attempt and calculate scores (sekali, setelah semua jawaban tersimpan)
         attempt.action_finish()
         
         # Update application exam_result based on quiz result
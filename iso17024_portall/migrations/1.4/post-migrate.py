@@ -0,0 +1,53 @@
+import logging
+
+from odoo import api, SUPERUSER_ID
+from odoo.tools.sql import column_exists
+
+from odoo.addons.iso17024_portall.models.application import DOCUMENT_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+TABLE = 'certification_application'
+BATCH_SIZE = 100
+
+
+def migrate(cr, version):
+    """Pindahkan isi kolom Binary lama ke ir.attachment (filestore) secara bertahap"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    Attachment = env['ir.attachment']
+
+    for field_name in DOCUMENT_FIELDS:
+        if not column_exists(cr, TABLE, field_name):
+            continue
+
+        moved = 0
+        while True:
+            cr.execute(f"""
+                SELECT id, "{field_name}"
+                  FROM {TABLE}
+                 WHERE "{field_name}" IS NOT NULL
+                 ORDER BY id
+                 LIMIT %s
+            """, (BATCH_SIZE,))
+            rows = cr.fetchall()
+            if not rows:
+                break
+
+            ids = tuple(row[0] for row in rows)
+            # Kolom lama menyimpan base64 -> langsung dipakai sebagai 'datas'
+            Attachment.create([{
+                'name': field_name,
+                'res_model': 'certification.application',
+                'res_field': field_name,
+                'res_id': app_id,
+                'type': 'binary',
+                'datas': bytes(value),
+            } for app_id, value in rows])
+
+            cr.execute(f'UPDATE {TABLE} SET "{field_name}" = NULL WHERE id IN %s', (ids,))
+            # Lepas blob batch ini dari cache ORM sebelum batch berikutnya
+            env.invalidate_all()
+            moved += len(rows)
+
+        cr.execute(f'ALTER TABLE {TABLE} DROP COLUMN "{field_name}"')
+        _logger.info(f"Moved {moved} '{field_name}' documents to filestore")
@@ -0,0 +1,23 @@
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+from odoo.addons.iso17024_portall.models.application import DOCUMENT_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def migrate(cr, version):
+    """Isi metadata dokumen untuk aplikasi yang sudah ada (dari ir.attachment)"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    Application = env['certification.application']
+
+    app_ids = Application.search([]).ids
+    for start in range(0, len(app_ids), BATCH_SIZE):
+        batch = Application.browse(app_ids[start:start + BATCH_SIZE])
+        batch._sync_document_metadata(list(DOCUMENT_FIELDS))
+        env.invalidate_all()
+
+    _logger.info(f"Document metadata synced for {len(app_ids)} applications")
@@ -0,0 +1,26 @@
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+from odoo.addons.iso17024_portall.models.document import DERIVATIVE_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+
+
+def migrate(cr, version):
+    """Buat thumbnail untuk foto & KTP yang sudah diupload sebelumnya"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    Document = env['certification.document']
+
+    doc_ids = Document.search([
+        ('field_name', 'in', DERIVATIVE_FIELDS),
+        ('has_file', '=', True),
+        ('mimetype', '=like', 'image/%'),
+    ]).ids
+    for start in range(0, len(doc_ids), BATCH_SIZE):
+        Document.browse(doc_ids[start:start + BATCH_SIZE])._generate_derivatives()
+        env.invalidate_all()
+
+    _logger.info(f"Generated thumbnails for {len(doc_ids)} documents")
@@ -0,0 +1,8 @@
+def migrate(cr, version):
+    """Dokumen lama: checksum file asli = checksum saat ini"""
+    cr.execute("""
+        UPDATE certification_document
+           SET original_checksum = checksum
+         WHERE original_checksum IS NULL
+           AND checksum IS NOT NULL
+    """)
@@ -0,0 +1,26 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Kode registrasi ganda (akibat fallback LIKE lama) dibuat unik sebelum unique index dibuat
+
+    Kandidat yang disetujui paling awal mempertahankan kodenya; sisanya diberi akhiran -<id>.
+    """
+    cr.execute("""
+        SELECT id, registration_code
+          FROM (
+              SELECT id, registration_code,
+                     row_number() OVER (PARTITION BY registration_code
+                                        ORDER BY approved_date NULLS LAST, id) AS rn
+                FROM res_partner
+               WHERE registration_code IS NOT NULL
+          ) dup
+         WHERE rn > 1
+    """)
+    duplicates = cr.fetchall()
+    for partner_id, code in duplicates:
+        new_code = f"{code}-{partner_id}"
+        cr.execute("UPDATE res_partner SET registration_code = %s WHERE id = %s", (new_code, partner_id))
+        _logger.warning(f"Duplicate registration code {code} on partner {partner_id} renamed to {new_code}")
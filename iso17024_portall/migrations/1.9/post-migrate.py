@@ -0,0 +1,10 @@
+def migrate(cr, version):
+    """Baris jawaban lama: snapshot kunci & bobot dari soal saat ini (sama dengan nilai yang tersimpan)"""
+    cr.execute("""
+        UPDATE cert_answer_line l
+           SET correct_choice = q.correct_choice,
+               weight = q.weight
+          FROM cert_question q
+         WHERE q.id = l.question_id
+           AND l.correct_choice IS NULL
+    """)
@@ -1,4 +1,13 @@
+from . import attachment
+from . import scheme
+from . import product
 from . import application
+from . import document
+from . import document_job
+from . import upload
+from . import xendit_job
+from . import xendit_event
 from . import partner
 from . import quiz
-from . import session
\ No newline at end of file
+from . import session
+from . import page_cache
\ No newline at end of file
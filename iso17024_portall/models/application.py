@@ -1,12 +1,37 @@
 from odoo import models, fields, api
-import requests
+from odoo.exceptions import UserError
+from markupsafe import Markup
 import base64
 import logging
 import pytz
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, time
 
+from .xendit_job import get_xendit_session, fetch_xendit_invoice, find_xendit_invoice, XENDIT_TIMEOUT
+
 _logger = logging.getLogger(__name__)
 
+# Field dokumen -> field nama file. Semua disimpan sebagai ir.attachment (filestore),
+# bukan kolom di tabel certification_application.
+DOCUMENT_FIELDS = {
+    'pas_foto': 'pas_foto_filename',
+    'ktp_file': 'ktp_filename',
+    'cv_file': 'cv_filename',
+    'ijazah_file': 'ijazah_filename',
+    'training_cert': 'training_filename',
+    'cert_level1_file': 'cert_level1_filename',
+    'previous_cert_file': 'previous_cert_filename',
+    'logbook_file': 'logbook_filename',
+    'skck_file': 'skck_filename',
+    'ishihara_test': 'ishihara_filename',
+    'additional_file': 'additional_filename',
+    'payment_proof': 'payment_proof_filename',
+}
+
+# Ukuran thumbnail yang dipakai preview backend (lihat certification.document)
+PREVIEW_THUMB_SIZE = 256
+
 class CertificationApplication(models.Model):
     _name = 'certification.application'
     _description = 'Aplikasi Sertifikasi'
@@ -25,7 +50,7 @@ class CertificationApplication(models.Model):
     special_needs = fields.Boolean(string='Memiliki Kebutuhan Khusus?')
     special_needs_desc = fields.Text(string='Deskripsi Kebutuhan Khusus')
 
-    partner_id = fields.Many2one('res.partner', string='Kandidat', required=True)
+    partner_id = fields.Many2one('res.partner', string='Kandidat', required=True, index=True)
     state = fields.Selection([
         ('draft', 'Draft (Pengisian)'),
         ('submitted', 'Menunggu Verifikasi'),
@@ -52,31 +77,31 @@ class CertificationApplication(models.Model):
 
     # --- FIELD STEP 3 (DOKUMEN BUKTI) ---
     # 1. Dokumen Dasar
-    pas_foto = fields.Binary(string='Pas Foto (4x6 Background Merah)')
+    pas_foto = fields.Binary(string='Pas Foto (4x6 Background Merah)', attachment=True)
     pas_foto_filename = fields.Char(string='Filename Pas Foto')
     
-    ktp_file = fields.Binary('File KTP')
+    ktp_file = fields.Binary('File KTP', attachment=True)
     ktp_filename = fields.Char('KTP Filename')
     
-    ijazah_file = fields.Binary('Ijazah Terakhir')
+    ijazah_file = fields.Binary('Ijazah Terakhir', attachment=True)
     ijazah_filename = fields.Char('Ijazah Filename')
     
-    ishihara_test = fields.Binary('Bukti Tes Buta Warna')
+    ishihara_test = fields.Binary('Bukti Tes Buta Warna', attachment=True)
     ishihara_filename = fields.Char('Ishihara Filename')
     
-    skck_file = fields.Binary(string='SKCK')
+    skck_file = fields.Binary(string='SKCK', attachment=True)
     skck_filename = fields.Char(string='Filename SKCK')
 
     # 2. Dokumen Pendukung
-    training_cert = fields.Binary('Sertifikat Pelatihan')
+    training_cert = fields.Binary('Sertifikat Pelatihan', attachment=True)
     training_filename = fields.Char('Training Filename')
 
     # 3. Dokumen Khusus Level 2 (Bukti Level 1)
-    cert_level1_file = fields.Binary(string='Sertifikat Level 1 (Untuk Lanjut Level 2)')
+    cert_level1_file = fields.Binary(string='Sertifikat Level 1 (Untuk Lanjut Level 2)', attachment=True)
     cert_level1_filename = fields.Char(string='Filename Cert L1')
 
     # 4. Dokumen Khusus Resertifikasi (Logbook)
-    logbook_file = fields.Binary(string='Logbook Surveillance 3 Tahun')
+    logbook_file = fields.Binary(string='Logbook Surveillance 3 Tahun', attachment=True)
     logbook_filename = fields.Char(string='Filename Logbook')
 
     # --- FIELD TRACKING ADMIN ---
@@ -107,22 +132,42 @@ class CertificationApplication(models.Model):
     preview_training = fields.Html('Preview Training Cert', compute='_compute_document_previews', sanitize=False)
     preview_cert_level1 = fields.Html('Preview Cert Level 1', compute='_compute_document_previews', sanitize=False)
     
-    @api.depends('pas_foto', 'ktp_file', 'cv_file', 'ijazah_file', 'training_cert', 'cert_level1_file')
+    # --- METADATA DOKUMEN (tanpa isi file) ---
+    document_ids = fields.One2many('certification.document', 'application_id', string='Metadata Dokumen')
+    document_count = fields.Integer(string='Dokumen Terupload', compute='_compute_document_count', store=True)
+
+    @api.depends('document_ids.has_file')
+    def _compute_document_count(self):
+        for rec in self:
+            rec.document_count = len(rec.document_ids.filtered('has_file'))
+
+    @api.depends('document_ids.has_file', 'document_ids.checksum', 'document_ids.mimetype', 'document_ids.has_derivatives')
     def _compute_document_previews(self):
-        """Generate HTML preview for documents"""
+        """Generate HTML preview for documents (hanya dari metadata, tanpa baca isi file)"""
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
         for rec in self:
-            base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+            docs = rec._document_meta()
             
-            # Helper for image preview with zoom - using /web/image URL
-            def make_image_preview(binary_field, field_name, label):
-                if binary_field:
-                    # Use Odoo's web/image endpoint for reliable image display
-                    image_url = f"{base_url}/web/image/{rec._name}/{rec.id}/{field_name}"
+            # Helper for image preview with zoom - thumbnail kecil, link ke file asli
+            def make_image_preview(doc, field_name, label):
+                if doc:
+                    # Use Odoo's web/image endpoint for the full-size image
+                    image_url = f"{base_url}/web/image/{rec._name}/{rec.id}/{field_name}?unique={doc.checksum}"
+                    thumb_webp = doc._derivative_url(PREVIEW_THUMB_SIZE, 'webp')
+                    thumb_jpeg = doc._derivative_url(PREVIEW_THUMB_SIZE, 'jpeg')
+                    if thumb_webp and thumb_jpeg:
+                        img_tag = f'''<picture>
+                                    <source srcset="{base_url}{thumb_webp}" type="image/webp"/>
+                                    <img src="{base_url}{thumb_jpeg}" loading="lazy"
+                                         style="max-width:200px; max-height:250px; border:2px solid #e2e8f0; border-radius:8px; cursor:pointer; box-shadow: 0 2px 8px rgba(0,0,0,0.1);"/>
+                                </picture>'''
+                    else:
+                        img_tag = f'''<img src="{image_url}" loading="lazy"
+                                     style="max-width:200px; max-height:250px; border:2px solid #e2e8f0; border-radius:8px; cursor:pointer; box-shadow: 0 2px 8px rgba(0,0,0,0.1);"/>'''
                     return f'''
                         <div style="text-align:center;">
                             <a href="{image_url}" target="_blank">
-                                <img src="{image_url}" 
-                                     style="max-width:200px; max-height:250px; border:2px solid #e2e8f0; border-radius:8px; cursor:pointer; box-shadow: 0 2px 8px rgba(0,0,0,0.1);"/>
+                                {img_tag}
                             </a>
                             <br/><small style="color:#64748b;">📷 {label} - Klik gambar untuk zoom</small>
                         </div>
@@ -130,8 +175,8 @@ class CertificationApplication(models.Model):
                 return '<div style="color:#94a3b8; text-align:center; padding:20px; background:#f8fafc; border-radius:8px;">📭 Belum diupload</div>'
             
             # Helper for PDF/document preview (opens in new tab)
-            def make_pdf_preview(binary_field, field_name, filename, label):
-                if binary_field:
+            def make_pdf_preview(doc, field_name, filename, label):
+                if doc:
                     # Create download/view link
                     download_url = f"{base_url}/web/content/{rec._name}/{rec.id}/{field_name}/{filename or 'document.pdf'}?download=false"
                     return f'''
@@ -145,23 +190,29 @@ class CertificationApplication(models.Model):
                     '''
                 return '<div style="color:#94a3b8; text-align:center; padding:20px; background:#f8fafc; border-radius:8px;">📭 Belum diupload</div>'
             
+            # KTP boleh PDF atau gambar -> pilih preview dari mimetype
+            ktp = docs.get('ktp_file')
+            
             # Generate previews
-            rec.preview_pas_foto = make_image_preview(rec.pas_foto, 'pas_foto', 'Pas Foto')
-            rec.preview_ktp = make_image_preview(rec.ktp_file, 'ktp_file', 'KTP')
-            rec.preview_cv = make_pdf_preview(rec.cv_file, 'cv_file', rec.cv_filename, 'CV / Daftar Riwayat Hidup')
-            rec.preview_ijazah = make_pdf_preview(rec.ijazah_file, 'ijazah_file', rec.ijazah_filename, 'Ijazah Terakhir')
-            rec.preview_training = make_pdf_preview(rec.training_cert, 'training_cert', rec.training_filename, 'Sertifikat Pelatihan')
-            rec.preview_cert_level1 = make_pdf_preview(rec.cert_level1_file, 'cert_level1_file', rec.cert_level1_filename, 'Sertifikat Level 1')
+            rec.preview_pas_foto = make_image_preview(docs.get('pas_foto'), 'pas_foto', 'Pas Foto')
+            if ktp and not ktp._is_image():
+                rec.preview_ktp = make_pdf_preview(ktp, 'ktp_file', rec.ktp_filename, 'KTP')
+            else:
+                rec.preview_ktp = make_image_preview(ktp, 'ktp_file', 'KTP')
+            rec.preview_cv = make_pdf_preview(docs.get('cv_file'), 'cv_file', rec.cv_filename, 'CV / Daftar Riwayat Hidup')
+            rec.preview_ijazah = make_pdf_preview(docs.get('ijazah_file'), 'ijazah_file', rec.ijazah_filename, 'Ijazah Terakhir')
+            rec.preview_training = make_pdf_preview(docs.get('training_cert'), 'training_cert', rec.training_filename, 'Sertifikat Pelatihan')
+            rec.preview_cert_level1 = make_pdf_preview(docs.get('cert_level1_file'), 'cert_level1_file', rec.cert_level1_filename, 'Sertifikat Level 1')
     
     # --- TAMBAHAN FIELD SESUAI HTML STEP 3 ---
-    cv_file = fields.Binary(string='Daftar Riwayat Hidup (CV)')
+    cv_file = fields.Binary(string='Daftar Riwayat Hidup (CV)', attachment=True)
     cv_filename = fields.Char(string='Filename CV')
     
-    previous_cert_file = fields.Binary(string='File Sertifikat Lama')
+    previous_cert_file = fields.Binary(string='File Sertifikat Lama', attachment=True)
     previous_cert_filename = fields.Char(string='Filename Cert Lama')
     
     # Field optional lainnya
-    additional_file = fields.Binary(string='Dokumen Tambahan')
+    additional_file = fields.Binary(string='Dokumen Tambahan', attachment=True)
     additional_filename = fields.Char(string='Filename Tambahan')
 
     # --- FIELD STEP 2 (DECLARATION) ---
@@ -185,6 +236,18 @@ class CertificationApplication(models.Model):
         ('expired', 'Kadaluarsa'),
         ('failed', 'Gagal'),
     ], string='Status Xendit', readonly=True, copy=False)
+    xendit_job_ids = fields.One2many('certification.xendit.job', 'application_id', string='Job Invoice Xendit')
+    xendit_job_state = fields.Selection([
+        ('queued', 'Dalam Antrian'),
+        ('done', 'Berhasil'),
+        ('failed', 'Gagal'),
+    ], string='Status Pembuatan Link', compute='_compute_xendit_job', store=True)
+    xendit_job_error = fields.Text(string='Error Xendit Terakhir', compute='_compute_xendit_job', store=True)
+
+    # --- FIELD NOTIFIKASI EMAIL (dikirim lewat antrian mail.mail) ---
+    last_email_id = fields.Many2one('mail.mail', string='Email Terakhir', readonly=True, copy=False, ondelete='set null')
+    last_email_state = fields.Selection(related='last_email_id.state', string='Status Email Terakhir')
+    last_email_failure = fields.Text(related='last_email_id.failure_reason', string='Error Email Terakhir')
 
     # --- FIELD PEMBAYARAN ---
     payment_amount = fields.Float(string='Jumlah Tagihan', compute='_compute_payment_amount', store=True)
@@ -203,7 +266,7 @@ class CertificationApplication(models.Model):
         ('qris', 'QRIS'),
         ('manual', 'Transfer Manual'),
     ], string='Metode Pembayaran')
-    payment_proof = fields.Binary(string='Bukti Pembayaran')
+    payment_proof = fields.Binary(string='Bukti Pembayaran', attachment=True)
     payment_proof_filename = fields.Char(string='Filename Bukti')
     payment_note = fields.Text(string='Catatan Pembayaran')
     confirmed_by = fields.Many2one('res.users', string='Dikonfirmasi Oleh')
@@ -235,15 +298,20 @@ class CertificationApplication(models.Model):
     # COMPUTE METHODS
     # =========================================================
     
+    @api.depends('xendit_job_ids.state', 'xendit_job_ids.error')
+    def _compute_xendit_job(self):
+        for rec in self:
+            # Job terbaru yang menentukan status (_order job = id desc)
+            job = rec.xendit_job_ids[:1]
+            rec.xendit_job_state = job.state
+            rec.xendit_job_error = job.error
+
     @api.depends('scheme')
     def _compute_payment_amount(self):
         """Auto-calculate payment amount based on selected scheme"""
-        prices = {
-            'level1': 8800000,   # Rp 7.200.000 + Rp 1.600.000 (admin)
-            'level2': 15200000,  # Rp 13.600.000 + Rp 1.600.000 (admin)
-        }
+        Scheme = self.env['cert.scheme']
         for rec in self:
-            rec.payment_amount = prices.get(rec.scheme, 0)
+            rec.payment_amount = Scheme._get_scheme_data(rec.scheme).get('total_price', 0)
 
     @api.depends('cert_issue_date')
     def _compute_cert_validity(self):
@@ -279,6 +347,138 @@ class CertificationApplication(models.Model):
             # Allow if current time is >= scheduled time
             rec.is_exam_available = now_wib >= scheduled_wib
 
+    # =========================================================
+    # DOKUMEN (FILESTORE & METADATA)
+    # =========================================================
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        for rec, vals in zip(records, vals_list):
+            changed = [name for name in DOCUMENT_FIELDS if name in vals]
+            if changed:
+                rec._sync_document_metadata(changed)
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        changed = [name for name in DOCUMENT_FIELDS if name in vals]
+        if changed:
+            self._sync_document_metadata(changed)
+        return res
+
+    def _sync_document_metadata(self, field_names):
+        """Simpan ukuran/mimetype/checksum dokumen dari ir.attachment (tanpa baca isi file)
+
+        Dokumen disimpan berdasarkan isi (checksum): file identik dengan yang sudah ada
+        tidak diproses ulang dan tidak dibuatkan thumbnail lagi.
+        """
+        attachments = self.env['ir.attachment'].sudo().search_read([
+            ('res_model', '=', self._name),
+            ('res_id', 'in', self.ids),
+            ('res_field', 'in', list(field_names)),
+        ], ['res_id', 'res_field', 'file_size', 'mimetype', 'checksum'])
+        attachment_map = {(att['res_id'], att['res_field']): att for att in attachments}
+
+        Document = self.env['certification.document'].sudo()
+        existing = {
+            (doc.application_id.id, doc.field_name): doc
+            for doc in Document.search([
+                ('application_id', 'in', self.ids),
+                ('field_name', 'in', list(field_names)),
+            ])
+        }
+
+        now = fields.Datetime.now()
+        to_create = []
+        changed_docs = Document
+        for rec in self:
+            for field_name in field_names:
+                att = attachment_map.get((rec.id, field_name))
+                doc = existing.get((rec.id, field_name))
+
+                if att and doc and doc.has_file and att['checksum'] == doc.checksum:
+                    # File identik dengan yang sudah tersimpan -> no-op
+                    continue
+
+                donor = att and Document._find_by_content(att['checksum'])
+                if donor:
+                    # Isi sama dengan dokumen lain (revisi/aplikasi lama) -> pakai hasil prosesnya
+                    if not doc:
+                        doc = Document.create({'application_id': rec.id, 'field_name': field_name})
+                    doc._adopt_content(donor, att['id'])
+                    continue
+
+                vals = {
+                    'has_file': bool(att),
+                    'file_size': att['file_size'] if att else 0,
+                    'mimetype': att['mimetype'] if att else False,
+                    'checksum': att['checksum'] if att else False,
+                    'original_checksum': att['checksum'] if att else False,
+                    'uploaded_at': now if att else False,
+                }
+                if doc:
+                    if doc.checksum != vals['checksum']:
+                        changed_docs |= doc
+                    doc.write(vals)
+                else:
+                    to_create.append(dict(vals, application_id=rec.id, field_name=field_name))
+
+        if to_create:
+            changed_docs |= Document.create(to_create)
+
+        # Thumbnail dibuat sekali saat file berubah, bukan saat ditampilkan
+        changed_docs._generate_derivatives()
+        # Kompresi/normalisasi berjalan di cron, request upload tidak menunggu
+        self.env['certification.document.job']._enqueue(changed_docs)
+
+    def _attach_uploads(self, uploads):
+        """Pasang hasil upload bertahap (certification.upload) ke field dokumen aplikasi"""
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+        uploads = uploads.filtered(lambda u: u.state == 'done' and u.attachment_id)
+        if not uploads:
+            return
+
+        field_names = uploads.mapped('field_name')
+        # Hapus attachment lama untuk slot yang diganti
+        Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', 'in', field_names),
+        ]).unlink()
+
+        filename_vals = {}
+        for upload in uploads:
+            upload.attachment_id.write({
+                'name': upload.field_name,
+                'res_model': self._name,
+                'res_field': upload.field_name,
+                'res_id': self.id,
+            })
+            filename_vals[DOCUMENT_FIELDS[upload.field_name]] = upload.filename
+        uploads.write({'state': 'committed'})
+
+        self.invalidate_recordset(field_names)
+        self.sudo().write(filename_vals)
+        self._sync_document_metadata(field_names)
+
+    def _document_meta(self):
+        """Dict {field_name: certification.document} untuk dokumen yang sudah diupload"""
+        self.ensure_one()
+        return {doc.field_name: doc for doc in self.sudo().document_ids if doc.has_file}
+
+    def _get_document_stream(self, field_name):
+        """Ambil stream dokumen langsung dari filestore tanpa memuat isi file ke memori"""
+        self.ensure_one()
+        if field_name not in DOCUMENT_FIELDS:
+            raise ValueError(f"Field dokumen '{field_name}' tidak dikenal")
+        return self.env['ir.binary']._get_stream_from(
+            self.sudo(),
+            field_name,
+            filename_field=DOCUMENT_FIELDS[field_name],
+        )
+
     # =========================================================
     # XENDIT INTEGRATION METHODS
     # =========================================================
@@ -292,23 +492,13 @@ class CertificationApplication(models.Model):
         return self.env['ir.config_parameter'].sudo().get_param('web.base.url', 'http://localhost:8019')
     
     def _get_product_by_scheme(self):
-        """Find product based on certification scheme"""
-        product_name = 'Coating Inspector Level 1' if self.scheme == 'level1' else 'Coating Inspector Level 2'
-        product = self.env['product.product'].sudo().search([
-            ('name', 'ilike', product_name)
-        ], limit=1)
-        return product
+        """Find product based on certification scheme (katalog cert.scheme)"""
+        return self.env['cert.scheme']._get_scheme_product(self.scheme)
     
-    def _create_invoice(self):
-        """Create Odoo invoice for the application"""
+    def _prepare_invoice_vals(self, product):
+        """Nilai account.move untuk invoice aplikasi ini"""
         self.ensure_one()
-        
-        product = self._get_product_by_scheme()
-        if not product:
-            raise ValueError(f"Produk '{self.scheme}' tidak ditemukan di database!")
-        
-        # Create invoice
-        invoice_vals = {
+        return {
             'move_type': 'out_invoice',
             'partner_id': self.partner_id.id,
             'invoice_date': fields.Date.today(),
@@ -319,26 +509,86 @@ class CertificationApplication(models.Model):
                 'price_unit': self.payment_amount,
             })],
         }
+
+    def _create_invoice(self):
+        """Create Odoo invoice for the application"""
+        self.ensure_one()
+        
+        product = self._get_product_by_scheme()
+        if not product:
+            raise ValueError(f"Produk '{self.scheme}' tidak ditemukan di database!")
         
-        invoice = self.env['account.move'].sudo().create(invoice_vals)
+        invoice = self.env['account.move'].sudo().create(self._prepare_invoice_vals(product))
         invoice.action_post()  # Validate/post the invoice
         
         self.invoice_id = invoice.id
         return invoice
+
+    def _create_invoices_batch(self):
+        """Buat & post invoice untuk banyak aplikasi sekaligus
+
+        Return (aplikasi_berhasil, {aplikasi: pesan_error}). Satu aplikasi yang gagal
+        tidak membatalkan aplikasi lain.
+        """
+        errors = {}
+        # Produk per skema dari katalog, bukan pencarian per aplikasi
+        products = {}
+        for scheme in set(self.mapped('scheme')):
+            products[scheme] = self.filtered(lambda a: a.scheme == scheme)[:1]._get_product_by_scheme()
+
+        todo = self.browse()
+        for rec in self:
+            if not products.get(rec.scheme):
+                errors[rec] = f"Produk '{rec.scheme}' tidak ditemukan di database!"
+            else:
+                todo |= rec
+        if not todo:
+            return todo, errors
+
+        Move = self.env['account.move'].sudo()
+        try:
+            with self.env.cr.savepoint():
+                invoices = Move.create([rec._prepare_invoice_vals(products[rec.scheme]) for rec in todo])
+                invoices.action_post()
+        except Exception as e:
+            # Ada yang gagal di batch -> ulangi satu per satu untuk tahu yang mana
+            _logger.warning(f"Batch invoice creation failed ({e}), retrying per application")
+            done = self.browse()
+            for rec in todo:
+                try:
+                    with self.env.cr.savepoint():
+                        rec._create_invoice()
+                    done |= rec
+                except Exception as err:
+                    errors[rec] = str(err)
+            return done, errors
+
+        for rec, invoice in zip(todo, invoices):
+            rec.invoice_id = invoice.id
+        return todo, errors
     
-    def _create_xendit_invoice(self):
-        """Create invoice on Xendit and get payment URL"""
+    def _get_xendit_api_url(self):
+        """Base URL API Xendit (bisa diarahkan ke server tiruan untuk testing)"""
+        return self.env['ir.config_parameter'].sudo().get_param('xendit.api_url', 'https://api.xendit.co').rstrip('/')
+
+    def _create_xendit_invoice(self, idempotency_key=None):
+        """Create invoice on Xendit and get payment URL
+
+        Dipanggil oleh certification.xendit.job; error HTTP dibiarkan naik agar job bisa retry.
+        Invoice yang masih berlaku untuk external_id yang sama dipakai ulang, dan POST
+        membawa X-IDEMPOTENCY-KEY, sehingga retry setelah timeout tidak membuat invoice ganda.
+        """
         self.ensure_one()
         
         api_key = self._get_xendit_api_key()
         if not api_key:
-            _logger.warning("Xendit API key not configured!")
-            return False
+            raise UserError("Xendit API key belum dikonfigurasi (xendit.api_key)")
         
         base_url = self._get_base_url()
         
         # Prepare request
-        url = "https://api.xendit.co/v2/invoices"
+        api_url = self._get_xendit_api_url()
+        external_id = f"CERT-{self.id}"
         auth = base64.b64encode(f"{api_key}:".encode()).decode()
         
         headers = {
@@ -346,10 +596,20 @@ class CertificationApplication(models.Model):
             "Content-Type": "application/json"
         }
         
-        scheme_name = 'Coating Inspector Level 1' if self.scheme == 'level1' else 'Coating Inspector Level 2'
+        # Percobaan sebelumnya mungkin sudah sampai ke Xendit walau responsnya hilang
+        data = find_xendit_invoice(api_url, headers, external_id)
+        if data:
+            _logger.info(f"Xendit invoice {data.get('id')} reused for application {self.id}")
+            self._store_xendit_invoice(data)
+            return data
+        
+        if idempotency_key:
+            headers["X-IDEMPOTENCY-KEY"] = idempotency_key
+        
+        scheme_name = self.env['cert.scheme']._get_scheme_data(self.scheme).get('name') or 'Sertifikasi'
         
         payload = {
-            "external_id": f"CERT-{self.id}",
+            "external_id": external_id,
             "amount": int(self.payment_amount),
             "description": f"Biaya Sertifikasi {scheme_name}",
             "invoice_duration": 86400 * 3,  # 3 days
@@ -367,88 +627,265 @@ class CertificationApplication(models.Model):
             }]
         }
         
-        try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            
+        # Session bersama (keep-alive) -> tidak ada TLS handshake baru per invoice
+        response = get_xendit_session().post(
+            f"{api_url}/v2/invoices", json=payload, headers=headers, timeout=XENDIT_TIMEOUT
+        )
+        response.raise_for_status()
+        
+        data = response.json()
+        self._store_xendit_invoice(data)
+        
+        _logger.info(f"Xendit invoice created: {data.get('id')} for application {self.id}")
+        return data
+
+    def _store_xendit_invoice(self, data):
+        """Simpan id & URL invoice Xendit ke aplikasi
+
+        Status selalu 'pending'; pelunasan diterapkan webhook / cron rekonsiliasi.
+        """
+        self.ensure_one()
+        self.write({
+            'xendit_invoice_id': data.get('id'),
+            'xendit_payment_url': data.get('invoice_url'),
+            'xendit_status': 'pending',
+        })
+
+    def _on_xendit_invoice_ready(self):
+        """Dipanggil job setelah link pembayaran Xendit berhasil dibuat"""
+        self.ensure_one()
+        self.message_post(
+            body=f"<b style='color:blue'>💳 LINK PEMBAYARAN SIAP</b><br/>"
+                 f"<a href='{self.xendit_payment_url}' target='_blank'>Klik untuk bayar via Xendit</a>"
+        )
+        self._send_payment_email()
+    
+    def _lock_for_update(self):
+        """Kunci baris aplikasi (SELECT ... FOR UPDATE) agar webhook & admin tidak balapan"""
+        if self.ids:
+            self.env.cr.execute(
+                "SELECT id FROM certification_application WHERE id IN %s FOR UPDATE",
+                (tuple(self.ids),)
+            )
+            # Baca ulang nilai terbaru setelah lock didapat
+            self.invalidate_recordset()
+
+    def _apply_xendit_status(self, status, xendit_id=None, payment_method=None):
+        """Terapkan status invoice Xendit (PAID/EXPIRED/FAILED) secara idempoten
+
+        Return True jika ada perubahan. Dipakai worker webhook.
+        """
+        self.ensure_one()
+        self._lock_for_update()
+
+        if status == 'PAID':
+            if self.payment_status == 'paid':
+                return False
             self.write({
-                'xendit_invoice_id': data.get('id'),
-                'xendit_payment_url': data.get('invoice_url'),
-                'xendit_status': 'pending',
+                'xendit_status': 'paid',
+                'payment_status': 'paid',
+                'state': 'verified',
+                'payment_date': fields.Datetime.now(),
+                'payment_method': payment_method or 'xendit',
             })
-            
-            _logger.info(f"Xendit invoice created: {data.get('id')} for application {self.id}")
-            return data
-            
-        except requests.exceptions.RequestException as e:
-            _logger.error(f"Xendit API error: {str(e)}")
-            return False
+            self.message_post(
+                body=f"<b style='color:green'>✅ PEMBAYARAN DITERIMA (Xendit)</b><br/>"
+                     f"ID: {xendit_id}<br/>"
+                     f"Metode: {payment_method or '-'}"
+            )
+            _logger.info(f"Application {self.id} payment confirmed via Xendit")
+            return True
+
+        if status in ('EXPIRED', 'FAILED'):
+            new_status = status.lower()
+            # Jangan timpa pembayaran yang sudah lunas
+            if self.payment_status == 'paid' or self.xendit_status == new_status:
+                return False
+            self.write({'xendit_status': new_status})
+            if new_status == 'expired':
+                self.message_post(body="<b style='color:orange'>⏰ INVOICE XENDIT KADALUARSA</b>")
+            else:
+                self.message_post(body="<b style='color:red'>❌ PEMBAYARAN GAGAL</b>")
+            return True
+
+        return False
+    
+    @api.model
+    def _cron_reconcile_xendit(self, batch_size=100, max_workers=8):
+        """Cron: cocokkan status invoice pending dengan Xendit (jika webhook hilang)
+
+        Status diambil paralel (thread pool terbatas, tanpa ORM di thread); perubahan
+        diterapkan lewat certification.xendit.event seperti webhook biasa.
+        """
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        api_key = self._get_xendit_api_key()
+        if not api_key:
+            _logger.warning("Xendit API key not configured, reconciliation skipped")
+            return
+
+        api_url = self._get_xendit_api_url()
+        headers = {"Authorization": f"Basic {base64.b64encode(f'{api_key}:'.encode()).decode()}"}
+        Event = self.env['certification.xendit.event'].sudo()
+        domain = [
+            ('state', '=', 'payment'),
+            ('xendit_status', '=', 'pending'),
+            ('xendit_invoice_id', '!=', False),
+        ]
+
+        checked = fixed = errors = 0
+        last_id = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while True:
+                # Keyset pagination: aman walau record berubah status di tengah jalan
+                page = self.sudo().search_read(domain + [('id', '>', last_id)],
+                                               ['xendit_invoice_id'], order='id', limit=batch_size)
+                if not page:
+                    break
+                last_id = page[-1]['id']
+
+                futures = [
+                    (row, pool.submit(fetch_xendit_invoice, api_url, headers, row['xendit_invoice_id']))
+                    for row in page
+                ]
+                for row, future in futures:
+                    checked += 1
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        errors += 1
+                        _logger.warning(f"Xendit reconcile: cannot fetch {row['xendit_invoice_id']}: {e}")
+                        continue
+                    if data.get('status') not in ('PAID', 'SETTLED', 'EXPIRED'):
+                        continue
+                    event = Event._ingest({
+                        'id': data.get('id') or row['xendit_invoice_id'],
+                        'external_id': f"CERT-{row['id']}",
+                        # SETTLED = PAID yang sudah dicairkan
+                        'status': 'PAID' if data.get('status') == 'SETTLED' else data.get('status'),
+                        'payment_method': data.get('payment_method'),
+                    }, source='reconcile')
+                    if event:
+                        event._process()
+                        fixed += event.state == 'done'
+
+                if auto_commit:
+                    self.env.cr.commit()
+
+        _logger.info(f"Xendit reconciliation: {checked} checked, {fixed} drifted records fixed, {errors} errors")
+        return fixed
     
+    def _queue_email(self, template_xmlid):
+        """Antrikan email template untuk semua record sekaligus
+
+        Tidak ada SMTP di request ini: mail.mail dikirim batch oleh cron mail queue
+        (satu koneksi SMTP per batch). Email disimpan (auto_delete=False) agar status
+        pengiriman bisa dilihat per aplikasi.
+        """
+        template = self.env.ref(template_xmlid, raise_if_not_found=False)
+        if not template or not self:
+            return self.env['mail.mail']
+
+        # Satu render batch (dikelompokkan per bahasa) untuk semua record
+        mails = template.sudo().send_mail_batch(self.ids, email_values={'auto_delete': False})
+        mail_by_res_id = {mail.res_id: mail for mail in mails}
+        for rec in self:
+            if rec.id in mail_by_res_id:
+                rec.last_email_id = mail_by_res_id[rec.id].id
+
+        cron = self.env.ref('mail.ir_cron_mail_scheduler_action', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return mails
+
     def _send_payment_email(self):
         """Send email to user with payment link"""
-        self.ensure_one()
-        
         try:
-            template = self.env.ref('iso17024_portall.email_template_payment_notification', raise_if_not_found=False)
-            if template:
-                template.sudo().send_mail(self.id, force_send=True)
-                _logger.info(f"Payment email sent to {self.partner_id.email} for application {self.id}")
+            self._queue_email('iso17024_portall.email_template_payment_notification')
+            _logger.info(f"Payment email queued for applications {self.ids}")
         except Exception as e:
-            _logger.error(f"Failed to send payment email: {str(e)}")
+            _logger.error(f"Failed to queue payment email: {str(e)}")
 
     # =========================================================
     # TOMBOL AKSI ADMIN
     # =========================================================
     
     def action_verify_documents(self):
-        """Admin APPROVE: Dokumen valid, create invoice & Xendit payment link"""
-        for rec in self:
-            # 1. Create Odoo Invoice
-            try:
-                rec._create_invoice()
-            except Exception as e:
-                return {
-                    'type': 'ir.actions.client',
-                    'tag': 'display_notification',
-                    'params': {
-                        'title': 'Error Membuat Invoice!',
-                        'message': str(e),
-                        'type': 'danger',
-                        'sticky': True,
-                    }
-                }
-            
-            # 2. Create Xendit Invoice
-            xendit_result = rec._create_xendit_invoice()
-            
-            # 3. Update state
-            rec.write({
+        """Admin APPROVE: Dokumen valid, create invoice & Xendit payment link
+
+        Bisa dijalankan untuk banyak aplikasi sekaligus (list view): invoice dibuat
+        dalam satu batch, error per aplikasi dikumpulkan jadi ringkasan.
+        """
+        apps = self.filtered(lambda a: a.state in ['submitted', 'revision'])
+        skipped = self - apps
+
+        # 1. Create Odoo Invoice (batch)
+        done, errors = apps._create_invoices_batch()
+
+        if done:
+            # 2. Update state
+            done.write({
                 'state': 'payment',
                 'admin_note': False,
             })
-            
-            # 4. Post message
-            if xendit_result and rec.xendit_payment_url:
-                rec.message_post(
-                    body=f"<b style='color:blue'>💳 MENUNGGU PEMBAYARAN</b><br/>"
-                         f"Dokumen valid. Invoice telah dibuat.<br/>"
-                         f"<a href='{rec.xendit_payment_url}' target='_blank'>Klik untuk bayar via Xendit</a>"
-                )
-            else:
-                rec.message_post(
-                    body="<b style='color:blue'>💳 MENUNGGU PEMBAYARAN</b><br/>"
-                         "Dokumen valid. Invoice telah dibuat.<br/>"
-                         "<span style='color:orange'>⚠️ Xendit payment link gagal dibuat. Silakan cek konfigurasi API.</span>"
-                )
-            
-            # 5. Send email
-            rec._send_payment_email()
+
+            # 3. Post message (satu insert untuk semua aplikasi)
+            body = Markup(
+                "<b style='color:blue'>💳 MENUNGGU PEMBAYARAN</b><br/>"
+                "Dokumen valid. Invoice telah dibuat.<br/>"
+                "Link pembayaran Xendit sedang dibuat dan akan dikirim via email."
+            )
+            done._message_log_batch(bodies={rec.id: body for rec in done})
+
+            # 4. Xendit invoice + email dikerjakan cron di background (dengan retry)
+            self.env['certification.xendit.job']._enqueue(done)
+
+        if len(self) == 1 and not errors and not skipped:
+            return True
+        return self._verify_summary_notification(done, errors, skipped)
+
+    def _verify_summary_notification(self, done, errors, skipped):
+        """Ringkasan hasil verifikasi massal"""
+        lines = [f"{len(done)} aplikasi diverifikasi."]
+        if skipped:
+            lines.append(f"{len(skipped)} dilewati (status bukan Submitted/Revisi).")
+        for rec, message in errors.items():
+            lines.append(f"❌ {rec.partner_id.name or rec.id}: {message}")
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Error Membuat Invoice!' if errors else 'Verifikasi Selesai',
+                'message': "\n".join(lines),
+                'type': 'danger' if errors else 'success',
+                'sticky': bool(errors),
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
+
+    def action_retry_xendit_invoice(self):
+        """Admin: antrikan ulang pembuatan link Xendit yang gagal"""
+        apps = self.filtered(lambda a: a.state == 'payment' and not a.xendit_payment_url and a.xendit_job_state != 'queued')
+        self.env['certification.xendit.job']._enqueue(apps)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Link Xendit Diantrikan',
+                'message': f'{len(apps)} aplikasi akan diproses ulang di background.',
+                'type': 'info',
+                'sticky': False,
+            }
+        }
 
     def action_confirm_payment(self):
         """Admin/System CONFIRM PAYMENT: Sudah bayar, verified"""
-        self.write({
+        # Lock baris yang sama dengan worker webhook -> konfirmasi tidak terjadi dua kali
+        self._lock_for_update()
+        apps = self.filtered(lambda a: a.payment_status != 'paid')
+        if not apps:
+            return
+
+        apps.write({
             'state': 'verified',
             'payment_status': 'paid',
             'xendit_status': 'paid',
@@ -456,12 +893,13 @@ class CertificationApplication(models.Model):
             'confirmed_by': self.env.user.id,
         })
         
-        # Update invoice as paid if exists
-        if self.invoice_id and self.invoice_id.state == 'posted':
-            # For simplicity, just post a message. Full reconciliation requires payment journal.
-            self.invoice_id.message_post(body="Pembayaran dikonfirmasi via Xendit")
-        
-        self.message_post(body="<b style='color:green'>✅ PEMBAYARAN DITERIMA</b><br/>Status aplikasi kini Terverifikasi.")
+        for rec in apps:
+            # Update invoice as paid if exists
+            if rec.invoice_id and rec.invoice_id.state == 'posted':
+                # For simplicity, just post a message. Full reconciliation requires payment journal.
+                rec.invoice_id.message_post(body="Pembayaran dikonfirmasi via Xendit")
+            
+            rec.message_post(body="<b style='color:green'>✅ PEMBAYARAN DITERIMA</b><br/>Status aplikasi kini Terverifikasi.")
 
     def action_set_schedule(self):
         """Admin SET SCHEDULE: Menjadwalkan ujian asesi setelah pembayaran dikonfirmasi"""
@@ -534,12 +972,10 @@ class CertificationApplication(models.Model):
     def _send_revision_email(self):
         """Kirim email ke user dengan detail dokumen yang perlu direvisi"""
         try:
-            template = self.env.ref('iso17024_portall.email_template_revision_notification', raise_if_not_found=False)
-            if template:
-                template.sudo().send_mail(self.id, force_send=True)
-                _logger.info(f"Revision email sent to {self.partner_id.email} for application {self.id}")
+            self._queue_email('iso17024_portall.email_template_revision_notification')
+            _logger.info(f"Revision email queued for applications {self.ids}")
         except Exception as e:
-            _logger.error(f"Failed to send revision email: {str(e)}")
+            _logger.error(f"Failed to queue revision email: {str(e)}")
     
     def _clear_revision_flags(self):
         """Reset semua flag revisi setelah user submit ulang"""
@@ -597,7 +1033,8 @@ class CertificationApplication(models.Model):
         SVK-CIG01-0001-YYMMDD
         """
         # Nomor sertifikat = nomor registrasi
-        return self.partner_id.registration_code or f"SVK-CIG0{1 if self.scheme == 'level1' else 2}-TEMP-{self.id}"
+        prefix = self.env['cert.scheme']._get_scheme_data(self.scheme).get('registration_prefix') or 'CIG00'
+        return self.partner_id.registration_code or f"SVK-{prefix}-TEMP-{self.id}"
 
     def action_issue_certificate(self):
         """Admin terbitkan sertifikat untuk asesi yang LULUS"""
@@ -0,0 +1,42 @@
+from odoo import models
+import filecmp
+import os
+
+
+class IrAttachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    def _cert_filestore_path(self, checksum, source_path=None):
+        """Return (store_fname, full_path) untuk checksum, tanpa membaca isi ke memori
+
+        Layout sama dengan _get_path() bawaan, tapi _get_path() butuh bin_data untuk
+        cek tabrakan saat file sudah ada. Di sini file sumber dibandingkan langsung
+        di disk (filecmp). ValueError jika isinya berbeda (tabrakan sha1).
+        """
+        store_fname = f'{checksum[:2]}/{checksum}'
+        full_path = self._full_path(store_fname)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if source_path and os.path.isfile(full_path) and not filecmp.cmp(source_path, full_path, shallow=False):
+            raise ValueError("File bertabrakan dengan file lain di filestore")
+        return store_fname, full_path
+
+    def _cert_set_file_reference(self, store_fname, checksum, file_size, mimetype=None):
+        """Pasang file filestore yang sudah ada sebagai isi attachment ini (tanpa membaca isinya)
+
+        create()/write() membuang store_fname/checksum/file_size dari vals, jadi kolomnya
+        diisi langsung. File lama yang tidak dipakai lagi ditandai untuk GC filestore;
+        jika transaksi rollback, file baru tanpa referensi ikut dibersihkan GC.
+        """
+        self.ensure_one()
+        old_fname = self.store_fname
+        self._mark_for_gc(store_fname)
+        self.flush_recordset()
+        self.env.cr.execute("""
+            UPDATE ir_attachment
+               SET store_fname = %s, checksum = %s, file_size = %s,
+                   mimetype = COALESCE(%s, mimetype), db_datas = NULL
+             WHERE id = %s
+        """, (store_fname, checksum, file_size, mimetype, self.id))
+        self.invalidate_recordset(['store_fname', 'checksum', 'file_size', 'mimetype', 'db_datas', 'raw', 'datas'])
+        if old_fname and old_fname != store_fname:
+            self._file_delete(old_fname)
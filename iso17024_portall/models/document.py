@@ -0,0 +1,213 @@
+from odoo import models, fields, api
+from odoo.tools.image import image_fix_orientation
+from PIL import Image
+import base64
+import io
+import logging
+
+from .application import DOCUMENT_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+# Dokumen yang dibuatkan thumbnail (foto & KTP) + ukuran/format turunannya
+DERIVATIVE_FIELDS = ['pas_foto', 'ktp_file']
+DERIVATIVE_SIZES = [128, 256, 1024]
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', 80),
+    'jpeg': ('JPEG', 85),
+}
+
+
+class CertificationDocument(models.Model):
+    """Metadata dokumen aplikasi (tanpa isi file) - dipakai view & template"""
+    _name = 'certification.document'
+    _description = 'Metadata Dokumen Aplikasi'
+    _order = 'application_id, id'
+
+    application_id = fields.Many2one(
+        'certification.application',
+        string='Aplikasi Sertifikasi',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    field_name = fields.Selection(
+        selection='_selection_field_name',
+        string='Dokumen',
+        required=True
+    )
+
+    has_file = fields.Boolean(string='Sudah Diupload?', default=False)
+    file_size = fields.Integer(string='Ukuran (Byte)')
+    mimetype = fields.Char(string='Mimetype')
+    checksum = fields.Char(string='Checksum (SHA1)', index=True)
+    original_checksum = fields.Char(
+        string='Checksum File Asli',
+        index=True,
+        help='SHA1 file seperti yang diupload kandidat (sebelum dikompres pipeline)'
+    )
+    uploaded_at = fields.Datetime(string='Waktu Upload')
+
+    # --- HASIL PIPELINE PEMROSESAN (lihat certification.document.job) ---
+    page_count = fields.Integer(string='Jumlah Halaman')
+    width = fields.Integer(string='Lebar', help='Piksel untuk gambar, point untuk PDF (halaman pertama)')
+    height = fields.Integer(string='Tinggi', help='Piksel untuk gambar, point untuk PDF (halaman pertama)')
+    job_ids = fields.One2many('certification.document.job', 'document_id', string='Job Pemrosesan')
+
+    # --- THUMBNAIL (dibuat sekali saat upload) ---
+    thumb_128_webp = fields.Binary(string='Thumbnail 128 (WebP)', attachment=True)
+    thumb_128_jpeg = fields.Binary(string='Thumbnail 128 (JPEG)', attachment=True)
+    thumb_256_webp = fields.Binary(string='Thumbnail 256 (WebP)', attachment=True)
+    thumb_256_jpeg = fields.Binary(string='Thumbnail 256 (JPEG)', attachment=True)
+    thumb_1024_webp = fields.Binary(string='Thumbnail 1024 (WebP)', attachment=True)
+    thumb_1024_jpeg = fields.Binary(string='Thumbnail 1024 (JPEG)', attachment=True)
+    has_derivatives = fields.Boolean(string='Thumbnail Tersedia?', default=False)
+
+    _sql_constraints = [
+        ('application_field_uniq', 'unique(application_id, field_name)',
+         'Metadata dokumen harus unik per aplikasi.'),
+    ]
+
+    @api.model
+    def _selection_field_name(self):
+        Application = self.env['certification.application']
+        return [(name, Application._fields[name].string) for name in DOCUMENT_FIELDS]
+
+    def _is_image(self):
+        self.ensure_one()
+        return bool(self.mimetype and self.mimetype.startswith('image/'))
+
+    # =========================================================
+    # DEDUPLIKASI BERDASARKAN ISI (CONTENT-ADDRESSED)
+    # =========================================================
+
+    def _content_attachment(self):
+        """Attachment yang memegang isi dokumen ini saat ini, kosong jika sudah berganti / hilang"""
+        self.ensure_one()
+        attachment = self._get_source_attachment()
+        if self.checksum and attachment.checksum == self.checksum:
+            return attachment
+        return attachment.browse()
+
+    @api.model
+    def _find_by_content(self, checksum):
+        """Dokumen mana pun (lintas revisi & aplikasi) yang berasal dari file identik"""
+        if not checksum:
+            return self.browse()
+        candidates = self.sudo().search([
+            ('has_file', '=', True),
+            '|', ('original_checksum', '=', checksum), ('checksum', '=', checksum),
+        ], limit=5)
+        for doc in candidates:
+            if doc._content_attachment():
+                return doc
+        return self.browse()
+
+    def _adopt_content(self, donor, attachment_id):
+        """Arahkan attachment ke file hasil proses milik donor + salin metadata & thumbnail
+
+        Isi file tidak dibaca/ditulis: referensi file donor dipasang di kolom attachment.
+        File lama hanya ditandai untuk GC filestore (dihapus setelah commit jika tak terpakai).
+        """
+        self.ensure_one()
+        Attachment = self.env['ir.attachment'].sudo()
+
+        attachment = Attachment.browse(attachment_id)
+        source = donor._content_attachment()
+        if attachment.checksum != donor.checksum:
+            if source.store_fname:
+                attachment._cert_set_file_reference(source.store_fname, source.checksum,
+                                                    source.file_size, source.mimetype)
+            else:
+                # Attachment disimpan di database: salin isinya lewat jalur biasa
+                attachment.write({'raw': source.raw, 'mimetype': source.mimetype})
+
+        has_derivatives = donor.has_derivatives
+        if donor != self:
+            thumb_fields = [f'thumb_{size}_{fmt}' for size in DERIVATIVE_SIZES for fmt in DERIVATIVE_FORMATS]
+            Attachment.search([
+                ('res_model', '=', self._name),
+                ('res_id', '=', self.id),
+                ('res_field', 'in', thumb_fields),
+            ]).unlink()
+            donor_thumbs = Attachment.search([
+                ('res_model', '=', self._name),
+                ('res_id', '=', donor.id),
+                ('res_field', 'in', thumb_fields),
+            ])
+            # copy() ikut menyalin isi (thumbnail kecil, file yang sama dipakai bersama di filestore)
+            for thumb in donor_thumbs:
+                thumb.copy({'res_id': self.id})
+            has_derivatives = has_derivatives and bool(donor_thumbs)
+            self.invalidate_recordset(thumb_fields)
+
+        self.write({
+            'has_file': True,
+            'file_size': donor.file_size,
+            'mimetype': donor.mimetype,
+            'checksum': donor.checksum,
+            'original_checksum': donor.original_checksum or donor.checksum,
+            'page_count': donor.page_count,
+            'width': donor.width,
+            'height': donor.height,
+            'has_derivatives': has_derivatives,
+            'uploaded_at': fields.Datetime.now(),
+        })
+        # Isi hasil proses donor bisa beda format dari file yang diupload (PNG -> JPEG)
+        self.env['certification.document.job']._rename_for_mimetype(self, donor.mimetype)
+
+    # =========================================================
+    # THUMBNAIL / DERIVATIVE
+    # =========================================================
+
+    def _get_source_attachment(self):
+        """Attachment file asli di aplikasi (filestore)"""
+        self.ensure_one()
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'certification.application'),
+            ('res_id', '=', self.application_id.id),
+            ('res_field', '=', self.field_name),
+        ], limit=1)
+
+    def _generate_derivatives(self):
+        """Buat thumbnail WebP & JPEG (128/256/1024 px) untuk foto dan KTP"""
+        for doc in self:
+            vals = {f'thumb_{size}_{fmt}': False for size in DERIVATIVE_SIZES for fmt in DERIVATIVE_FORMATS}
+            vals['has_derivatives'] = False
+
+            if doc.field_name in DERIVATIVE_FIELDS and doc.has_file and doc._is_image():
+                try:
+                    vals.update(doc._render_derivatives(doc._get_source_attachment().raw))
+                    vals['has_derivatives'] = True
+                except Exception as e:
+                    # File rusak / format tidak didukung -> preview pakai file asli
+                    _logger.warning(f"Failed to generate thumbnails for document {doc.id}: {e}")
+
+            doc.sudo().write(vals)
+
+    @api.model
+    def _render_derivatives(self, raw):
+        """Return dict {thumb_<size>_<fmt>: base64} dari isi gambar asli"""
+        image = Image.open(io.BytesIO(raw))
+        # JPEG besar: decode langsung di resolusi yang lebih kecil
+        image.draft('RGB', (max(DERIVATIVE_SIZES), max(DERIVATIVE_SIZES)))
+        image = image_fix_orientation(image)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        result = {}
+        # Dari besar ke kecil supaya setiap resize mulai dari gambar yang sudah diperkecil
+        for size in sorted(DERIVATIVE_SIZES, reverse=True):
+            image.thumbnail((size, size), Image.LANCZOS)
+            for fmt, (pil_format, quality) in DERIVATIVE_FORMATS.items():
+                output = io.BytesIO()
+                image.save(output, format=pil_format, quality=quality)
+                result[f'thumb_{size}_{fmt}'] = base64.b64encode(output.getvalue())
+        return result
+
+    def _derivative_url(self, size, fmt):
+        """URL thumbnail (cache-busted dengan checksum), False jika belum ada"""
+        self.ensure_one()
+        if not self.has_derivatives or size not in DERIVATIVE_SIZES or fmt not in DERIVATIVE_FORMATS:
+            return False
+        return f'/certification/document/{self.id}/thumb/{size}/{fmt}?unique={self.checksum}'
@@ -0,0 +1,241 @@
+from odoo import models, fields, api
+from odoo.tools.image import image_fix_orientation
+from odoo.tools.misc import find_in_path
+from odoo.tools.pdf import PdfFileReader
+from PIL import Image
+import io
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+from .application import DOCUMENT_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+# Mimetype yang diproses pipeline
+PDF_MIMETYPES = ['application/pdf']
+IMAGE_MIMETYPES = ['image/jpeg', 'image/png']
+# Ekstensi nama file untuk mimetype hasil pipeline (gambar selalu di-encode ulang ke JPEG)
+OUTPUT_EXTENSIONS = {
+    'image/jpeg': ('.jpg', '.jpeg'),
+    'application/pdf': ('.pdf',),
+}
+# Normalisasi gambar: sisi terpanjang & kualitas JPEG
+IMAGE_MAX_SIZE = 2048
+IMAGE_QUALITY = 85
+# Batas percobaan sebelum job dianggap gagal permanen
+MAX_ATTEMPTS = 3
+
+
+def _find_binary(name):
+    try:
+        return find_in_path(name)
+    except IOError:
+        return None
+
+
+class CertificationDocumentJob(models.Model):
+    """Antrian pemrosesan dokumen setelah upload (kompresi PDF, normalisasi gambar)"""
+    _name = 'certification.document.job'
+    _description = 'Job Pemrosesan Dokumen'
+    _order = 'id'
+
+    document_id = fields.Many2one(
+        'certification.document',
+        string='Dokumen',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    checksum = fields.Char(string='Checksum Saat Antri', help='Job dilewati jika file sudah berganti')
+    state = fields.Selection([
+        ('queued', 'Antri'),
+        ('done', 'Selesai'),
+        ('skipped', 'Dilewati'),
+        ('failed', 'Gagal'),
+    ], string='Status', default='queued', required=True, index=True)
+    attempts = fields.Integer(string='Jumlah Percobaan', default=0)
+    error = fields.Text(string='Error')
+
+    size_before = fields.Integer(string='Ukuran Awal (Byte)')
+    size_after = fields.Integer(string='Ukuran Akhir (Byte)')
+    duration_ms = fields.Integer(string='Durasi (ms)')
+    processed_at = fields.Datetime(string='Waktu Proses')
+
+    # =========================================================
+    # ANTRIAN
+    # =========================================================
+
+    @api.model
+    def _enqueue(self, documents):
+        """Masukkan dokumen ke antrian; hanya insert baris, tidak memproses apa pun"""
+        documents = documents.filtered(
+            lambda d: d.has_file and d.mimetype in PDF_MIMETYPES + IMAGE_MIMETYPES
+        )
+        if not documents:
+            return self
+        jobs = self.sudo().create([{
+            'document_id': doc.id,
+            'checksum': doc.checksum,
+        } for doc in documents])
+        # Jalankan worker secepatnya di proses cron, bukan di request ini
+        cron = self.env.ref('iso17024_portall.ir_cron_process_document_jobs', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return jobs
+
+    @api.model
+    def _cron_process_jobs(self, limit=20):
+        """Worker cron: ambil job antri (SKIP LOCKED agar aman dijalankan paralel)"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+
+        self.env.cr.execute("""
+            SELECT id FROM certification_document_job
+             WHERE state = 'queued'
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, (limit,))
+        jobs = self.browse([row[0] for row in self.env.cr.fetchall()])
+
+        for job in jobs:
+            job._process()
+            if auto_commit:
+                self.env.cr.commit()
+
+        remaining = self.search_count([('state', '=', 'queued')])
+        if remaining:
+            self.env['ir.cron']._notify_progress(done=len(jobs), remaining=remaining)
+
+    # =========================================================
+    # PEMROSESAN
+    # =========================================================
+
+    def _process(self):
+        self.ensure_one()
+        doc = self.document_id
+        if not doc.has_file or doc.checksum != self.checksum:
+            # File sudah diganti / dihapus -> job baru yang akan memprosesnya
+            self.write({'state': 'skipped', 'processed_at': fields.Datetime.now()})
+            return
+
+        started = time.monotonic()
+        attachment = doc._get_source_attachment()
+        try:
+            raw = attachment.raw
+            if doc.mimetype in PDF_MIMETYPES:
+                new_raw, meta = self._process_pdf(raw)
+            else:
+                new_raw, meta = self._process_image(raw)
+        except Exception as e:
+            _logger.warning(f"Document job {self.id} failed: {e}")
+            self.write({
+                'attempts': self.attempts + 1,
+                'state': 'failed' if self.attempts + 1 >= MAX_ATTEMPTS else 'queued',
+                'error': str(e),
+            })
+            return
+
+        doc_vals = dict(meta)
+        # Hanya ganti file jika hasilnya memang lebih kecil
+        if new_raw and len(new_raw) < len(raw):
+            mimetype = 'image/jpeg' if doc.mimetype in IMAGE_MIMETYPES else doc.mimetype
+            attachment.write({'raw': new_raw, 'mimetype': mimetype})
+            doc_vals.update({
+                'file_size': attachment.file_size,
+                'checksum': attachment.checksum,
+                'mimetype': attachment.mimetype,
+            })
+            self._rename_for_mimetype(doc, attachment.mimetype)
+        doc.write(doc_vals)
+        if 'checksum' in doc_vals:
+            doc._generate_derivatives()
+
+        self.write({
+            'state': 'done',
+            'attempts': self.attempts + 1,
+            'error': False,
+            'size_before': len(raw),
+            'size_after': doc.file_size,
+            'duration_ms': int((time.monotonic() - started) * 1000),
+            'processed_at': fields.Datetime.now(),
+        })
+
+    @api.model
+    def _rename_for_mimetype(self, doc, mimetype):
+        """Sesuaikan ekstensi nama file dokumen (mis. foto.png -> foto.jpg setelah encode ulang)"""
+        extensions = OUTPUT_EXTENSIONS.get(mimetype)
+        application = doc.application_id.sudo()
+        filename_field = DOCUMENT_FIELDS[doc.field_name]
+        filename = application[filename_field]
+        if not extensions or not filename:
+            return
+        base, ext = os.path.splitext(filename)
+        if ext.lower() not in extensions:
+            application.write({filename_field: base + extensions[0]})
+
+    @api.model
+    def _process_image(self, raw):
+        """Normalisasi orientasi, perkecil ke IMAGE_MAX_SIZE, encode ulang JPEG"""
+        image = Image.open(io.BytesIO(raw))
+        image.draft('RGB', (IMAGE_MAX_SIZE, IMAGE_MAX_SIZE))
+        image = image_fix_orientation(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((IMAGE_MAX_SIZE, IMAGE_MAX_SIZE), Image.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=IMAGE_QUALITY, optimize=True, progressive=True)
+        meta = {
+            'width': image.width,
+            'height': image.height,
+            'page_count': 1,
+        }
+        return output.getvalue(), meta
+
+    @api.model
+    def _process_pdf(self, raw):
+        """Kompres (ghostscript) dan linearise (qpdf) jika tersedia, lalu baca jumlah halaman"""
+        result = raw
+        gs = _find_binary('gs')
+        qpdf = _find_binary('qpdf')
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = os.path.join(tmp_dir, 'source.pdf')
+            with open(source, 'wb') as fp:
+                fp.write(raw)
+
+            if gs:
+                compressed = os.path.join(tmp_dir, 'compressed.pdf')
+                subprocess.run([
+                    gs, '-q', '-dNOPAUSE', '-dBATCH', '-dSAFER',
+                    '-sDEVICE=pdfwrite', '-dPDFSETTINGS=/ebook',
+                    '-dCompatibilityLevel=1.5',
+                    f'-sOutputFile={compressed}', source,
+                ], check=True, timeout=120, capture_output=True)
+                source = compressed
+
+            if qpdf:
+                linearized = os.path.join(tmp_dir, 'linearized.pdf')
+                subprocess.run([
+                    qpdf, '--linearize', '--object-streams=generate', source, linearized,
+                ], check=True, timeout=60, capture_output=True)
+                source = linearized
+
+            if gs or qpdf:
+                with open(source, 'rb') as fp:
+                    result = fp.read()
+
+        reader = PdfFileReader(io.BytesIO(result), strict=False)
+        pages = reader.pages
+        # Ukuran halaman pertama dalam point (1/72 inch): [x0, y0, x1, y1]
+        box = pages[0].mediabox if len(pages) else None
+        meta = {
+            'page_count': len(pages),
+            'width': int(float(box[2]) - float(box[0])) if box else 0,
+            'height': int(float(box[3]) - float(box[1])) if box else 0,
+        }
+        return result, meta
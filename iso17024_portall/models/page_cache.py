@@ -0,0 +1,141 @@
+from odoo import models, api, tools
+from odoo.http import request
+from odoo.tools.misc import file_path
+from markupsafe import Markup
+from PIL import Image
+import hashlib
+import io
+import logging
+import re
+
+_logger = logging.getLogger(__name__)
+
+# Penanda token CSRF di HTML yang di-cache (diisi ulang per session saat disajikan)
+CSRF_PLACEHOLDER = '__CERT_PAGE_CACHE_CSRF__'
+# Lama proxy / browser boleh memakai halaman tanpa bertanya ulang (detik)
+PAGE_CACHE_MAX_AGE = 300
+# Parameter tracking iklan: tidak mengubah isi halaman, tidak boleh memecah cache
+TRACKING_PARAM_PREFIX = 'utm_'
+TRACKING_PARAMS = {'fbclid', 'gclid', 'msclkid'}
+# URL di atribut HTML yang punya query string (keep_query() menyalin parameter request)
+URL_ATTR_RE = re.compile(rb'(\b(?:href|action|src)=")([^"]*\?[^"]*)(")')
+
+# Thumbnail snippet (panel website builder): sumber 1024px -> turunan kecil
+SNIPPET_IMAGE_DIR = 'iso17024_portall/static/src/img/snippets'
+SNIPPET_THUMB_WIDTHS = [200, 400]
+SNIPPET_THUMB_FORMATS = {
+    'webp': ('WEBP', 80, 'image/webp'),
+    'jpeg': ('JPEG', 82, 'image/jpeg'),
+}
+
+# Placeholder di kartu soal yang di-cache (diisi per attempt saat halaman ujian dirakit)
+QUESTION_LINE_PLACEHOLDER = '__CERT_LINE_ID__'
+QUESTION_NUMBER_PLACEHOLDER = '__CERT_QUESTION_NUMBER__'
+QUESTION_TOTAL_PLACEHOLDER = '__CERT_QUESTION_TOTAL__'
+
+
+def is_tracking_param(name):
+    return name.startswith(TRACKING_PARAM_PREFIX) or name in TRACKING_PARAMS
+
+
+def strip_tracking_params(html):
+    """Buang parameter tracking dari URL di HTML (mis. language selector via keep_query())"""
+    def clean(match):
+        url = match.group(2).decode()
+        base, _sep, rest = url.partition('?')
+        query, hash_sep, fragment = rest.partition('#')
+        pairs = [pair for pair in re.split(r'&amp;|&', query) if pair]
+        kept = [pair for pair in pairs if not is_tracking_param(pair.split('=', 1)[0])]
+        if len(kept) == len(pairs):
+            return match.group(0)
+        url = base + ('?' + '&amp;'.join(kept) if kept else '') + (hash_sep + fragment)
+        return match.group(1) + url.encode() + match.group(3)
+    return URL_ATTR_RE.sub(clean, html)
+
+
+class CertPageCache(models.AbstractModel):
+    """Cache HTML halaman publik (marketing & pilih level) untuk pengunjung anonim"""
+    _name = 'cert.page.cache'
+    _description = 'Cache Halaman Publik Sertifikasi'
+
+    @api.model
+    @tools.ormcache('template', 'website_id', 'lang', cache='templates')
+    def _get_rendered_page(self, template, website_id, lang):
+        """Return (html, etag). Cache 'templates' otomatis dibersihkan saat view/snippet diedit
+
+        Request dengan parameter tracking (utm_*) juga boleh mengisi cache: parameter itu
+        dibuang dari HTML sebelum disimpan. Request dengan query lain tidak sampai ke sini.
+        """
+        html = request.render(template).render()
+        if isinstance(html, str):
+            html = html.encode()
+        html = strip_tracking_params(html)
+        # Token CSRF milik session yang kebetulan me-render tidak boleh ikut di-cache
+        html = html.replace(request.csrf_token(None).encode(), CSRF_PLACEHOLDER.encode())
+        etag = hashlib.sha1(html).hexdigest()
+        _logger.info(f"Public page cached: {template} (website {website_id}, {lang})")
+        return html, etag
+
+    @api.model
+    @tools.ormcache('name', 'width', 'fmt')
+    def _get_snippet_thumbnail(self, name, width, fmt):
+        """Return (isi, mimetype, hash sumber). Dibuat sekali per worker saat pertama diminta"""
+        with open(file_path(f'{SNIPPET_IMAGE_DIR}/{name}.png'), 'rb') as fp:
+            raw = fp.read()
+        source_hash = hashlib.sha1(raw).hexdigest()[:8]
+
+        pil_format, quality, mimetype = SNIPPET_THUMB_FORMATS[fmt]
+        # Sebagian "png" sebenarnya JPEG; PIL membaca dari isi file, bukan ekstensi
+        image = Image.open(io.BytesIO(raw))
+        image.draft('RGB', (width, width))
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        image.thumbnail((width, width), Image.LANCZOS)
+        if image.mode == 'RGBA' and pil_format == 'JPEG':
+            # JPEG tanpa alpha: tempel di atas latar putih
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[3])
+            image = background
+        output = io.BytesIO()
+        image.save(output, format=pil_format, quality=quality)
+        return output.getvalue(), mimetype, source_hash
+
+    @api.model
+    @tools.ormcache('question_id', 'write_date', cache='templates')
+    def _get_question_fragment(self, question_id, write_date):
+        """HTML kartu soal tanpa data peserta; write_date di key = soal yang diedit otomatis dirender ulang"""
+        question = self.env['cert.question'].sudo().browse(question_id)
+        return str(self.env['ir.qweb']._render('iso17024_portall.quiz_question_card', {
+            'question': question,
+            'line_ref': QUESTION_LINE_PLACEHOLDER,
+            'number': QUESTION_NUMBER_PLACEHOLDER,
+            'total': QUESTION_TOTAL_PLACEHOLDER,
+        }))
+
+    @api.model
+    def _render_attempt_questions(self, attempt):
+        """Rakit kartu soal sesuai urutan acak attempt. Return (html, {line_id: jawaban tersimpan})"""
+        self.env['cert.answer.line'].flush_model(['attempt_id', 'question_id', 'selected'])
+        self.env['cert.question'].flush_model(['write_date'])
+        # Hanya id & write_date soal yang dibaca (konten soal diambil dari cache)
+        self.env.cr.execute("""
+            SELECT l.id, l.question_id, l.selected, q.write_date
+              FROM cert_answer_line l
+              JOIN cert_question q ON q.id = l.question_id
+             WHERE l.attempt_id = %s
+             ORDER BY l.id
+        """, (attempt.id,))
+        rows = self.env.cr.fetchall()
+
+        total = str(len(rows))
+        cards = []
+        saved_answers = {}
+        for index, (line_id, question_id, selected, write_date) in enumerate(rows):
+            cards.append(
+                self._get_question_fragment(question_id, write_date)
+                .replace(QUESTION_LINE_PLACEHOLDER, str(line_id))
+                .replace(QUESTION_NUMBER_PLACEHOLDER, str(index + 1))
+                .replace(QUESTION_TOTAL_PLACEHOLDER, total)
+            )
+            if selected:
+                saved_answers[line_id] = selected
+        return Markup(''.join(cards)), saved_answers
@@ -1,4 +1,8 @@
 from odoo import models, fields, api
+from odoo.exceptions import UserError
+from markupsafe import Markup
+import hashlib
+import json
 
 class ResPartnerRegistration(models.Model):
     _inherit = 'res.partner'
@@ -53,6 +57,77 @@ class ResPartnerRegistration(models.Model):
         readonly=True
     )
 
+    # Aplikasi sertifikasi kandidat; route portal memakai pointer current_application_id
+    certification_application_ids = fields.One2many('certification.application', 'partner_id', string='Aplikasi Sertifikasi')
+    current_application_id = fields.Many2one(
+        'certification.application',
+        string='Aplikasi Aktif',
+        compute='_compute_current_application',
+        store=True,
+        index=True,
+        help='Aplikasi terbaru kandidat (resertifikasi membuat aplikasi baru -> pointer ikut pindah)'
+    )
+
+    _sql_constraints = [
+        ('registration_code_uniq', 'unique(registration_code)', 'Kode registrasi sudah dipakai kandidat lain.'),
+    ]
+
+    # Email persetujuan registrasi (dikirim lewat antrian mail.mail)
+    registration_email_id = fields.Many2one('mail.mail', string='Email Persetujuan', readonly=True, copy=False, ondelete='set null')
+    registration_email_state = fields.Selection(related='registration_email_id.state', string='Status Email Persetujuan')
+
+    @api.depends('certification_application_ids')
+    def _compute_current_application(self):
+        for partner in self:
+            # Terbaru = id terbesar, deterministik walau kandidat punya beberapa aplikasi
+            partner.current_application_id = max(partner.certification_application_ids, key=lambda a: a.id, default=False)
+
+    # ========================================
+    # STATUS RINGKAS (POLLING PORTAL)
+    # ========================================
+
+    def _get_portal_status(self):
+        """Ringkasan status kandidat + version (hash) untuk endpoint JSON polling"""
+        self.ensure_one()
+        status = {
+            'registration_state': self.registration_state,
+            'application': None,
+        }
+        app = self.current_application_id
+        if app:
+            # read() hanya field yang dibutuhkan, bukan seluruh record aplikasi
+            data = app.sudo().read(['state', 'payment_status', 'xendit_status', 'exam_date', 'exam_time', 'exam_location'])[0]
+            status['application'] = {
+                'state': data['state'],
+                'payment_status': data['payment_status'],
+                'xendit_status': data['xendit_status'],
+                'exam_date': fields.Date.to_string(data['exam_date']) if data['exam_date'] else False,
+                'exam_time': data['exam_time'],
+                'exam_location': data['exam_location'],
+            }
+        status['version'] = hashlib.sha1(json.dumps(status, sort_keys=True).encode()).hexdigest()[:16]
+        return status
+
+    # ========================================
+    # LOGIN GATE
+    # ========================================
+
+    @api.model
+    def _get_registration_state_by_login(self, login, website_id=None):
+        """Status registrasi pemilik login dalam satu query (gerbang /web/login)"""
+        self.env.cr.execute("""
+            SELECT p.registration_state
+              FROM res_users u
+              JOIN res_partner p ON p.id = u.partner_id
+             WHERE u.login = %s
+               AND u.active
+               AND (u.website_id IS NULL OR u.website_id = %s)
+             ORDER BY u.website_id NULLS LAST
+             LIMIT 1
+        """, (login, website_id))
+        row = self.env.cr.fetchone()
+        return row[0] if row else None
+
     # ========================================
     # SEQUENCE FOR REGISTRATION CODE
     # ========================================
@@ -65,57 +140,111 @@ class ResPartnerRegistration(models.Model):
         - 0001 = Nomor urut per level (auto increment)
         - YYMMDD = Tanggal pendaftaran
         """
-        today = fields.Date.today()
-        date_str = today.strftime('%y%m%d')  # YYMMDD
-        
-        # Determine level code
+        self.ensure_one()
         level = self.pending_cert_level or 'level1'
-        level_code = 'CIG01' if level == 'level1' else 'CIG02'
-        
-        # Get sequence for specific level
-        seq_code = f'candidate.registration.{level}'
-        sequence = self.env['ir.sequence'].sudo().next_by_code(seq_code)
-        
+        number = self._reserve_registration_numbers(level, 1)[0]
+        return self._format_registration_code(level, number)
+
+    @api.model
+    def _format_registration_code(self, level, number):
+        date_str = fields.Date.today().strftime('%y%m%d')  # YYMMDD
+        level_code = self.env['cert.scheme']._get_scheme_data(level).get('registration_prefix') or 'CIG00'
+        return f"SVK-{level_code}-{number}-{date_str}"
+
+    @api.model
+    def _reserve_registration_numbers(self, level, count):
+        """Ambil `count` nomor urut berurutan untuk satu level dalam satu panggilan terkunci
+
+        Baris ir.sequence dikunci (FOR UPDATE) sehingga approval paralel tidak bisa
+        mendapat nomor yang sama atau saling menyela di tengah blok.
+        """
+        sequence = self.env['ir.sequence'].sudo().search([
+            ('code', '=', f'candidate.registration.{level}'),
+            ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
         if not sequence:
-            # Fallback: count existing registrations with same level
-            count = self.env['res.partner'].sudo().search_count([
-                ('registration_code', 'like', f'SVK-{level_code}-%'),
-            ])
-            sequence = str(count + 1).zfill(4)
-        
-        return f"SVK-{level_code}-{sequence}-{date_str}"
+            raise UserError(f"Sequence kode registrasi untuk '{level}' tidak ditemukan!")
+
+        cr = self.env.cr
+        cr.execute("SELECT number_next, number_increment FROM ir_sequence WHERE id = %s FOR UPDATE", (sequence.id,))
+        number_next, increment = cr.fetchone()
+
+        if sequence.implementation == 'standard':
+            # Sequence PostgreSQL: satu query untuk seluruh blok
+            cr.execute("SELECT nextval(%s) FROM generate_series(1, %s)", (f'ir_sequence_{sequence.id:03d}', count))
+            numbers = [row[0] for row in cr.fetchall()]
+        else:
+            cr.execute(
+                "UPDATE ir_sequence SET number_next = number_next + %s WHERE id = %s",
+                (increment * count, sequence.id)
+            )
+            sequence.invalidate_recordset(['number_next'])
+            numbers = [number_next + increment * i for i in range(count)]
+
+        prefix, suffix = sequence._get_prefix_suffix()
+        return [prefix + '%0*d' % (sequence.padding, number) + suffix for number in numbers]
 
     # ========================================
     # ADMIN ACTIONS
     # ========================================
     
     def action_approve_registration(self):
-        """Admin approves candidate registration"""
-        for partner in self:
-            if partner.registration_state == 'pending':
-                partner.write({
-                    'registration_state': 'approved',
-                    'registration_code': partner._generate_registration_code(),
-                    'approved_by': self.env.user.id,
-                    'approved_date': fields.Datetime.now(),
-                })
-                # Log message
+        """Admin approves candidate registration (bisa banyak kandidat sekaligus)"""
+        pending = self.filtered(lambda p: p.registration_state == 'pending')
+        if not pending:
+            return
+
+        # Satu blok nomor per level, kode dirakit di memori
+        codes = {}
+        for level in set(pending.mapped(lambda p: p.pending_cert_level or 'level1')):
+            partners = pending.filtered(lambda p: (p.pending_cert_level or 'level1') == level)
+            numbers = self._reserve_registration_numbers(level, len(partners))
+            for partner, number in zip(partners, numbers):
+                codes[partner.id] = self._format_registration_code(level, number)
+
+        now = fields.Datetime.now()
+        pending.write({
+            'registration_state': 'approved',
+            'approved_by': self.env.user.id,
+            'approved_date': now,
+        })
+        for partner in pending:
+            # Nilai berbeda per baris -> di-flush ORM sebagai satu UPDATE batch
+            partner.registration_code = codes[partner.id]
+
+        # Log message (satu insert untuk semua kandidat)
+        pending._message_log_batch(bodies={
+            partner.id: Markup(
+                "<b style='color:green'>✅ REGISTRASI DISETUJUI</b><br/>"
+                "Kode Registrasi: <b>%s</b><br/>"
+                "Disetujui oleh: %s"
+            ) % (partner.registration_code, self.env.user.name)
+            for partner in pending
+        })
+
+        # Email notifikasi: diantrikan sekaligus, dikirim batch oleh mail queue
+        try:
+            pending._queue_registration_email()
+        except Exception as e:
+            # Log error but don't fail the approval
+            for partner in pending:
                 partner.message_post(
-                    body=f"<b style='color:green'>✅ REGISTRASI DISETUJUI</b><br/>"
-                         f"Kode Registrasi: <b>{partner.registration_code}</b><br/>"
-                         f"Disetujui oleh: {self.env.user.name}"
+                    body=f"<b style='color:orange'>⚠️ Email gagal diantrikan:</b> {str(e)}"
                 )
-                
-                # Send email notification
-                try:
-                    template = self.env.ref('iso17024_portall.email_template_registration_approved', raise_if_not_found=False)
-                    if template:
-                        template.sudo().send_mail(partner.id, force_send=True)
-                except Exception as e:
-                    # Log error but don't fail the approval
-                    partner.message_post(
-                        body=f"<b style='color:orange'>⚠️ Email gagal dikirim:</b> {str(e)}"
-                    )
+
+    def _queue_registration_email(self):
+        """Antrikan email persetujuan registrasi (tanpa SMTP di request ini)"""
+        template = self.env.ref('iso17024_portall.email_template_registration_approved', raise_if_not_found=False)
+        if not template or not self:
+            return
+        mails = template.sudo().send_mail_batch(self.ids, email_values={'auto_delete': False})
+        mail_by_res_id = {mail.res_id: mail for mail in mails}
+        for partner in self:
+            if partner.id in mail_by_res_id:
+                partner.registration_email_id = mail_by_res_id[partner.id].id
+        cron = self.env.ref('mail.ir_cron_mail_scheduler_action', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
     
     def action_reject_registration(self):
         """Admin rejects candidate registration"""
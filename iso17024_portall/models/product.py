@@ -0,0 +1,23 @@
+from odoo import models
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    def _is_scheme_product(self):
+        """Produk invoice skema di-cache di cert.scheme; arsip / hapus produk itu harus mengosongkannya"""
+        return bool(self.env['cert.scheme'].sudo().with_context(active_test=False).search_count(
+            [('product_id', 'in', self.ids)], limit=1))
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'active' in vals and self._is_scheme_product():
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        used = self._is_scheme_product()
+        res = super().unlink()
+        if used:
+            self.env.registry.clear_cache()
+        return res
@@ -1,11 +1,36 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+from odoo.exceptions import AccessError
+from odoo.tools import split_every, html2plaintext
+from markupsafe import Markup
 import random
+import threading
+import textwrap
 import logging
 import json
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 
 _logger = logging.getLogger(__name__)
 
+# Nilai yang boleh disimpan di cert.answer.line.selected
+ANSWER_CHOICES = ('A', 'B', 'C', 'D')
+# Jumlah attempt per batch saat regrade massal
+REGRADE_BATCH_SIZE = 500
+# Attempt selesai lebih lama dari ini dipadatkan (baris cert.answer.line dihapus)
+COMPACT_AFTER_DAYS = 30
+# Penanda soal tidak dijawab di packed_choices
+UNANSWERED = '-'
+
+
+def pack_bits(flags):
+    """[True, False, True] -> '5' (bit ke-i = soal ke-i, hex)"""
+    return format(sum(1 << i for i, flag in enumerate(flags) if flag), 'x') if flags else ''
+
+
+def unpack_bits(packed, count):
+    value = int(packed or '0', 16)
+    return [bool(value >> i & 1) for i in range(count)]
+
 
 class CertQuiz(models.Model):
     """Quiz Configuration for Certification Exams"""
@@ -36,10 +61,35 @@ class CertQuiz(models.Model):
     
     question_ids = fields.One2many('cert.question', 'quiz_id', string='Daftar Soal')
     question_count = fields.Integer(compute='_compute_question_count', string="Total Soal")
+
+    # Komposisi soal: kosong = semua soal di bank; terisi = N soal acak per topik/tingkat kesulitan
+    stratum_ids = fields.One2many('cert.quiz.stratum', 'quiz_id', string='Komposisi Soal')
+    exam_question_count = fields.Integer(compute='_compute_exam_question_count',
+                                         string='Soal per Peserta')
+    # Naik setiap bank soal berubah; bagian dari kunci cache id per strata
+    question_bank_version = fields.Integer(string='Versi Bank Soal', default=0, readonly=True, copy=False)
     
     attempt_ids = fields.One2many('cert.quiz.attempt', 'quiz_id', string='Percobaan Ujian')
     attempt_count = fields.Integer(compute='_compute_attempt_count', string="Total Percobaan")
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Kuis aktif per skema di-cache di cert.scheme
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'scheme' in vals or 'published' in vals:
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
     @api.depends('question_ids')
     def _compute_question_count(self):
         for record in self:
@@ -50,6 +100,58 @@ class CertQuiz(models.Model):
         for record in self:
             record.attempt_count = len(record.attempt_ids)
 
+    @api.depends('stratum_ids.count', 'question_ids')
+    def _compute_exam_question_count(self):
+        for record in self:
+            if record.stratum_ids:
+                record.exam_question_count = sum(record.stratum_ids.mapped('available_count'))
+            else:
+                record.exam_question_count = record.question_count
+
+    # =========================================================
+    # SAMPLING SOAL (STRATIFIED)
+    # =========================================================
+
+    @api.model
+    @tools.ormcache('quiz_id', 'version')
+    def _get_stratum_question_ids(self, quiz_id, version):
+        """{(topik, kesulitan): tuple id soal} - hanya id, bank soal tidak dimuat ke ORM
+
+        version = cert.quiz.question_bank_version: perubahan soal membuat kunci baru, jadi
+        cache lain (mis. cache skema) tidak perlu ikut dibersihkan.
+        """
+        self.env['cert.question'].flush_model(['quiz_id', 'topic', 'difficulty', 'sequence'])
+        self.env.cr.execute("""
+            SELECT COALESCE(TRIM(topic), ''), COALESCE(difficulty, ''), array_agg(id ORDER BY sequence, id)
+              FROM cert_question
+             WHERE quiz_id = %s
+             GROUP BY 1, 2
+        """, (quiz_id,))
+        return {(topic, difficulty): tuple(ids) for topic, difficulty, ids in self.env.cr.fetchall()}
+
+    def _draw_question_ids(self, seed):
+        """Urutan id soal untuk satu attempt; seed yang sama selalu menghasilkan undian yang sama"""
+        self.ensure_one()
+        pools = self._get_stratum_question_ids(self.id, self.question_bank_version)
+        rng = random.Random(seed)
+
+        if self.stratum_ids:
+            # Baris komposisi dengan topik/kesulitan sama digabung agar soal tidak terundi dua kali
+            counts = {}
+            for stratum in self.stratum_ids:
+                key = ((stratum.topic or '').strip(), stratum.difficulty or '')
+                counts[key] = counts.get(key, 0) + stratum.count
+            question_ids = []
+            for key, count in counts.items():
+                pool = pools.get(key, ())
+                question_ids.extend(rng.sample(pool, min(count, len(pool))))
+        else:
+            question_ids = [qid for key in sorted(pools) for qid in pools[key]]
+
+        # Randomize question order
+        rng.shuffle(question_ids)
+        return question_ids
+
 
 class CertQuestion(models.Model):
     """Quiz Question with Multiple Choice Answers"""
@@ -57,7 +159,7 @@ class CertQuestion(models.Model):
     _description = 'Soal Kuis'
     _order = 'sequence, id'
 
-    quiz_id = fields.Many2one('cert.quiz', string='Kuis', required=True, ondelete='cascade')
+    quiz_id = fields.Many2one('cert.quiz', string='Kuis', required=True, ondelete='cascade', index=True)
     sequence = fields.Integer(default=10, help='Urutan soal')
     
     content = fields.Html(string='Pertanyaan', required=True, sanitize=False)
@@ -74,6 +176,75 @@ class CertQuestion(models.Model):
     
     weight = fields.Integer(string='Bobot Nilai', default=1, help='Poin untuk jawaban benar')
 
+    topic = fields.Char(string='Topik', help='Dipakai untuk komposisi soal per topik')
+    difficulty = fields.Selection([
+        ('easy', 'Mudah'),
+        ('medium', 'Sedang'),
+        ('hard', 'Sulit'),
+    ], string='Tingkat Kesulitan', default='medium')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._bump_question_bank_version(records.quiz_id.ids)
+        return records
+
+    def write(self, vals):
+        if {'quiz_id', 'topic', 'difficulty', 'sequence'} & set(vals):
+            quiz_ids = set(self.quiz_id.ids)
+            res = super().write(vals)
+            self._bump_question_bank_version(quiz_ids | set(self.quiz_id.ids))
+            return res
+        return super().write(vals)
+
+    def unlink(self):
+        quiz_ids = self.quiz_id.ids
+        res = super().unlink()
+        self._bump_question_bank_version(quiz_ids)
+        return res
+
+    @api.model
+    def _bump_question_bank_version(self, quiz_ids):
+        """Naikkan versi bank soal kuis -> cache id per strata kuis itu tidak terpakai lagi"""
+        if not quiz_ids:
+            return
+        # SQL langsung: tanpa tracking/write_date kuis untuk setiap perubahan soal
+        self.env.cr.execute("""
+            UPDATE cert_quiz SET question_bank_version = question_bank_version + 1 WHERE id = ANY(%s)
+        """, (list(quiz_ids),))
+        self.env['cert.quiz'].browse(quiz_ids).invalidate_recordset(['question_bank_version', 'exam_question_count'])
+        self.env['cert.quiz.stratum'].invalidate_model(['available_count'])
+
+
+class CertQuizStratum(models.Model):
+    """Jumlah soal yang diundi dari satu topik / tingkat kesulitan"""
+    _name = 'cert.quiz.stratum'
+    _description = 'Komposisi Soal Kuis'
+    _order = 'quiz_id, id'
+
+    quiz_id = fields.Many2one('cert.quiz', string='Kuis', required=True, ondelete='cascade', index=True)
+    topic = fields.Char(string='Topik', help='Kosong = soal tanpa topik')
+    difficulty = fields.Selection([
+        ('easy', 'Mudah'),
+        ('medium', 'Sedang'),
+        ('hard', 'Sulit'),
+    ], string='Tingkat Kesulitan', default='medium', required=True)
+    count = fields.Integer(string='Jumlah Soal', default=10, required=True)
+    available_count = fields.Integer(string='Soal Diundi', compute='_compute_available_count',
+                                     help='Jumlah soal yang benar-benar diundi (dibatasi isi bank soal)')
+
+    _sql_constraints = [
+        ('count_positive', 'CHECK(count > 0)', 'Jumlah soal per komposisi harus lebih dari 0.'),
+    ]
+
+    @api.depends('quiz_id.question_bank_version', 'topic', 'difficulty', 'count')
+    def _compute_available_count(self):
+        for stratum in self:
+            quiz = stratum.quiz_id
+            pools = self.env['cert.quiz']._get_stratum_question_ids(quiz.id, quiz.question_bank_version) if quiz.id else {}
+            pool = pools.get(((stratum.topic or '').strip(), stratum.difficulty or ''), ())
+            stratum.available_count = min(stratum.count, len(pool))
+
 
 class CertQuizAttempt(models.Model):
     """User Quiz Attempt - tracks a single exam session"""
@@ -101,19 +272,38 @@ class CertQuizAttempt(models.Model):
     started_at = fields.Datetime(string='Waktu Mulai', default=fields.Datetime.now)
     finished_at = fields.Datetime(string='Waktu Selesai')
     time_limit_seconds = fields.Integer(string='Batas Waktu (Detik)')
+    question_seed = fields.Integer(string='Seed Undian Soal', readonly=True,
+                                   help='Seed acak untuk mengulang undian & urutan soal attempt ini')
     
     state = fields.Selection([
         ('in_progress', 'Sedang Mengerjakan'),
         ('done', 'Selesai')
     ], string='Status', default='in_progress')
     
-    score_total = fields.Float(string='Total Skor', compute='_compute_score', store=True)
-    max_score = fields.Float(string='Skor Maksimal', compute='_compute_score', store=True)
-    score_percentage = fields.Float(string='Persentase Skor', compute='_compute_score', store=True)
-    is_passed = fields.Boolean(string='Lulus?', compute='_compute_score', store=True)
+    # Hasil dibekukan saat action_finish (edit soal tidak mengubah nilai lama; lihat action_regrade)
+    score_total = fields.Float(string='Total Skor', readonly=True)
+    max_score = fields.Float(string='Skor Maksimal', readonly=True)
+    score_percentage = fields.Float(string='Persentase Skor', readonly=True)
+    is_passed = fields.Boolean(string='Lulus?', readonly=True)
     
     answer_line_ids = fields.One2many('cert.answer.line', 'attempt_id', string='Jawaban')
 
+    # Bentuk padat jawaban attempt selesai (baris cert.answer.line sudah dihapus oleh cron)
+    answers_packed = fields.Boolean(string='Jawaban Dipadatkan', readonly=True, index=True)
+    packed_question_ids = fields.Text(string='Urutan Soal (Padat)', readonly=True,
+                                      help='Id soal sesuai urutan tampil, dipisah koma')
+    packed_choices = fields.Text(string='Jawaban (Padat)', readonly=True,
+                                 help=f'Satu karakter per soal: A-D, atau "{UNANSWERED}" jika tidak dijawab')
+    packed_correct = fields.Char(string='Bitmap Benar (Padat)', readonly=True,
+                                 help='Bit ke-i = jawaban soal ke-i benar (hex)')
+    # Snapshot kunci & bobot saat ujian (pengganti kolom correct_choice/weight baris jawaban)
+    packed_key = fields.Text(string='Kunci Saat Ujian (Padat)', readonly=True,
+                             help=f'Satu karakter per soal: A-D, atau "{UNANSWERED}" jika tidak ada')
+    packed_weights = fields.Text(string='Bobot Saat Ujian (Padat)', readonly=True,
+                                 help='Bobot per soal sesuai urutan, dipisah koma')
+    packed_answer_html = fields.Html(string='Detail Jawaban (Padat)', compute='_compute_packed_answer_html',
+                                     sanitize=False)
+
     # Security tracking fields
     violation_count = fields.Integer(string='Jumlah Pelanggaran', default=0)
     penalty_percentage = fields.Float(string='Pengurangan Nilai (%)', default=0.0)
@@ -126,6 +316,58 @@ class CertQuizAttempt(models.Model):
             quiz_name = record.quiz_id.name or 'Quiz'
             record.display_name = f"{user_name} - {quiz_name}"
 
+    def _compute_packed_answer_html(self):
+        for record in self:
+            if not record.answers_packed:
+                record.packed_answer_html = False
+                continue
+            rows = record._get_answer_rows()
+            questions = {q.id: q for q in self.env['cert.question'].browse([r['question_id'] for r in rows]).exists()}
+            body = Markup('').join(
+                Markup('<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>') % (
+                    index + 1,
+                    textwrap.shorten(html2plaintext(questions[row['question_id']].content or ''), 80)
+                    if row['question_id'] in questions else f"#{row['question_id']}",
+                    row['selected'] or '-',
+                    row['correct_choice'] or '-',
+                    row['weight'],
+                    '✓' if row['is_correct'] else '✗',
+                )
+                for index, row in enumerate(rows)
+            )
+            record.packed_answer_html = Markup(
+                '<table class="table table-sm"><thead><tr><th>No</th><th>Soal</th>'
+                '<th>Jawaban</th><th>Kunci</th><th>Bobot</th><th>Benar?</th></tr></thead><tbody>%s</tbody></table>'
+            ) % body
+
+    def _get_answer_rows(self):
+        """Jawaban berurutan [{question_id, selected, correct_choice, weight, is_correct}]
+        dari bentuk padat atau baris jawaban"""
+        self.ensure_one()
+        if not self.answers_packed:
+            return [{
+                'question_id': line.question_id.id,
+                'selected': line.selected or False,
+                'correct_choice': line.correct_choice or False,
+                'weight': line.weight,
+                'is_correct': line.is_correct,
+            } for line in self.answer_line_ids.sorted('id')]
+
+        question_ids = [int(qid) for qid in (self.packed_question_ids or '').split(',') if qid]
+        count = len(question_ids)
+        choices = self.packed_choices or ''
+        # Attempt yang dipadatkan sebelum kunci ikut disimpan: kunci tidak diketahui
+        key = self.packed_key or UNANSWERED * count
+        weights = [int(weight) for weight in (self.packed_weights or '').split(',') if weight] or [0] * count
+        correct = unpack_bits(self.packed_correct, count)
+        return [{
+            'question_id': question_id,
+            'selected': choice if choice != UNANSWERED else False,
+            'correct_choice': key_choice if key_choice != UNANSWERED else False,
+            'weight': weight,
+            'is_correct': is_correct,
+        } for question_id, choice, key_choice, weight, is_correct in zip(question_ids, choices, key, weights, correct)]
+
     @api.model_create_multi
     def create(self, vals_list):
         for vals in vals_list:
@@ -133,44 +375,174 @@ class CertQuizAttempt(models.Model):
             if 'quiz_id' in vals:
                 quiz = self.env['cert.quiz'].browse(vals['quiz_id'])
                 vals['time_limit_seconds'] = quiz.time_limit_minutes * 60
-        
+            vals.setdefault('question_seed', random.SystemRandom().randrange(1, 2 ** 31))
+
         attempts = super().create(vals_list)
-        
+
+        line_vals_list = []
         for attempt in attempts:
-            # Generate answer lines for all questions
-            questions = self.env['cert.question'].search([
-                ('quiz_id', '=', attempt.quiz_id.id)
-            ], order='sequence, id')
-            
-            # Randomize question order
-            questions_list = list(questions)
-            random.shuffle(questions_list)
-            
-            for question in questions_list:
-                self.env['cert.answer.line'].create({
-                    'attempt_id': attempt.id,
-                    'question_id': question.id,
-                })
-        
+            # Undian soal dari id per strata yang sudah di-cache (tanpa search ke bank soal)
+            question_ids = attempt.quiz_id._draw_question_ids(attempt.question_seed)
+
+            line_vals_list.extend({
+                'attempt_id': attempt.id,
+                'question_id': question_id,
+            } for question_id in question_ids)
+
+        # Satu create batch untuk semua baris jawaban (INSERT multi-row + compute sekali jalan)
+        if line_vals_list:
+            self.env['cert.answer.line'].create(line_vals_list)
+
         return attempts
 
+    def _save_answers(self, answers):
+        """Simpan jawaban {line_id: pilihan} milik attempt ini; satu write per pilihan.
+        Baris milik attempt lain / pilihan tidak valid diabaikan. Return jumlah baris yang berubah"""
+        self.ensure_one()
+        requested = {}
+        for line_id, choice in answers.items():
+            try:
+                line_id = int(line_id)
+            except (TypeError, ValueError):
+                continue
+            if choice in ANSWER_CHOICES or not choice:
+                requested[line_id] = choice or None
+        if not requested:
+            return 0
+
+        # Validasi kepemilikan + buang baris yang jawabannya tidak berubah (satu query)
+        Line = self.env['cert.answer.line']
+        Line.flush_model(['attempt_id', 'selected'])
+        self.env.cr.execute("""
+            SELECT id, selected FROM cert_answer_line
+             WHERE attempt_id = %s AND id = ANY(%s)
+        """, (self.id, list(requested)))
+        ids_by_choice = defaultdict(list)
+        for line_id, current in self.env.cr.fetchall():
+            if requested[line_id] != current:
+                ids_by_choice[requested[line_id]].append(line_id)
+
+        for choice, line_ids in ids_by_choice.items():
+            Line.browse(line_ids).write({'selected': choice or False})
+        return sum(len(line_ids) for line_ids in ids_by_choice.values())
+
     def action_finish(self):
-        """Mark the attempt as finished and calculate scores"""
+        """Mark the attempt as finished, freeze the answer key and calculate scores"""
         self.write({
             'state': 'done',
             'finished_at': fields.Datetime.now()
         })
-        # Force recompute of scores
-        self._compute_score()
+        self._freeze_answer_key()
+        self._update_score()
 
-    @api.depends('answer_line_ids.score_awarded', 'answer_line_ids.question_id.weight', 'quiz_id.passing_score', 'penalty_percentage')
-    def _compute_score(self):
-        for record in self:
-            total_score = sum(line.score_awarded for line in record.answer_line_ids)
-            max_score = sum(line.question_id.weight for line in record.answer_line_ids)
+    def action_regrade(self):
+        """Admin: nilai ulang attempt selesai dengan kunci & bobot soal saat ini (per batch)"""
+        if not self.env.user.has_group('base.group_system'):
+            raise AccessError("Hanya administrator yang boleh menilai ulang hasil ujian.")
+        attempts = self.filtered(lambda a: a.state == 'done')
+        changed = 0
+        for batch_ids in split_every(REGRADE_BATCH_SIZE, attempts.ids):
+            batch = self.browse(batch_ids)
+            passed_before = {attempt.id: attempt.is_passed for attempt in batch}
+            packed = batch.filtered('answers_packed')
+            (batch - packed)._freeze_answer_key()
+            (batch - packed)._update_score()
+            packed._regrade_packed()
+
+            # Status lulus berubah -> hasil ujian di aplikasi ikut diperbarui
+            flipped = batch.filtered(lambda a: a.is_passed != passed_before[a.id] and a.application_id)
+            for result in ('passed', 'failed'):
+                apps = flipped.filtered(lambda a: a.is_passed == (result == 'passed')).application_id
+                if apps:
+                    apps.sudo().write({'exam_result': result})
+            changed += len(flipped)
+            _logger.info(f"Regrade batch: {len(batch)} attempts, {len(flipped)} pass/fail changed")
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Nilai Ulang Selesai',
+                'message': f'{len(attempts)} percobaan dinilai ulang, {changed} status lulus berubah.',
+                'type': 'warning' if changed else 'success',
+                'sticky': bool(changed),
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
 
-            record.score_total = total_score
-            record.max_score = max_score
+    def _freeze_answer_key(self):
+        """Salin kunci jawaban & bobot soal ke baris jawaban lalu nilai per baris (satu UPDATE)"""
+        if not self:
+            return
+        Line = self.env['cert.answer.line']
+        Line.flush_model(['attempt_id', 'question_id', 'selected'])
+        self.env['cert.question'].flush_model(['correct_choice', 'weight'])
+        self.env.cr.execute("""
+            UPDATE cert_answer_line l
+               SET correct_choice = q.correct_choice,
+                   weight = q.weight,
+                   is_correct = COALESCE(l.selected = q.correct_choice, FALSE),
+                   score_awarded = CASE WHEN l.selected = q.correct_choice THEN q.weight ELSE 0 END,
+                   write_uid = %s,
+                   write_date = now() at time zone 'UTC'
+              FROM cert_question q
+             WHERE q.id = l.question_id
+               AND l.attempt_id = ANY(%s)
+        """, (self.env.uid, self.ids))
+        Line.invalidate_model(['correct_choice', 'weight', 'is_correct', 'score_awarded',
+                               'write_uid', 'write_date'])
+
+    def _regrade_packed(self):
+        """Regrade attempt yang sudah dipadatkan dengan kunci soal saat ini
+
+        Sama seperti _freeze_answer_key untuk baris jawaban: snapshot kunci & bobot padat
+        diganti dengan kunci yang dipakai menilai ulang."""
+        if not self:
+            return
+        rows_by_attempt = {attempt.id: attempt._get_answer_rows() for attempt in self}
+        question_ids = list({row['question_id'] for rows in rows_by_attempt.values() for row in rows})
+        self.env['cert.question'].flush_model(['correct_choice', 'weight'])
+        self.env.cr.execute(
+            "SELECT id, correct_choice, weight FROM cert_question WHERE id = ANY(%s)", (question_ids,))
+        answer_key = {qid: (correct, weight or 0) for qid, correct, weight in self.env.cr.fetchall()}
+
+        totals = {}
+        for attempt in self:
+            flags, key, weights = [], [], []
+            total_score = max_score = 0
+            for row in rows_by_attempt[attempt.id]:
+                correct, weight = answer_key.get(row['question_id'], (None, 0))
+                is_correct = bool(row['selected']) and row['selected'] == correct
+                flags.append(is_correct)
+                key.append(correct or UNANSWERED)
+                weights.append(str(weight))
+                total_score += weight if is_correct else 0
+                max_score += weight
+            attempt.write({
+                'packed_correct': pack_bits(flags),
+                'packed_key': ''.join(key),
+                'packed_weights': ','.join(weights),
+            })
+            totals[attempt.id] = (total_score, max_score)
+        self._update_score(totals)
+
+    def _update_score(self, totals=None):
+        """Skor dari snapshot di baris jawaban (satu agregat SQL untuk semua attempt).
+        totals {attempt_id: (skor, skor maksimal)} dipakai langsung jika sudah dihitung"""
+        if not self:
+            return
+        if totals is None:
+            self.env.cr.execute("""
+                SELECT attempt_id, COALESCE(SUM(score_awarded), 0), COALESCE(SUM(weight), 0)
+                  FROM cert_answer_line
+                 WHERE attempt_id = ANY(%s)
+                 GROUP BY attempt_id
+            """, (self.ids,))
+            totals = {attempt_id: (total, maximum) for attempt_id, total, maximum in self.env.cr.fetchall()}
+
+        for record in self:
+            total_score, max_score = totals.get(record.id, (0.0, 0.0))
+            vals = {'score_total': total_score, 'max_score': max_score}
 
             if max_score > 0:
                 raw_percentage = (total_score / max_score) * 100
@@ -178,11 +550,85 @@ class CertQuizAttempt(models.Model):
                 final_percentage = raw_percentage - record.penalty_percentage
                 if final_percentage < 0:
                     final_percentage = 0
-                record.score_percentage = final_percentage
-                record.is_passed = final_percentage >= (record.quiz_id.passing_score or 70)
+                vals['score_percentage'] = final_percentage
+                vals['is_passed'] = final_percentage >= (record.quiz_id.passing_score or 70)
             else:
-                record.score_percentage = 0
-                record.is_passed = False
+                vals['score_percentage'] = 0
+                vals['is_passed'] = False
+            record.write(vals)
+
+    # =========================================================
+    # PEMADATAN JAWABAN (CRON)
+    # =========================================================
+
+    @api.model
+    def _cron_compact_answers(self, batch_size=200, limit=5000):
+        """Padatkan attempt selesai yang sudah lama: jawaban disalin ke attempt, baris jawaban dihapus"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        cutoff = fields.Datetime.now() - timedelta(days=COMPACT_AFTER_DAYS)
+        self.flush_model(['state', 'finished_at', 'answers_packed'])
+
+        compacted = 0
+        while compacted < limit:
+            self.env.cr.execute("""
+                SELECT id FROM cert_quiz_attempt
+                 WHERE state = 'done'
+                   AND answers_packed IS NOT TRUE
+                   AND finished_at < %s
+                 ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, (cutoff, min(batch_size, limit - compacted)))
+            attempts = self.browse([row[0] for row in self.env.cr.fetchall()])
+            if not attempts:
+                break
+            attempts._pack_answers()
+            compacted += len(attempts)
+            if auto_commit:
+                self.env.cr.commit()
+
+        if compacted:
+            _logger.info(f"Quiz answers compacted: {compacted} attempts")
+        self.env.cr.execute("""
+            SELECT COUNT(*) FROM cert_quiz_attempt
+             WHERE state = 'done' AND answers_packed IS NOT TRUE AND finished_at < %s
+        """, (cutoff,))
+        remaining = self.env.cr.fetchone()[0]
+        if remaining:
+            self.env['ir.cron']._notify_progress(done=compacted, remaining=remaining)
+
+    def _pack_answers(self):
+        """Satu agregat SQL untuk semua attempt, lalu hapus baris jawabannya
+
+        Semua isi baris ikut dipadatkan (jawaban, kunci & bobot saat ujian, benar/salah);
+        score_awarded = bobot jika benar, jadi tidak ada data baris yang hilang."""
+        self.env['cert.answer.line'].flush_model()
+        self.env.cr.execute("""
+            SELECT attempt_id,
+                   string_agg(question_id::text, ',' ORDER BY id),
+                   string_agg(COALESCE(selected, %s), '' ORDER BY id),
+                   string_agg(COALESCE(correct_choice, %s), '' ORDER BY id),
+                   string_agg(COALESCE(weight, 0)::text, ',' ORDER BY id),
+                   array_agg(COALESCE(is_correct, FALSE) ORDER BY id)
+              FROM cert_answer_line
+             WHERE attempt_id = ANY(%s)
+             GROUP BY attempt_id
+        """, (UNANSWERED, UNANSWERED, self.ids))
+        packed = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+
+        for attempt in self:
+            question_ids, choices, key, weights, correct = packed.get(attempt.id, ('', '', '', '', []))
+            attempt.write({
+                'answers_packed': True,
+                'packed_question_ids': question_ids,
+                'packed_choices': choices,
+                'packed_key': key,
+                'packed_weights': weights,
+                'packed_correct': pack_bits(correct),
+            })
+        self.env.cr.execute("DELETE FROM cert_answer_line WHERE attempt_id = ANY(%s)", (self.ids,))
+        self.env['cert.answer.line'].invalidate_model()
+        self.invalidate_recordset(['answer_line_ids'])
 
     def log_violation(self, violation_type):
         """Log security violation and return action to take"""
@@ -234,22 +680,17 @@ class CertAnswerLine(models.Model):
     _name = 'cert.answer.line'
     _description = 'Jawaban Peserta'
 
-    attempt_id = fields.Many2one('cert.quiz.attempt', string='Percobaan', ondelete='cascade')
+    attempt_id = fields.Many2one('cert.quiz.attempt', string='Percobaan', ondelete='cascade', index=True)
     question_id = fields.Many2one('cert.question', string='Soal', required=True)
     
     selected = fields.Selection([
         ('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D')
     ], string='Jawaban Dipilih')
     
-    is_correct = fields.Boolean(string='Benar?', compute='_compute_result', store=True)
-    score_awarded = fields.Float(string='Skor Didapat', compute='_compute_result', store=True)
-
-    @api.depends('selected', 'question_id', 'question_id.correct_choice', 'question_id.weight')
-    def _compute_result(self):
-        for line in self:
-            if line.selected and line.selected == line.question_id.correct_choice:
-                line.is_correct = True
-                line.score_awarded = float(line.question_id.weight)
-            else:
-                line.is_correct = False
-                line.score_awarded = 0.0
+    # Snapshot saat attempt selesai (lihat cert.quiz.attempt._freeze_answer_key)
+    correct_choice = fields.Selection([
+        ('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D')
+    ], string='Kunci Saat Ujian', readonly=True)
+    weight = fields.Integer(string='Bobot Saat Ujian', readonly=True)
+    is_correct = fields.Boolean(string='Benar?', readonly=True)
+    score_awarded = fields.Float(string='Skor Didapat', readonly=True)
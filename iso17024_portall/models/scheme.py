@@ -0,0 +1,108 @@
+from odoo import models, fields, api, tools
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class CertScheme(models.Model):
+    """Katalog skema sertifikasi: harga, produk invoice, kuis aktif, prefix kode registrasi"""
+    _name = 'cert.scheme'
+    _description = 'Skema Sertifikasi'
+    _order = 'sequence, id'
+
+    code = fields.Char(string='Kode', required=True, help='Sama dengan nilai field "scheme" (mis. level1)')
+    name = fields.Char(string='Nama Skema', required=True)
+    sequence = fields.Integer(default=10)
+    active = fields.Boolean(default=True)
+
+    base_price = fields.Float(string='Biaya Sertifikasi')
+    admin_fee = fields.Float(string='Biaya Admin')
+    total_price = fields.Float(string='Total Tagihan', compute='_compute_total_price', store=True)
+
+    product_id = fields.Many2one('product.product', string='Produk Invoice',
+                                 help='Kosong = cari produk dengan nama skema')
+    quiz_id = fields.Many2one('cert.quiz', string='Kuis Aktif',
+                              help='Kosong = kuis published pertama untuk skema ini')
+    registration_prefix = fields.Char(string='Prefix Kode Registrasi', help='mis. CIG01 -> SVK-CIG01-0001-YYMMDD')
+
+    _sql_constraints = [
+        ('code_uniq', 'unique(code)', 'Kode skema harus unik.'),
+    ]
+
+    @api.depends('base_price', 'admin_fee')
+    def _compute_total_price(self):
+        for rec in self:
+            rec.total_price = rec.base_price + rec.admin_fee
+
+    # =========================================================
+    # LOOKUP (ORMCACHE)
+    # =========================================================
+
+    @api.model
+    def _get_scheme_data(self, code):
+        """Data skema untuk kode tertentu (dari cache; dict kosong jika tidak ada)"""
+        return dict(self._get_scheme_data_cached(code or ''))
+
+    @api.model
+    @tools.ormcache('code')
+    def _get_scheme_data_cached(self, code):
+        # Hanya nilai primitif di cache (tidak boleh record / env).
+        # Produk invoice hanya dari field skema sendiri (yang aktif); fallback nama dicari
+        # sekali di _get_scheme_product lalu disimpan ke skema. Arsip / hapus produk skema
+        # mengosongkan cache ini (lihat product.product).
+        scheme = self.sudo().search([('code', '=', code)], limit=1)
+        if not scheme:
+            return {}
+
+        quiz = scheme.quiz_id or self.env['cert.quiz'].sudo().search([
+            ('scheme', '=', code),
+            ('published', '=', True)
+        ], limit=1)
+        return {
+            'id': scheme.id,
+            'code': scheme.code,
+            'name': scheme.name,
+            'base_price': scheme.base_price,
+            'admin_fee': scheme.admin_fee,
+            'total_price': scheme.total_price,
+            'product_id': scheme.product_id.id if scheme.product_id.active else False,
+            'quiz_id': quiz.id,
+            'registration_prefix': scheme.registration_prefix or '',
+        }
+
+    @api.model
+    def _get_scheme_product(self, code):
+        """Produk invoice skema (dari cache): produk yang dipilih di skema, atau produk aktif
+        dengan nama skema. Hasil fallback disimpan ke skema sehingga pencarian nama hanya sekali."""
+        data = self._get_scheme_data(code)
+        Product = self.env['product.product'].sudo()
+        if data.get('product_id'):
+            return Product.browse(data['product_id'])
+        if not data:
+            return Product
+
+        product = Product.search([('name', 'ilike', data['name'])], limit=1)
+        if product:
+            _logger.info(f"Scheme {code}: invoice product set to {product.display_name} (matched by name)")
+            self.sudo().browse(data['id']).product_id = product
+        return product
+
+    # =========================================================
+    # INVALIDASI CACHE
+    # =========================================================
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
@@ -10,7 +10,7 @@ class CertUserSession(models.Model):
     _description = 'User Session Tracking'
     _order = 'login_time desc'
 
-    user_id = fields.Many2one('res.users', string='User', required=True, ondelete='cascade')
+    user_id = fields.Many2one('res.users', string='User', required=True, index=True, ondelete='cascade')
     session_token = fields.Char(string='Session Token', required=True, index=True)
     ip_address = fields.Char(string='IP Address')
     user_agent = fields.Text(string='User Agent')
@@ -37,15 +37,24 @@ class CertUserSession(models.Model):
     @api.model
     def create_session(self, user_id, session_token, ip_address=None, user_agent=None, device_fingerprint=None):
         """Create new session and deactivate old ones for this user"""
-        # Deactivate all existing active sessions for this user
-        old_sessions = self.search([
-            ('user_id', '=', user_id),
-            ('is_active', '=', True)
-        ])
-
-        if old_sessions:
-            old_sessions.deactivate_session('new_device')
-            _logger.info(f"Deactivated {len(old_sessions)} old sessions for user {user_id}")
+        # Deactivate all existing active sessions for this user (satu UPDATE, tanpa search dulu)
+        self.flush_model(['user_id', 'is_active'])
+        self.env.cr.execute("""
+            UPDATE cert_user_session
+               SET is_active = false,
+                   logout_reason = 'new_device',
+                   logout_time = now() at time zone 'UTC',
+                   write_uid = %s,
+                   write_date = now() at time zone 'UTC'
+             WHERE user_id = %s
+               AND is_active
+         RETURNING id
+        """, (self.env.uid, user_id))
+        old_ids = [row[0] for row in self.env.cr.fetchall()]
+
+        if old_ids:
+            self.browse(old_ids).invalidate_recordset(['is_active', 'logout_reason', 'logout_time', 'write_uid', 'write_date'])
+            _logger.info(f"Deactivated {len(old_ids)} old sessions for user {user_id}")
 
         # Create new session
         new_session = self.create({
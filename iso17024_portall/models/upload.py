@@ -0,0 +1,193 @@
+from odoo import models, fields, api
+from odoo.tools.mimetypes import guess_mimetype
+import hashlib
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+from .application import DOCUMENT_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+# Ukuran chunk yang dipakai client & batas ukuran file per dokumen
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+# Jenis file yang diterima form step 1 (dicek dari ekstensi saat init, dari isi saat finalize)
+ALLOWED_MIMETYPES = {
+    'application/pdf': ('.pdf',),
+    'image/jpeg': ('.jpg', '.jpeg'),
+    'image/png': ('.png',),
+}
+ALLOWED_EXTENSIONS = tuple(ext for exts in ALLOWED_MIMETYPES.values() for ext in exts)
+# Blok baca/tulis saat menyalin stream ke disk
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+class CertificationUpload(models.Model):
+    """Sesi upload dokumen bertahap (chunked & resumable) untuk step 1"""
+    _name = 'certification.upload'
+    _description = 'Sesi Upload Dokumen'
+    _order = 'create_date desc'
+
+    token = fields.Char(
+        string='Upload ID',
+        required=True,
+        index=True,
+        copy=False,
+        default=lambda self: uuid.uuid4().hex
+    )
+    partner_id = fields.Many2one('res.partner', string='Kandidat', required=True, index=True, ondelete='cascade')
+    field_name = fields.Selection(
+        selection='_selection_field_name',
+        string='Dokumen',
+        required=True
+    )
+    filename = fields.Char(string='Nama File')
+    total_size = fields.Integer(string='Ukuran Total (Byte)', required=True)
+    received_size = fields.Integer(string='Sudah Diterima (Byte)', default=0)
+    state = fields.Selection([
+        ('uploading', 'Sedang Upload'),
+        ('done', 'Selesai'),
+        ('committed', 'Terpakai di Aplikasi'),
+    ], string='Status', default='uploading', index=True)
+    attachment_id = fields.Many2one('ir.attachment', string='Attachment', ondelete='set null')
+
+    _sql_constraints = [
+        ('token_uniq', 'unique(token)', 'Upload ID harus unik.'),
+    ]
+
+    @api.model
+    def _selection_field_name(self):
+        Application = self.env['certification.application']
+        return [(name, Application._fields[name].string) for name in DOCUMENT_FIELDS]
+
+    # =========================================================
+    # FILE SEMENTARA
+    # =========================================================
+
+    def _temp_path(self):
+        self.ensure_one()
+        directory = os.path.join(self.env['ir.attachment']._filestore(), 'cert_uploads')
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f'{self.token}.part')
+
+    def _remove_temp_file(self):
+        for upload in self:
+            path = upload._temp_path()
+            if os.path.exists(path):
+                os.remove(path)
+
+    # =========================================================
+    # API UPLOAD
+    # =========================================================
+
+    @api.model
+    def _start_or_resume(self, partner, field_name, filename, total_size):
+        """Mulai sesi baru, atau lanjutkan sesi yang sama yang belum selesai"""
+        upload = self.search([
+            ('partner_id', '=', partner.id),
+            ('field_name', '=', field_name),
+            ('filename', '=', filename),
+            ('total_size', '=', total_size),
+            ('state', '=', 'uploading'),
+        ], limit=1)
+        if upload:
+            # Sinkronkan offset dengan isi file sementara (jika worker sempat mati)
+            path = upload._temp_path()
+            on_disk = os.path.getsize(path) if os.path.exists(path) else 0
+            if on_disk != upload.received_size:
+                upload.received_size = on_disk
+            return upload
+
+        return self.create({
+            'partner_id': partner.id,
+            'field_name': field_name,
+            'filename': filename,
+            'total_size': total_size,
+        })
+
+    def _append_chunk(self, offset, stream):
+        """Tulis satu chunk dari stream request ke file sementara di posisi offset"""
+        self.ensure_one()
+        if self.state != 'uploading':
+            raise ValueError("Sesi upload sudah selesai")
+        if offset != self.received_size:
+            raise ValueError(f"Offset tidak sesuai (diharapkan {self.received_size})")
+
+        written = 0
+        with open(self._temp_path(), 'ab') as fp:
+            fp.truncate(offset)
+            while True:
+                block = stream.read(COPY_BLOCK_SIZE)
+                if not block:
+                    break
+                written += len(block)
+                if written > CHUNK_SIZE or offset + written > self.total_size:
+                    raise ValueError("Ukuran chunk melebihi batas")
+                fp.write(block)
+
+        self.received_size = offset + written
+        return self.received_size
+
+    def _finalize(self):
+        """Pindahkan file sementara ke filestore dan buat ir.attachment tanpa base64"""
+        self.ensure_one()
+        if self.state != 'uploading':
+            return self.attachment_id
+        if self.received_size != self.total_size:
+            raise ValueError("Upload belum lengkap")
+
+        Attachment = self.env['ir.attachment'].sudo()
+        temp_path = self._temp_path()
+
+        sha1 = hashlib.sha1()
+        with open(temp_path, 'rb') as fp:
+            head = fp.read(1024)
+            sha1.update(head)
+            for block in iter(lambda: fp.read(COPY_BLOCK_SIZE), b''):
+                sha1.update(block)
+        checksum = sha1.hexdigest()
+
+        # Jenis file dari isinya, bukan dari nama file yang dikirim browser
+        mimetype = guess_mimetype(head)
+        if mimetype not in ALLOWED_MIMETYPES:
+            # Isi ditolak -> mulai dari nol jika kandidat mengunggah ulang
+            self._remove_temp_file()
+            self.received_size = 0
+            raise ValueError("Format file harus PDF, JPG atau PNG")
+
+        # File identik yang sudah ada di filestore dipakai bersama (re-upload / sertifikasi ulang)
+        store_fname, full_path = Attachment._cert_filestore_path(checksum, source_path=temp_path)
+        if os.path.exists(full_path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, full_path)
+
+        attachment = Attachment.create({
+            'name': self.filename or self.field_name,
+            'type': 'binary',
+            'mimetype': mimetype,
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+        attachment._cert_set_file_reference(store_fname, checksum, self.total_size)
+        self.write({'state': 'done', 'attachment_id': attachment.id})
+        return attachment
+
+    # =========================================================
+    # CRON
+    # =========================================================
+
+    @api.model
+    def _cron_cleanup_stale_uploads(self, hours=24):
+        """Hapus sesi upload yang tidak pernah selesai / tidak dipakai"""
+        limit_date = fields.Datetime.now() - timedelta(hours=hours)
+        stale = self.search([
+            ('state', 'in', ['uploading', 'done']),
+            ('write_date', '<', limit_date),
+        ])
+        stale._remove_temp_file()
+        stale.attachment_id.unlink()
+        stale.unlink()
+        _logger.info(f"Removed {len(stale)} stale upload sessions")
@@ -0,0 +1,155 @@
+from odoo import models, fields, api
+from odoo.exceptions import AccessError
+import json
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+# Batas percobaan sebelum event dianggap gagal permanen
+MAX_ATTEMPTS = 5
+
+
+class CertificationXenditEvent(models.Model):
+    """Log webhook Xendit (append-only). Webhook hanya menyimpan, cron yang memproses."""
+    _name = 'certification.xendit.event'
+    _description = 'Event Webhook Xendit'
+    _order = 'id desc'
+
+    dedup_key = fields.Char(string='Kunci Deduplikasi', required=True, readonly=True,
+                            help='<id invoice Xendit>:<status> (atau ext:<external_id>:<status> jika id kosong) '
+                                 '- pengiriman ulang webhook yang sama diabaikan')
+    xendit_id = fields.Char(string='Xendit Invoice ID', readonly=True, index=True)
+    external_id = fields.Char(string='External ID', readonly=True, index=True)
+    status = fields.Char(string='Status Xendit', readonly=True)
+    payload = fields.Text(string='Payload', readonly=True)
+    application_id = fields.Many2one('certification.application', string='Aplikasi Sertifikasi',
+                                     readonly=True, index=True, ondelete='set null')
+    source = fields.Selection([
+        ('webhook', 'Webhook'),
+        ('reconcile', 'Rekonsiliasi'),
+    ], string='Sumber', default='webhook', required=True, readonly=True)
+
+    state = fields.Selection([
+        ('pending', 'Belum Diproses'),
+        ('done', 'Diproses'),
+        ('ignored', 'Diabaikan'),
+        ('failed', 'Gagal'),
+    ], string='Status', default='pending', required=True, index=True)
+    attempts = fields.Integer(string='Jumlah Percobaan', default=0)
+    error = fields.Text(string='Error')
+    processed_at = fields.Datetime(string='Waktu Proses')
+
+    _sql_constraints = [
+        ('dedup_key_uniq', 'unique(dedup_key)', 'Event webhook Xendit sudah tercatat.'),
+    ]
+
+    # =========================================================
+    # INGEST (dipanggil dari webhook)
+    # =========================================================
+
+    @api.model
+    def _ingest(self, data, source='webhook'):
+        """Simpan payload webhook; return record kosong jika event yang sama sudah pernah diterima
+
+        ValueError jika payload tidak punya status atau tidak bisa diidentifikasi (tanpa id &
+        external_id) - event seperti itu tidak bisa dideduplikasi dengan aman.
+        """
+        xendit_id = data.get('id') or ''
+        status = data.get('status') or ''
+        external_id = data.get('external_id') or ''
+        if not status or not (xendit_id or external_id):
+            raise ValueError("Payload Xendit tanpa status atau tanpa id/external_id")
+        dedup_key = f'{xendit_id}:{status}' if xendit_id else f'ext:{external_id}:{status}'
+        app_id = int(external_id[5:]) if external_id.startswith('CERT-') and external_id[5:].isdigit() else None
+
+        # ON CONFLICT: aman terhadap pengiriman ganda yang datang bersamaan
+        self.env.cr.execute("""
+            INSERT INTO certification_xendit_event
+                (dedup_key, xendit_id, external_id, status, payload, application_id, source,
+                 state, attempts, create_uid, write_uid, create_date, write_date)
+            VALUES (%s, %s, %s, %s, %s,
+                    (SELECT id FROM certification_application WHERE id = %s), %s,
+                    'pending', 0, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')
+            ON CONFLICT (dedup_key) DO NOTHING
+            RETURNING id
+        """, (dedup_key, xendit_id, external_id, status, json.dumps(data),
+              app_id, source, self.env.uid, self.env.uid))
+        row = self.env.cr.fetchone()
+        created = self.browse(row[0] if row else [])
+
+        if created and source == 'webhook':
+            cron = self.env.ref('iso17024_portall.ir_cron_process_xendit_events', raise_if_not_found=False)
+            if cron:
+                cron.sudo()._trigger()
+        return created
+
+    # =========================================================
+    # WORKER
+    # =========================================================
+
+    @api.model
+    def _cron_process_events(self, limit=200):
+        """Worker cron: proses event sesuai urutan masuk (SKIP LOCKED agar aman paralel)"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+
+        self.env.cr.execute("""
+            SELECT id FROM certification_xendit_event
+             WHERE state = 'pending'
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, (limit,))
+        events = self.browse([row[0] for row in self.env.cr.fetchall()])
+
+        for event in events:
+            event._process()
+            if auto_commit:
+                self.env.cr.commit()
+
+        remaining = self.search_count([('state', '=', 'pending')])
+        if remaining:
+            self.env['ir.cron']._notify_progress(done=len(events), remaining=remaining)
+
+    def _process(self):
+        self.ensure_one()
+        app = self.application_id
+        if not app:
+            self.write({'state': 'ignored', 'processed_at': fields.Datetime.now()})
+            return
+
+        try:
+            with self.env.cr.savepoint():
+                data = json.loads(self.payload or '{}')
+                changed = app._apply_xendit_status(
+                    self.status,
+                    xendit_id=self.xendit_id,
+                    payment_method=data.get('payment_method'),
+                )
+        except Exception as e:
+            _logger.error(f"Xendit event {self.id} failed: {e}")
+            self.write({
+                'attempts': self.attempts + 1,
+                'state': 'failed' if self.attempts + 1 >= MAX_ATTEMPTS else 'pending',
+                'error': str(e),
+            })
+            return
+
+        self.write({
+            'state': 'done' if changed else 'ignored',
+            'attempts': self.attempts + 1,
+            'error': False,
+            'processed_at': fields.Datetime.now(),
+        })
+
+    def action_replay(self):
+        """Admin: proses ulang event (mis. setelah perbaikan bug); transisi tetap idempoten
+
+        Log hanya-baca untuk user biasa; hanya administrator yang boleh mengantrikan ulang.
+        """
+        if not self.env.user.has_group('base.group_system'):
+            raise AccessError("Hanya administrator yang boleh memproses ulang event Xendit.")
+        self.sudo().write({'state': 'pending', 'attempts': 0, 'error': False})
+        cron = self.env.ref('iso17024_portall.ir_cron_process_xendit_events', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
@@ -0,0 +1,200 @@
+from odoo import models, fields, api
+import logging
+import threading
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+_logger = logging.getLogger(__name__)
+
+# Retry dengan exponential backoff: 30s, 60s, 120s, ... maksimal 1 jam
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+MAX_ATTEMPTS = 6
+# Status HTTP yang layak dicoba ulang (gangguan sementara di sisi Xendit)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Timeout (connect, read) untuk semua panggilan API Xendit
+XENDIT_TIMEOUT = (5, 30)
+# Invoice dengan status ini masih berlaku dan boleh dipakai ulang saat retry
+REUSABLE_INVOICE_STATUS = {'PENDING', 'PAID', 'SETTLED'}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_xendit_session():
+    """requests.Session keep-alive yang dipakai bersama oleh semua job di proses ini"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def fetch_xendit_invoice(api_url, headers, invoice_id):
+    """GET status invoice Xendit - tanpa ORM, aman dipanggil dari thread pool"""
+    response = get_xendit_session().get(f"{api_url}/v2/invoices/{invoice_id}", headers=headers, timeout=XENDIT_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def find_xendit_invoice(api_url, headers, external_id):
+    """Cari invoice yang masih berlaku berdasarkan external_id (None jika tidak ada)
+
+    Dipakai sebelum POST: percobaan sebelumnya bisa saja sudah membuat invoice
+    walau responsnya tidak sampai (timeout).
+    """
+    response = get_xendit_session().get(
+        f"{api_url}/v2/invoices", params={'external_id': external_id},
+        headers=headers, timeout=XENDIT_TIMEOUT
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    for invoice in response.json() or []:
+        if invoice.get('status') in REUSABLE_INVOICE_STATUS:
+            return invoice
+    return None
+
+
+class CertificationXenditJob(models.Model):
+    """Antrian pembuatan invoice Xendit (dijalankan cron, dengan retry)"""
+    _name = 'certification.xendit.job'
+    _description = 'Job Invoice Xendit'
+    _order = 'id desc'
+
+    application_id = fields.Many2one(
+        'certification.application',
+        string='Aplikasi Sertifikasi',
+        required=True,
+        index=True,
+        ondelete='cascade'
+    )
+    state = fields.Selection([
+        ('queued', 'Antri'),
+        ('done', 'Berhasil'),
+        ('failed', 'Gagal'),
+    ], string='Status', default='queued', required=True, index=True)
+    attempts = fields.Integer(string='Jumlah Percobaan', default=0)
+    next_attempt_at = fields.Datetime(string='Percobaan Berikutnya', default=fields.Datetime.now, index=True)
+    error = fields.Text(string='Error Terakhir')
+    done_at = fields.Datetime(string='Waktu Selesai')
+
+    # =========================================================
+    # ANTRIAN
+    # =========================================================
+
+    @api.model
+    def _enqueue(self, applications):
+        """Buat job untuk setiap aplikasi dan bangunkan cron (tidak memanggil Xendit di sini)"""
+        if not applications:
+            return self
+        jobs = self.sudo().create([{'application_id': app.id} for app in applications])
+        self._trigger_cron()
+        return jobs
+
+    @api.model
+    def _trigger_cron(self, at=None):
+        cron = self.env.ref('iso17024_portall.ir_cron_process_xendit_jobs', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at)
+
+    @api.model
+    def _cron_process_jobs(self, limit=50):
+        """Worker cron: proses job yang sudah jatuh tempo (SKIP LOCKED agar aman paralel)"""
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+
+        self.env.cr.execute("""
+            SELECT id FROM certification_xendit_job
+             WHERE state = 'queued'
+               AND next_attempt_at <= %s
+             ORDER BY next_attempt_at, id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, (fields.Datetime.now(), limit))
+        jobs = self.browse([row[0] for row in self.env.cr.fetchall()])
+
+        for job in jobs:
+            job._process()
+            if auto_commit:
+                self.env.cr.commit()
+
+        # Jadwalkan run berikutnya tepat saat retry terdekat jatuh tempo
+        next_job = self.search([('state', '=', 'queued')], order='next_attempt_at', limit=1)
+        if next_job:
+            self._trigger_cron(next_job.next_attempt_at)
+
+    # =========================================================
+    # PEMROSESAN
+    # =========================================================
+
+    def _process(self):
+        self.ensure_one()
+        app = self.application_id
+        attempts = self.attempts + 1
+
+        if app.xendit_payment_url:
+            # Sudah punya link (mis. job ganda) -> tidak perlu panggil Xendit lagi
+            self.write({'state': 'done', 'attempts': attempts, 'done_at': fields.Datetime.now()})
+            return
+
+        try:
+            # Savepoint: error DB pada satu job tidak merusak transaksi job lain di batch
+            with self.env.cr.savepoint():
+                app._create_xendit_invoice(idempotency_key=self._idempotency_key())
+        except requests.exceptions.RequestException as e:
+            status = e.response.status_code if e.response is not None else None
+            retryable = status is None or status in RETRYABLE_STATUS
+            self._mark_error(str(e), attempts, retryable)
+            return
+        except Exception as e:
+            # Konfigurasi / data salah: percuma diulang
+            self._mark_error(str(e), attempts, retryable=False)
+            return
+
+        self.write({
+            'state': 'done',
+            'attempts': attempts,
+            'error': False,
+            'done_at': fields.Datetime.now(),
+        })
+        try:
+            with self.env.cr.savepoint():
+                app._on_xendit_invoice_ready()
+        except Exception as e:
+            # Invoice sudah ada di Xendit; gagal kirim notifikasi tidak boleh mengulang job
+            _logger.error(f"Xendit job {self.id}: notification for application {app.id} failed: {e}")
+
+    def _idempotency_key(self):
+        """Kunci X-IDEMPOTENCY-KEY: tetap sama untuk semua retry job ini
+
+        Job baru (mis. retry manual admin) mendapat kunci baru sehingga bisa membuat
+        invoice pengganti jika invoice lama sudah kadaluarsa.
+        """
+        self.ensure_one()
+        return f"CERT-{self.application_id.id}-JOB-{self.id}"
+
+    def _mark_error(self, message, attempts, retryable):
+        self.ensure_one()
+        _logger.error(f"Xendit job {self.id} (application {self.application_id.id}) attempt {attempts} failed: {message}")
+
+        if retryable and attempts < MAX_ATTEMPTS:
+            delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+            self.write({
+                'attempts': attempts,
+                'error': message,
+                'next_attempt_at': fields.Datetime.now() + timedelta(seconds=delay),
+            })
+            return
+
+        self.write({'state': 'failed', 'attempts': attempts, 'error': message})
+        self.application_id.message_post(
+            body="<b style='color:orange'>⚠️ Xendit payment link gagal dibuat.</b><br/>"
+                 f"Percobaan: {attempts}<br/>Error: {message}"
+        )
@@ -0,0 +1,21 @@
+from . import test_document_metadata
+from . import test_upload
+from . import test_document_job
+from . import test_document_dedup
+from . import test_xendit_job
+from . import test_scheme_cache
+from . import test_login_gate
+from . import test_public_page_cache
+from . import test_page_weight
+from . import test_status_token
+from . import test_quiz_autosave
+from . import test_quiz_compaction
+from . import test_quiz_sampling
+from . import test_quiz_start
+from . import test_quiz_regrade
+from . import test_quiz_question_cache
+from . import test_xendit_event
+from . import test_xendit_reconcile
+from . import test_invoice_batch
+from . import test_email_queue
+from . import test_current_application
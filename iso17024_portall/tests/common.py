@@ -0,0 +1,114 @@
+import base64
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import TransactionCase, HttpCase, new_test_user
+
+from ..models.application import DOCUMENT_FIELDS
+
+# Topik & tingkat kesulitan bergilir untuk soal kuis uji
+QUESTION_TOPICS = ['korosi', 'persiapan permukaan', 'inspeksi']
+QUESTION_DIFFICULTIES = ['easy', 'medium', 'hard']
+
+# Gambar PNG 1x1 piksel
+PNG_1PX = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+
+
+def make_pdf(pages=1):
+    """PDF minimal yang valid (xref dengan offset benar) dengan jumlah halaman tertentu"""
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % (3 + i) for i in range(pages)), pages),
+    ]
+    objects += [b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>'] * pages
+
+    body = b'%PDF-1.4\n'
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += b'%d 0 obj\n%s\nendobj\n' % (number, obj)
+    xref = len(body)
+    body += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    body += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    body += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return body
+
+
+@contextmanager
+def track_document_reads():
+    """Catat field dokumen certification.application yang isinya (binary) dibaca"""
+    reads = []
+    original_read = fields.Binary.read
+
+    def read(field, records):
+        if field.model_name == 'certification.application' and field.name in DOCUMENT_FIELDS:
+            reads.append(field.name)
+        return original_read(field, records)
+
+    with patch.object(fields.Binary, 'read', read):
+        yield reads
+
+
+class CertificationCaseMixin:
+    """Kandidat portal (registrasi approved) + helper membuat aplikasi"""
+
+    @classmethod
+    def _setup_candidate(cls):
+        cls.candidate_user = new_test_user(
+            cls.env, login='cert_candidate', groups='base.group_portal',
+            name='Kandidat Uji', email='cert_candidate@example.com',
+        )
+        cls.candidate = cls.candidate_user.partner_id
+        cls.candidate.registration_state = 'approved'
+
+    @classmethod
+    def _create_application(cls, **vals):
+        return cls.env['certification.application'].create(dict({
+            'partner_id': cls.candidate.id,
+            'scheme': 'level1',
+        }, **vals))
+
+
+    @classmethod
+    def _create_quiz(cls, question_count, **vals):
+        """Kuis level1 dengan N soal (kunci A, bobot 1, topik/kesulitan bergilir)"""
+        return cls.env['cert.quiz'].create(dict({
+            'name': f'Kuis Uji {question_count} Soal',
+            'scheme': 'level1',
+            'question_ids': [(0, 0, {
+                'content': f'<p>Soal nomor {index}</p>',
+                'choice_a': 'Pilihan A', 'choice_b': 'Pilihan B',
+                'choice_c': 'Pilihan C', 'choice_d': 'Pilihan D',
+                'correct_choice': 'A',
+                'topic': QUESTION_TOPICS[index % len(QUESTION_TOPICS)],
+                'difficulty': QUESTION_DIFFICULTIES[index % len(QUESTION_DIFFICULTIES)],
+            }) for index in range(question_count)],
+        }, **vals))
+
+    @classmethod
+    def _start_attempt(cls, quiz, application, **vals):
+        return cls.env['cert.quiz.attempt'].create(dict({
+            'application_id': application.id,
+            'user_id': cls.candidate_user.id,
+            'quiz_id': quiz.id,
+        }, **vals))
+
+
+class CertificationCase(CertificationCaseMixin, TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._setup_candidate()
+
+
+class CertificationHttpCase(CertificationCaseMixin, HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._setup_candidate()
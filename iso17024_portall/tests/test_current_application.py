@@ -0,0 +1,58 @@
+from odoo.tests import tagged
+
+from .common import CertificationCase, CertificationHttpCase
+
+
+@tagged('post_install', '-at_install')
+class TestCurrentApplication(CertificationCase):
+
+    def test_pointer_follows_latest_application(self):
+        first = self._create_application()
+        self.assertEqual(self.candidate.current_application_id, first)
+        second = self._create_application()
+        self.assertEqual(self.candidate.current_application_id, second)
+        second.unlink()
+        self.assertEqual(self.candidate.current_application_id, first)
+
+    def test_portal_status_queries_do_not_grow(self):
+        self._create_application(state='payment')
+        self.env.invalidate_all()
+        # SELECT res_partner (termasuk pointer) + read() field aplikasi
+        with self.assertQueryCount(2):
+            status = self.candidate._get_portal_status()
+        self.assertEqual(status['application']['state'], 'payment')
+
+        # Riwayat aplikasi tidak menambah query (tidak ada search ke aplikasi kandidat)
+        for _index in range(20):
+            self._create_application(state='payment')
+        self.env.invalidate_all()
+        with self.assertQueryCount(2):
+            self.candidate._get_portal_status()
+
+
+@tagged('post_install', '-at_install')
+class TestCurrentApplicationRoutes(CertificationHttpCase):
+
+    def _hot_query_count(self, url):
+        """Jumlah query untuk request kedua (cache hangat); request test berbagi cursor self.cr"""
+        self.url_open(url)
+        count = self.cr.sql_log_count
+        response = self.url_open(url, allow_redirects=False)
+        self.assertEqual(response.status_code, 200, url)
+        return self.cr.sql_log_count - count
+
+    def test_route_queries_independent_of_history(self):
+        self._create_application(state='payment')
+        self.authenticate('cert_candidate', 'cert_candidate')
+        routes = ['/certification/status', '/certification/payment', '/certification/status/json']
+        baseline = {url: self._hot_query_count(url) for url in routes}
+
+        # 20 aplikasi lama (mis. resertifikasi); aplikasi aktif tetap yang terbaru
+        self.env['certification.application'].create([
+            {'partner_id': self.candidate.id, 'scheme': 'level1', 'state': 'certified'} for _index in range(20)
+        ])
+        self._create_application(state='payment')
+        self.assertEqual(
+            {url: self._hot_query_count(url) for url in routes}, baseline,
+            "Route portal harus membaca pointer current_application_id, bukan mencari di semua aplikasi",
+        )
@@ -0,0 +1,70 @@
+import base64
+
+from odoo.tests import tagged
+
+from .common import CertificationCase, PNG_1PX, make_pdf
+from .test_document_job import make_noise_image
+
+
+@tagged('post_install', '-at_install')
+class TestDocumentDedup(CertificationCase):
+
+    def _attachment(self, application, field_name):
+        return self.env['ir.attachment'].search([
+            ('res_model', '=', application._name),
+            ('res_id', '=', application.id),
+            ('res_field', '=', field_name),
+        ])
+
+    def test_identical_upload_shares_file_and_thumbnails(self):
+        first = self._create_application(ktp_file=base64.b64encode(PNG_1PX), ktp_filename='ktp.png')
+        second = self._create_application(ktp_file=base64.b64encode(PNG_1PX), ktp_filename='ktp.png')
+
+        donor = first._document_meta()['ktp_file']
+        doc = second._document_meta()['ktp_file']
+        self.assertEqual(doc.checksum, donor.checksum)
+        self.assertTrue(donor.has_derivatives)
+        self.assertTrue(doc.has_derivatives)
+        # Tidak ada pemrosesan ulang untuk isi yang sudah dikenal
+        self.assertFalse(doc.job_ids)
+
+        attachment = self._attachment(second, 'ktp_file')
+        self.assertEqual(attachment.store_fname, self._attachment(first, 'ktp_file').store_fname)
+        attachment.invalidate_recordset()
+        self.assertEqual(attachment.raw, PNG_1PX)
+
+        doc.invalidate_recordset()
+        for field_name in ('thumb_128_webp', 'thumb_256_jpeg', 'thumb_1024_jpeg'):
+            self.assertTrue(doc[field_name], f"{field_name} kosong")
+            self.assertEqual(doc[field_name], donor[field_name])
+
+    def test_reupload_of_original_adopts_processed_file(self):
+        png = make_noise_image((800, 800), 'PNG')
+        first = self._create_application(pas_foto=base64.b64encode(png), pas_foto_filename='foto.png')
+        self.env['certification.document.job']._cron_process_jobs()
+        donor = first._document_meta()['pas_foto']
+        self.assertEqual(donor.mimetype, 'image/jpeg')
+        processed = self._attachment(first, 'pas_foto').raw
+
+        second = self._create_application(pas_foto=base64.b64encode(png), pas_foto_filename='foto.png')
+
+        doc = second._document_meta()['pas_foto']
+        self.assertEqual(doc.checksum, donor.checksum)
+        self.assertEqual(doc.mimetype, 'image/jpeg')
+        self.assertEqual(second.pas_foto_filename, 'foto.jpg')
+        attachment = self._attachment(second, 'pas_foto')
+        attachment.invalidate_recordset()
+        self.assertEqual(attachment.mimetype, 'image/jpeg')
+        self.assertEqual(attachment.raw, processed)
+
+    def test_identical_rewrite_is_noop(self):
+        pdf = make_pdf()
+        application = self._create_application(cv_file=base64.b64encode(pdf), cv_filename='cv.pdf')
+        doc = application._document_meta()['cv_file']
+        uploaded_at = doc.uploaded_at
+
+        application.write({'cv_file': base64.b64encode(pdf)})
+
+        self.assertEqual(application._document_meta()['cv_file'], doc)
+        self.assertEqual(doc.uploaded_at, uploaded_at)
+        self.assertEqual(len(doc.job_ids), 1)
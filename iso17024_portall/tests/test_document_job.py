@@ -0,0 +1,107 @@
+import base64
+import io
+import logging
+import time
+
+from PIL import Image
+
+from odoo.tests import tagged
+
+from ..models.application import DOCUMENT_FIELDS
+from .common import CertificationCase, make_pdf
+
+_logger = logging.getLogger(__name__)
+
+
+def make_noise_image(size, fmt):
+    """Gambar noise (tidak bisa dikompres PNG) - mirip hasil scan / foto kamera"""
+    output = io.BytesIO()
+    Image.effect_noise(size, 64).convert('RGB').save(output, format=fmt)
+    return output.getvalue()
+
+
+@tagged('post_install', '-at_install')
+class TestDocumentJob(CertificationCase):
+
+    def _process_queue(self):
+        self.env['certification.document.job']._cron_process_jobs(limit=100)
+
+    def test_png_reencoded_to_jpeg_is_renamed(self):
+        png = make_noise_image((800, 800), 'PNG')
+        application = self._create_application(
+            pas_foto=base64.b64encode(png),
+            pas_foto_filename='foto.PNG',
+        )
+        doc = application._document_meta()['pas_foto']
+        self.assertEqual(doc.job_ids.state, 'queued')
+
+        self._process_queue()
+
+        self.assertEqual(doc.job_ids.state, 'done')
+        self.assertEqual(doc.mimetype, 'image/jpeg')
+        self.assertLess(doc.file_size, len(png))
+        self.assertEqual(application.pas_foto_filename, 'foto.jpg')
+        stream = application._get_document_stream('pas_foto')
+        self.assertEqual(stream.mimetype, 'image/jpeg')
+        self.assertEqual(stream.download_name, 'foto.jpg')
+
+    def test_jpeg_filename_kept(self):
+        jpeg = make_noise_image((2600, 2600), 'JPEG')
+        application = self._create_application(
+            ktp_file=base64.b64encode(jpeg),
+            ktp_filename='ktp.jpeg',
+        )
+        self._process_queue()
+        doc = application._document_meta()['ktp_file']
+        self.assertEqual(doc.job_ids.state, 'done')
+        self.assertEqual(doc.width, 2048)
+        self.assertEqual(application.ktp_filename, 'ktp.jpeg')
+
+    def test_pdf_page_count(self):
+        application = self._create_application(
+            ijazah_file=base64.b64encode(make_pdf(pages=3)),
+            ijazah_filename='ijazah.pdf',
+        )
+        self._process_queue()
+        doc = application._document_meta()['ijazah_file']
+        self.assertEqual(doc.job_ids.state, 'done')
+        self.assertEqual(doc.page_count, 3)
+        self.assertEqual((doc.width, doc.height), (595, 842))
+        self.assertEqual(application.ijazah_filename, 'ijazah.pdf')
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestDocumentJobBenchmark(CertificationCase):
+    """Throughput pipeline atas korpus contoh. Jalankan dengan --test-tags cert_benchmark"""
+
+    CORPUS_SIZE = 10
+
+    def test_pipeline_throughput(self):
+        corpus = []
+        for index in range(self.CORPUS_SIZE):
+            corpus += [
+                ('pas_foto', f'foto_{index}.png', make_noise_image((1200, 1600), 'PNG')),
+                ('ktp_file', f'ktp_{index}.jpg', make_noise_image((3000, 2000), 'JPEG')),
+                ('ijazah_file', f'ijazah_{index}.pdf', make_pdf(pages=1 + index % 5)),
+            ]
+        for field_name, filename, raw in corpus:
+            self._create_application(**{
+                field_name: base64.b64encode(raw),
+                DOCUMENT_FIELDS[field_name]: filename,
+            })
+
+        Job = self.env['certification.document.job']
+        jobs = Job.search([('state', '=', 'queued')])
+        size_before = sum(len(raw) for _field, _name, raw in corpus)
+
+        started = time.monotonic()
+        Job._cron_process_jobs(limit=len(jobs))
+        elapsed = time.monotonic() - started
+
+        self.assertFalse(jobs.filtered(lambda j: j.state != 'done'))
+        size_after = sum(jobs.mapped('size_after'))
+        _logger.info(
+            f"Document pipeline: {len(jobs)} files in {elapsed:.2f}s "
+            f"({len(jobs) / elapsed:.1f} files/s, {size_before / elapsed / 1e6:.1f} MB/s), "
+            f"{size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB"
+        )
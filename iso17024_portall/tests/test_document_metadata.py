@@ -0,0 +1,76 @@
+import base64
+import hashlib
+
+from odoo.tests import tagged
+
+from .common import CertificationCase, CertificationHttpCase, PNG_1PX, make_pdf, track_document_reads
+
+
+@tagged('post_install', '-at_install')
+class TestDocumentMetadata(CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pdf = make_pdf()
+        cls.application = cls._create_application(
+            state='submitted',
+            pas_foto=base64.b64encode(PNG_1PX),
+            pas_foto_filename='foto.png',
+            cv_file=base64.b64encode(cls.pdf),
+            cv_filename='cv.pdf',
+        )
+
+    def test_metadata_synced_from_attachment(self):
+        docs = self.application._document_meta()
+        self.assertEqual(set(docs), {'pas_foto', 'cv_file'})
+        self.assertEqual(docs['cv_file'].file_size, len(self.pdf))
+        self.assertEqual(docs['cv_file'].mimetype, 'application/pdf')
+        self.assertEqual(docs['cv_file'].checksum, hashlib.sha1(self.pdf).hexdigest())
+        self.assertEqual(docs['pas_foto'].mimetype, 'image/png')
+        self.assertEqual(self.application.document_count, 2)
+
+        self.application.write({'cv_file': False})
+        self.assertNotIn('cv_file', self.application._document_meta())
+        self.assertEqual(self.application.document_count, 1)
+
+    def test_listing_and_previews_never_read_binary(self):
+        self.env.invalidate_all()
+        with track_document_reads() as reads:
+            self.env['certification.application'].search_read(
+                [('id', '=', self.application.id)], ['state', 'document_count', 'scheme'])
+            preview_cv = self.application.preview_cv
+            preview_foto = self.application.preview_pas_foto
+            self.application._document_meta()
+        self.assertEqual(reads, [])
+        self.assertIn('cv.pdf', preview_cv)
+        self.assertIn('pas_foto', preview_foto)
+
+    def test_download_streams_from_filestore(self):
+        self.env.invalidate_all()
+        with track_document_reads() as reads:
+            stream = self.application._get_document_stream('cv_file')
+        self.assertEqual(reads, [])
+        self.assertEqual(stream.type, 'path')
+        self.assertEqual(stream.size, len(self.pdf))
+        with open(stream.path, 'rb') as fp:
+            self.assertEqual(fp.read(), self.pdf)
+
+
+@tagged('post_install', '-at_install')
+class TestStatusPageRender(CertificationHttpCase):
+
+    def test_status_page_never_reads_binary(self):
+        self._create_application(
+            state='submitted',
+            pas_foto=base64.b64encode(PNG_1PX),
+            pas_foto_filename='foto.png',
+            cv_file=base64.b64encode(make_pdf()),
+            cv_filename='cv.pdf',
+        )
+        self.authenticate('cert_candidate', 'cert_candidate')
+        self.env.invalidate_all()
+        with track_document_reads() as reads:
+            response = self.url_open('/certification/status')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, [])
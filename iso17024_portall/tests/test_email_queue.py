@@ -0,0 +1,142 @@
+import logging
+import socketserver
+import threading
+import time
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from .common import CertificationCase
+
+_logger = logging.getLogger(__name__)
+
+PAYMENT_TEMPLATE = 'iso17024_portall.email_template_payment_notification'
+
+
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    """Server SMTP minimal: terima semua email, hitung jumlahnya, tidak mengirim ke mana pun"""
+
+    def _reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self._reply('220 sink ESMTP')
+        in_data = False
+        for raw in self.rfile:
+            line = raw.rstrip(b'\r\n')
+            if in_data:
+                if line == b'.':
+                    in_data = False
+                    with self.server.lock:
+                        self.server.received += 1
+                    self._reply('250 OK')
+                continue
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self._reply('250-sink')
+                self._reply('250 8BITMIME')
+            elif command == b'DATA':
+                in_data = True
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                # HELO, MAIL, RCPT, RSET, NOOP
+                self._reply('250 OK')
+
+
+class EmailQueueCase(CertificationCase):
+
+    def _pending_partners(self, count):
+        return self.env['res.partner'].create([{
+            'name': f'Kandidat Antrian {index}',
+            'email': f'kandidat.antrian.{index}@example.com',
+            'registration_state': 'pending',
+        } for index in range(count)])
+
+    def _applications(self, count):
+        return self.env['certification.application'].create([
+            {'partner_id': self.candidate.id, 'scheme': 'level1'} for _index in range(count)
+        ])
+
+
+@tagged('post_install', '-at_install')
+class TestEmailQueue(EmailQueueCase):
+
+    def test_application_batch_queues_one_mail_each(self):
+        applications = self._applications(20)
+        mails = applications._queue_email(PAYMENT_TEMPLATE)
+
+        self.assertEqual(len(mails), 20)
+        self.assertEqual(set(mails.mapped('state')), {'outgoing'})
+        self.assertFalse(any(mails.mapped('auto_delete')))
+        for application in applications:
+            self.assertEqual(application.last_email_id.res_id, application.id)
+            self.assertEqual(application.last_email_id.model, 'certification.application')
+            self.assertEqual(application.last_email_state, 'outgoing')
+
+        # Antrian berikutnya menggeser pointer ke email terbaru
+        previous = applications[0].last_email_id
+        applications[:1]._queue_email(PAYMENT_TEMPLATE)
+        self.assertNotEqual(applications[0].last_email_id, previous)
+
+    def test_registration_approval_queues_one_mail_each(self):
+        partners = self._pending_partners(10)
+        partners.action_approve_registration()
+
+        self.assertEqual(set(partners.mapped('registration_state')), {'approved'})
+        mails = partners.registration_email_id
+        self.assertEqual(len(mails), 10)
+        self.assertEqual(set(mails.mapped('state')), {'outgoing'})
+        for partner in partners:
+            self.assertEqual(partner.registration_email_id.res_id, partner.id)
+            self.assertIn(partner.email, partner.registration_email_id.email_to)
+
+    def test_missing_template_queues_nothing(self):
+        applications = self._applications(2)
+        self.assertFalse(applications._queue_email('iso17024_portall.template_tidak_ada'))
+        self.assertFalse(applications.last_email_id)
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestEmailQueueBenchmark(EmailQueueCase):
+    """Antrikan & kirim 500 email ke SMTP sink lokal. Jalankan dengan --test-tags cert_benchmark"""
+
+    EMAILS = 500
+
+    def test_smtp_sink_throughput(self):
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SmtpSinkHandler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.received = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.env['ir.mail_server'].create({
+            'name': 'SMTP Sink',
+            'smtp_host': '127.0.0.1',
+            'smtp_port': server.server_address[1],
+            'smtp_encryption': 'none',
+            'sequence': 1,
+        })
+
+        applications = self._applications(self.EMAILS)
+        started = time.monotonic()
+        mails = applications._queue_email(PAYMENT_TEMPLATE)
+        self.env.flush_all()
+        queue_elapsed = time.monotonic() - started
+
+        # Mode test memblokir SMTP; di sini justru ingin koneksi sungguhan ke sink
+        with patch.object(type(self.env['ir.mail_server']), '_is_test_mode', lambda self: False):
+            started = time.monotonic()
+            mails.send()
+            send_elapsed = time.monotonic() - started
+
+        self.assertEqual(server.received, self.EMAILS)
+        self.assertEqual(set(mails.mapped('state')), {'sent'})
+        _logger.info(
+            f"Email queue ({self.EMAILS} mails): queued in {queue_elapsed:.1f}s "
+            f"({self.EMAILS / queue_elapsed:.0f}/s), sent to SMTP sink in {send_elapsed:.1f}s "
+            f"({self.EMAILS / send_elapsed:.0f}/s)"
+        )
@@ -0,0 +1,106 @@
+import logging
+import time
+from unittest.mock import patch
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from ..models.application import CertificationApplication
+from .common import CertificationCaseMixin
+
+_logger = logging.getLogger(__name__)
+
+
+class InvoiceBatchCase(CertificationCaseMixin, AccountTestInvoicingCommon):
+    """Aplikasi level1 berstatus submitted + produk invoice skema (butuh chart of accounts)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._setup_candidate()
+        cls.env.ref('iso17024_portall.scheme_level1').product_id = cls.product_a
+
+    @classmethod
+    def _submitted_applications(cls, count):
+        return cls.env['certification.application'].create([
+            {'partner_id': cls.candidate.id, 'scheme': 'level1', 'state': 'submitted'}
+            for _index in range(count)
+        ])
+
+
+@tagged('post_install', '-at_install')
+class TestInvoiceBatch(InvoiceBatchCase):
+
+    def test_batch_with_one_failing_application(self):
+        applications = self._submitted_applications(20)
+        failing = applications[7]
+        prepare = CertificationApplication._prepare_invoice_vals
+
+        def prepare_invoice_vals(record, product):
+            if record == failing:
+                raise UserError("Akun pendapatan belum diatur")
+            return prepare(record, product)
+
+        with patch.object(CertificationApplication, '_prepare_invoice_vals', prepare_invoice_vals):
+            action = applications.action_verify_documents()
+
+        done = applications - failing
+        self.assertEqual(set(done.mapped('state')), {'payment'})
+        self.assertEqual(len(done.invoice_id), 19)
+        self.assertEqual(set(done.invoice_id.mapped('state')), {'posted'})
+        self.assertEqual(failing.state, 'submitted')
+        self.assertFalse(failing.invoice_id)
+
+        params = action['params']
+        self.assertEqual(params['type'], 'danger')
+        self.assertTrue(params['sticky'])
+        self.assertIn("19 aplikasi diverifikasi.", params['message'])
+        self.assertIn("Akun pendapatan belum diatur", params['message'])
+
+    def test_skipped_and_missing_product_in_summary(self):
+        applications = self._submitted_applications(3)
+        applications[0].state = 'draft'
+        # Skema level2 tanpa produk invoice (tidak ada produk bernama skema di DB uji)
+        self.env.ref('iso17024_portall.scheme_level2').product_id = False
+        no_product = self._create_application(scheme='level2', state='submitted')
+
+        action = (applications | no_product).action_verify_documents()
+
+        message = action['params']['message']
+        self.assertIn("2 aplikasi diverifikasi.", message)
+        self.assertIn("1 dilewati", message)
+        self.assertIn("Produk 'level2' tidak ditemukan", message)
+        self.assertEqual(no_product.state, 'submitted')
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestInvoiceBatchBenchmark(InvoiceBatchCase):
+    """Verifikasi massal 500 aplikasi: satu batch vs satu per satu. --test-tags cert_benchmark"""
+
+    APPLICATIONS = 500
+
+    def test_verify_500_applications(self):
+        batch = self._submitted_applications(self.APPLICATIONS)
+        single = self._submitted_applications(self.APPLICATIONS)
+        self.env.flush_all()
+
+        started = time.monotonic()
+        queries = self.env.cr.sql_log_count
+        batch.action_verify_documents()
+        self.env.flush_all()
+        batch_elapsed, batch_queries = time.monotonic() - started, self.env.cr.sql_log_count - queries
+
+        started = time.monotonic()
+        queries = self.env.cr.sql_log_count
+        for application in single:
+            application.action_verify_documents()
+        self.env.flush_all()
+        single_elapsed, single_queries = time.monotonic() - started, self.env.cr.sql_log_count - queries
+
+        self.assertEqual(set((batch | single).mapped('state')), {'payment'})
+        self.assertEqual(len(batch.invoice_id), self.APPLICATIONS)
+        _logger.info(
+            f"Invoice verify ({self.APPLICATIONS} applications): batch {batch_elapsed:.1f}s / {batch_queries} queries, "
+            f"one by one {single_elapsed:.1f}s / {single_queries} queries"
+        )
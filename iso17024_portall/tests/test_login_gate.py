@@ -0,0 +1,122 @@
+import logging
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from odoo import http
+from odoo.tests import tagged, new_test_user
+
+from .common import CertificationCase, CertificationHttpCase
+
+_logger = logging.getLogger(__name__)
+
+CSRF_RE = re.compile(r'name="csrf_token" value="([^"]+)"')
+
+
+@tagged('post_install', '-at_install')
+class TestLoginGateQueries(CertificationCase):
+
+    def test_registration_state_single_query(self):
+        Partner = self.env['res.partner'].sudo()
+        with self.assertQueryCount(1):
+            state = Partner._get_registration_state_by_login('cert_candidate')
+        self.assertEqual(state, 'approved')
+
+        with self.assertQueryCount(1):
+            self.assertIsNone(Partner._get_registration_state_by_login('tidak_ada@example.com'))
+
+    def test_create_session_deactivates_in_one_update(self):
+        Session = self.env['cert.user.session'].sudo()
+        first = Session.create_session(self.candidate_user.id, 'token-lama')
+
+        # Satu UPDATE ... RETURNING + satu INSERT, tanpa search sesi lama
+        with self.assertQueryCount(2):
+            second = Session.create_session(self.candidate_user.id, 'token-baru')
+
+        self.assertFalse(first.is_active)
+        self.assertEqual(first.logout_reason, 'new_device')
+        self.assertTrue(second.is_active)
+
+
+@tagged('post_install', '-at_install')
+class TestLoginGate(CertificationHttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pending_user = new_test_user(
+            cls.env, login='cert_pending', groups='base.group_portal', name='Kandidat Pending',
+        )
+        cls.pending_user.partner_id.registration_state = 'pending'
+
+    def _login(self, login):
+        return self.url_open('/web/login', data={
+            'login': login,
+            'password': login,
+            'csrf_token': http.Request.csrf_token(self),
+        }, allow_redirects=False)
+
+    def test_pending_user_blocked(self):
+        response = self._login('cert_pending')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('belum diverifikasi', response.text)
+        self.assertFalse(self.env['cert.user.session'].sudo().search([('user_id', '=', self.pending_user.id)]))
+
+    def test_approved_portal_user_redirected(self):
+        response = self._login('cert_candidate')
+        self.assertEqual(response.status_code, 303)
+        self.assertTrue(response.headers['Location'].endswith('/certification/apply'))
+        self.assertTrue(self.env['cert.user.session'].sudo().search([
+            ('user_id', '=', self.candidate_user.id), ('is_active', '=', True),
+        ]))
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestLoginGateBenchmark(CertificationHttpCase):
+    """Throughput login kandidat (approved + pending) lewat HTTP. Jalankan dengan --test-tags cert_benchmark
+
+    Di mode test semua request berbagi satu cursor (diserialkan), jadi angka ini batas bawah
+    throughput; latency per request tetap menunjukkan biaya satu login termasuk hash password.
+    """
+
+    CANDIDATES = 200
+    PENDING_EVERY = 5
+    WORKERS = 16
+
+    def _login(self, login):
+        session = requests.Session()
+        page = session.get(f'{self.base_url()}/web/login', timeout=60)
+        csrf_token = CSRF_RE.search(page.text).group(1)
+        started = time.monotonic()
+        response = session.post(f'{self.base_url()}/web/login', data={
+            'login': login, 'password': login, 'csrf_token': csrf_token,
+        }, allow_redirects=False, timeout=60)
+        return time.monotonic() - started, response.status_code
+
+    def test_login_throughput(self):
+        logins = []
+        for index in range(self.CANDIDATES):
+            login = f'cert_login_{index}'
+            user = new_test_user(self.env, login=login, groups='base.group_portal')
+            user.partner_id.registration_state = 'pending' if index % self.PENDING_EVERY == 0 else 'approved'
+            logins.append(login)
+
+        queries = self.cr.sql_log_count
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(self._login, logins))
+        elapsed = time.monotonic() - started
+        queries = self.cr.sql_log_count - queries
+
+        statuses = [status for _latency, status in results]
+        self.assertEqual(statuses.count(200), self.CANDIDATES // self.PENDING_EVERY)
+        self.assertEqual(statuses.count(303), self.CANDIDATES - self.CANDIDATES // self.PENDING_EVERY)
+        latencies = sorted(latency for latency, _status in results)
+        _logger.info(
+            f"Login load: {self.CANDIDATES} logins in {elapsed:.1f}s ({self.CANDIDATES / elapsed:.1f} logins/s), "
+            f"p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms, "
+            f"{queries / self.CANDIDATES:.0f} queries per login page + login"
+        )
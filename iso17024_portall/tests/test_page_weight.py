@@ -0,0 +1,74 @@
+import logging
+import os
+import re
+
+from odoo.tests import tagged
+from odoo.tools.misc import file_path
+
+from ..models.page_cache import SNIPPET_IMAGE_DIR
+from .common import CertificationHttpCase
+
+_logger = logging.getLogger(__name__)
+
+IMG_SRC_RE = re.compile(r'<img\b[^>]*?\bsrc="([^"]+)"')
+# /web/image/.../128x128 -> ukuran penuh tanpa suffix WxH
+IMAGE_SIZE_SUFFIX_RE = re.compile(r'/\d+x\d+(?=$|\?)')
+
+
+def snippet_names():
+    return sorted(name[:-4] for name in os.listdir(file_path(SNIPPET_IMAGE_DIR)) if name.endswith('.png'))
+
+
+@tagged('post_install', '-at_install')
+class TestSnippetThumbnail(CertificationHttpCase):
+
+    def test_thumbnail_revalidated_by_etag(self):
+        url = f'/iso17024_portall/snippet/{snippet_names()[0]}/400.webp'
+        response = self.url_open(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'image/webp')
+        self.assertEqual(response.headers['Cache-Control'], 'public, no-cache')
+
+        revalidated = self.url_open(url, headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertFalse(revalidated.content)
+
+    def test_unknown_thumbnail_not_found(self):
+        self.assertEqual(self.url_open('/iso17024_portall/snippet/s_tidak_ada/400.webp').status_code, 404)
+        self.assertEqual(self.url_open(f'/iso17024_portall/snippet/{snippet_names()[0]}/123.webp').status_code, 404)
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestPageWeightBenchmark(CertificationHttpCase):
+    """Berat halaman /pengajuan-sertifikasi (HTML + gambar) sebelum/sesudah gambar diperkecil,
+    plus thumbnail panel website builder. Jalankan dengan --test-tags cert_benchmark
+    """
+
+    def _size(self, url):
+        response = self.url_open(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(response.content)
+
+    def test_pengajuan_sertifikasi_weight(self):
+        page = self.url_open('/pengajuan-sertifikasi')
+        self.assertEqual(page.status_code, 200)
+        html_size = len(page.content)
+        images = IMG_SRC_RE.findall(page.text)
+
+        # Sebelum: setiap <img> memuat gambar ukuran penuh; sesudah: varian WxH yang diminta halaman
+        after = html_size + sum(self._size(url) for url in images)
+        before = html_size + sum(self._size(IMAGE_SIZE_SUFFIX_RE.sub('', url)) for url in images)
+
+        names = snippet_names()
+        thumbs_before = sum(self._size(f'/{SNIPPET_IMAGE_DIR}/{name}.png')
+                            for name in names)
+        thumbs_after = sum(self._size(f'/iso17024_portall/snippet/{name}/400.webp') for name in names)
+
+        self.assertLessEqual(after, before)
+        self.assertLess(thumbs_after, thumbs_before)
+        _logger.info(
+            f"Page weight /pengajuan-sertifikasi (HTML {html_size / 1024:.0f} KiB + {len(images)} images): "
+            f"{before / 1024:.0f} KiB full-size -> {after / 1024:.0f} KiB sized; "
+            f"builder thumbnails ({len(names)}): {thumbs_before / 1024:.0f} KiB PNG -> "
+            f"{thumbs_after / 1024:.0f} KiB WebP 400px"
+        )
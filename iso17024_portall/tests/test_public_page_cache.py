@@ -0,0 +1,46 @@
+from odoo.tests import tagged
+
+from .common import CertificationHttpCase
+from ..models.page_cache import PAGE_CACHE_MAX_AGE, strip_tracking_params
+
+
+@tagged('post_install', '-at_install')
+class TestPublicPageCache(CertificationHttpCase):
+
+    def test_cached_page_headers(self):
+        response = self.url_open('/pilih-level')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], f'public, max-age={PAGE_CACHE_MAX_AGE}')
+        self.assertNotIn('Accept-Language', response.headers.get('Vary', ''))
+
+        etag = response.headers['ETag']
+        revalidated = self.url_open('/pilih-level', headers={'If-None-Match': etag})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_tracking_params_served_from_cache(self):
+        self.env.registry.clear_cache('templates')
+        # Request kampanye pertama mengisi cache, parameter tracking tidak ikut tersimpan
+        tracked = self.url_open('/pilih-level?utm_source=kampanye_uji&utm_medium=cpc&gclid=abc123')
+        self.assertEqual(tracked.status_code, 200)
+        self.assertIn('public', tracked.headers['Cache-Control'])
+        self.assertNotIn('kampanye_uji', tracked.text)
+        self.assertNotIn('abc123', tracked.text)
+
+        plain = self.url_open('/pilih-level')
+        self.assertEqual(plain.headers['ETag'], tracked.headers['ETag'])
+
+    def test_other_query_params_bypass_cache(self):
+        response = self.url_open('/pilih-level?level=level2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+        self.assertNotIn('ETag', response.headers)
+
+    def test_strip_tracking_params(self):
+        html = (b'<a href="/id/pilih-level?utm_source=x&amp;utm_medium=y">x</a>'
+                b'<a href="/shop?page=2&amp;fbclid=z#top">y</a>'
+                b'<a href="/shop?page=3">z</a>')
+        self.assertEqual(strip_tracking_params(html), (
+            b'<a href="/id/pilih-level">x</a>'
+            b'<a href="/shop?page=2#top">y</a>'
+            b'<a href="/shop?page=3">z</a>'
+        ))
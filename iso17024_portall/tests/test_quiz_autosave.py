@@ -0,0 +1,148 @@
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from odoo.tests import tagged, new_test_user
+
+from .common import CertificationCase, CertificationHttpCase
+
+_logger = logging.getLogger(__name__)
+
+QUESTION_COUNT = 100
+
+
+@tagged('post_install', '-at_install')
+class TestQuizSaveAnswers(CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.quiz = cls._create_quiz(QUESTION_COUNT)
+        cls.application = cls._create_application()
+
+    def test_save_all_answers_query_count(self):
+        attempt = self._start_attempt(self.quiz, self.application)
+        lines = attempt.answer_line_ids
+        self.assertEqual(len(lines), QUESTION_COUNT)
+        answers = {str(line.id): 'ABCD'[index % 4] for index, line in enumerate(lines)}
+
+        # Satu SELECT validasi + satu UPDATE per pilihan, bukan per soal
+        with self.assertQueryCount(5):
+            changed = attempt._save_answers(answers)
+        self.assertEqual(changed, QUESTION_COUNT)
+        self.assertEqual(lines.mapped('selected'), [answers[str(line.id)] for line in lines])
+
+        # Jawaban sama dikirim ulang (autosave + submit) -> hanya SELECT
+        with self.assertQueryCount(1):
+            self.assertEqual(attempt._save_answers(answers), 0)
+
+    def test_foreign_and_invalid_lines_ignored(self):
+        attempt = self._start_attempt(self.quiz, self.application)
+        other = self._start_attempt(self.quiz, self.application)
+        line, foreign = attempt.answer_line_ids[0], other.answer_line_ids[0]
+
+        changed = attempt._save_answers({
+            str(line.id): 'B',
+            str(foreign.id): 'C',
+            str(attempt.answer_line_ids[1].id): 'E',
+            'bukan_angka': 'A',
+        })
+        self.assertEqual(changed, 1)
+        self.assertEqual(line.selected, 'B')
+        self.assertFalse(foreign.selected)
+        self.assertFalse(attempt.answer_line_ids[1].selected)
+
+
+class AutosaveHttpMixin:
+
+    def _autosave(self, attempt, answers, session=None):
+        """POST JSON-RPC ke endpoint autosave; return result"""
+        response = (session or self.opener).post(
+            f'{self.base_url()}/certification/quiz/autosave/{attempt.id}',
+            json={'jsonrpc': '2.0', 'method': 'call', 'params': {'answers': answers}, 'id': 1},
+            timeout=60,
+        )
+        response.raise_for_status()
+        return response.json()['result']
+
+
+@tagged('post_install', '-at_install')
+class TestQuizAutosaveEndpoint(AutosaveHttpMixin, CertificationHttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.quiz = cls._create_quiz(5)
+        cls.application = cls._create_application()
+
+    def test_autosave_then_permanent_errors(self):
+        attempt = self._start_attempt(self.quiz, self.application)
+        line = attempt.answer_line_ids[0]
+        self.authenticate('cert_candidate', 'cert_candidate')
+
+        self.assertEqual(self._autosave(attempt, {str(line.id): 'C'}), {'saved': 1})
+        line.invalidate_recordset()
+        self.assertEqual(line.selected, 'C')
+
+        # Error yang dihentikan autosave di browser (lihat AUTOSAVE_FATAL_ERRORS di quiz runner)
+        attempt.action_finish()
+        self.assertEqual(self._autosave(attempt, {str(line.id): 'D'}), {'error': 'Quiz already finished'})
+
+        other_user = new_test_user(self.env, login='cert_other', groups='base.group_portal')
+        other_attempt = self._start_attempt(self.quiz, self.application, user_id=other_user.id)
+        self.assertEqual(self._autosave(other_attempt, {}), {'error': 'Access denied'})
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestQuizAutosaveBenchmark(AutosaveHttpMixin, CertificationHttpCase):
+    """300 peserta autosave bersamaan lewat HTTP. Jalankan dengan --test-tags cert_benchmark
+
+    Di mode test semua request berbagi satu cursor (diserialkan), jadi angka ini batas bawah
+    throughput; latency per request tetap menunjukkan biaya satu autosave.
+    """
+
+    CANDIDATES = 300
+    ROUNDS = 3
+    WORKERS = 32
+
+    def test_concurrent_autosave(self):
+        quiz = self._create_quiz(QUESTION_COUNT)
+        candidates = []
+        for index in range(self.CANDIDATES):
+            login = f'cert_load_{index}'
+            user = new_test_user(self.env, login=login, groups='base.group_portal')
+            user.partner_id.registration_state = 'approved'
+            application = self.env['certification.application'].create({
+                'partner_id': user.partner_id.id, 'scheme': 'level1',
+            })
+            attempt = self._start_attempt(quiz, application, user_id=user.id)
+            self.authenticate(login, login)
+            session = requests.Session()
+            session.cookies.set('session_id', self.session.sid)
+            candidates.append((attempt, attempt.answer_line_ids.ids, session))
+
+        def save_round(job):
+            (attempt, line_ids, session), round_index = job
+            # Delta kecil per autosave: 5 soal berikutnya
+            delta = {str(line_id): 'ABCD'[round_index % 4]
+                     for line_id in line_ids[round_index * 5:(round_index + 1) * 5]}
+            started = time.monotonic()
+            result = self._autosave(attempt, delta, session=session)
+            return time.monotonic() - started, result
+
+        jobs = [(candidate, round_index) for round_index in range(self.ROUNDS) for candidate in candidates]
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            results = list(pool.map(save_round, jobs))
+        elapsed = time.monotonic() - started
+
+        latencies = sorted(latency for latency, _result in results)
+        self.assertFalse([result for _latency, result in results if 'error' in result])
+        _logger.info(
+            f"Autosave load: {len(jobs)} saves from {self.CANDIDATES} candidates in {elapsed:.1f}s "
+            f"({len(jobs) / elapsed:.0f} req/s), p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms"
+        )
@@ -0,0 +1,129 @@
+import logging
+import time
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from ..models.quiz import COMPACT_AFTER_DAYS, pack_bits, unpack_bits
+from .common import CertificationCase
+
+_logger = logging.getLogger(__name__)
+
+
+class QuizCompactionMixin:
+
+    @classmethod
+    def _finished_attempt(cls, quiz, application):
+        """Attempt selesai: jawaban bergilir A/B/C/D, soal terakhir tidak dijawab"""
+        attempt = cls._start_attempt(quiz, application)
+        lines = attempt.answer_line_ids.sorted('id')
+        attempt._save_answers({line.id: 'ABCD'[index % 4] for index, line in enumerate(lines[:-1])})
+        attempt.action_finish()
+        return attempt
+
+
+@tagged('post_install', '-at_install')
+class TestQuizCompaction(QuizCompactionMixin, CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.quiz = cls._create_quiz(10)
+        cls.application = cls._create_application()
+
+    def test_pack_bits_round_trip(self):
+        for flags in ([], [True], [False, False], [True, False, True], [index % 3 == 0 for index in range(200)]):
+            self.assertEqual(unpack_bits(pack_bits(flags), len(flags)), flags)
+        self.assertEqual(pack_bits([True, False, True]), '5')
+
+    def test_pack_keeps_every_row_value(self):
+        attempt = self._finished_attempt(self.quiz, self.application)
+        rows = attempt._get_answer_rows()
+        score = (attempt.score_total, attempt.max_score, attempt.is_passed)
+        self.assertEqual(len(rows), 10)
+        self.assertFalse(rows[-1]['selected'])
+
+        attempt._pack_answers()
+
+        self.assertTrue(attempt.answers_packed)
+        self.assertFalse(self.env['cert.answer.line'].search([('attempt_id', '=', attempt.id)]))
+        self.assertEqual(attempt._get_answer_rows(), rows)
+        self.assertEqual((attempt.score_total, attempt.max_score, attempt.is_passed), score)
+        self.assertIn('<table', attempt.packed_answer_html)
+
+    def test_exam_key_survives_compaction(self):
+        attempt = self._finished_attempt(self.quiz, self.application)
+        attempt._pack_answers()
+        score_before = attempt.score_total
+
+        # Kunci soal diubah setelah ujian: snapshot padat tetap kunci saat ujian
+        self.quiz.question_ids.write({'correct_choice': 'B', 'weight': 2})
+        self.assertEqual({row['correct_choice'] for row in attempt._get_answer_rows()}, {'A'})
+        self.assertEqual({row['weight'] for row in attempt._get_answer_rows()}, {1})
+        self.assertEqual(attempt.score_total, score_before)
+
+        # Regrade eksplisit memakai kunci baru dan memperbarui snapshot
+        attempt.action_regrade()
+        rows = attempt._get_answer_rows()
+        self.assertEqual({row['correct_choice'] for row in rows}, {'B'})
+        self.assertEqual(attempt.score_total, 2 * sum(row['selected'] == 'B' for row in rows))
+        self.assertEqual(attempt.max_score, 20)
+
+    def test_cron_compacts_only_old_attempts(self):
+        old = self._finished_attempt(self.quiz, self.application)
+        recent = self._finished_attempt(self.quiz, self.application)
+        old.finished_at = fields.Datetime.now() - timedelta(days=COMPACT_AFTER_DAYS + 1)
+
+        self.env['cert.quiz.attempt']._cron_compact_answers()
+
+        self.assertTrue(old.answers_packed)
+        self.assertFalse(recent.answers_packed)
+        self.assertEqual(len(recent.answer_line_ids), 10)
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestQuizCompactionBenchmark(QuizCompactionMixin, CertificationCase):
+    """Ukuran simpan & waktu baca jawaban sebelum/sesudah pemadatan. --test-tags cert_benchmark"""
+
+    ATTEMPTS = 50
+    QUESTIONS = 100
+
+    def _read_all(self, attempts):
+        self.env.invalidate_all()
+        started = time.monotonic()
+        for attempt in attempts:
+            attempt._get_answer_rows()
+        return time.monotonic() - started
+
+    def test_storage_and_read_latency(self):
+        quiz = self._create_quiz(self.QUESTIONS)
+        application = self._create_application()
+        attempts = self.env['cert.quiz.attempt'].browse([
+            self._finished_attempt(quiz, application).id for _index in range(self.ATTEMPTS)
+        ])
+        self.env.flush_all()
+
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(pg_column_size(l.*)), 0) FROM cert_answer_line l WHERE attempt_id = ANY(%s)
+        """, (attempts.ids,))
+        bytes_lines = self.env.cr.fetchone()[0]
+        read_lines = self._read_all(attempts)
+
+        attempts._pack_answers()
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT SUM(COALESCE(pg_column_size(packed_question_ids), 0) + COALESCE(pg_column_size(packed_choices), 0)
+                       + COALESCE(pg_column_size(packed_key), 0) + COALESCE(pg_column_size(packed_weights), 0)
+                       + COALESCE(pg_column_size(packed_correct), 0))
+              FROM cert_quiz_attempt WHERE id = ANY(%s)
+        """, (attempts.ids,))
+        bytes_packed = self.env.cr.fetchone()[0]
+        read_packed = self._read_all(attempts)
+
+        self.assertLess(bytes_packed, bytes_lines)
+        _logger.info(
+            f"Answer compaction ({self.ATTEMPTS} attempts x {self.QUESTIONS} questions): "
+            f"storage {bytes_lines / 1024:.0f} KiB -> {bytes_packed / 1024:.0f} KiB, "
+            f"read all {read_lines * 1000:.0f} ms -> {read_packed * 1000:.0f} ms"
+        )
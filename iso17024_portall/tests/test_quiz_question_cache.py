@@ -0,0 +1,120 @@
+import logging
+import statistics
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from odoo.tests import tagged, new_test_user
+
+from ..models.page_cache import (
+    QUESTION_LINE_PLACEHOLDER, QUESTION_NUMBER_PLACEHOLDER, QUESTION_TOTAL_PLACEHOLDER,
+)
+from .common import CertificationCase
+
+_logger = logging.getLogger(__name__)
+
+
+class QuestionCacheMixin:
+
+    @contextmanager
+    def _count_card_renders(self):
+        """Catat berapa kali template kartu soal benar-benar dirender (cache miss)"""
+        renders = []
+        QWeb = type(self.env['ir.qweb'])
+        render = QWeb._render
+
+        def counting_render(qweb, template, values=None, **options):
+            if template == 'iso17024_portall.quiz_question_card':
+                renders.append(values['question'].id)
+            return render(qweb, template, values, **options)
+
+        with patch.object(QWeb, '_render', counting_render):
+            yield renders
+
+
+@tagged('post_install', '-at_install')
+class TestQuizQuestionCache(QuestionCacheMixin, CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.quiz = cls._create_quiz(5)
+        cls.application = cls._create_application()
+        cls.PageCache = cls.env['cert.page.cache']
+
+    def setUp(self):
+        super().setUp()
+        self.env.registry.clear_cache('templates')
+
+    def test_card_has_no_candidate_data(self):
+        attempt = self._start_attempt(self.quiz, self.application)
+        attempt._save_answers({attempt.answer_line_ids[0].id: 'C'})
+        self.PageCache._render_attempt_questions(attempt)
+
+        question = self.quiz.question_ids[0]
+        self.env.flush_all()
+        card = self.PageCache._get_question_fragment(question.id, question.write_date)
+        for placeholder in (QUESTION_LINE_PLACEHOLDER, QUESTION_NUMBER_PLACEHOLDER, QUESTION_TOTAL_PLACEHOLDER):
+            self.assertIn(placeholder, card)
+        self.assertNotIn('checked', card)
+        self.assertNotIn(self.candidate.name, card)
+        self.assertNotIn(self.candidate_user.login, card)
+        for line in attempt.answer_line_ids:
+            self.assertNotIn(f'question_{line.id}"', card)
+
+    def test_cards_reused_across_attempts(self):
+        other_user = new_test_user(self.env, login='cert_other_card', groups='base.group_portal')
+        first = self._start_attempt(self.quiz, self.application)
+        second = self._start_attempt(self.quiz, self.application, user_id=other_user.id)
+        second._save_answers({second.answer_line_ids[0].id: 'B'})
+
+        with self._count_card_renders() as renders:
+            html_first, saved_first = self.PageCache._render_attempt_questions(first)
+        self.assertEqual(sorted(renders), sorted(self.quiz.question_ids.ids))
+
+        with self._count_card_renders() as renders:
+            html_second, saved_second = self.PageCache._render_attempt_questions(second)
+        self.assertFalse(renders, "Kartu soal harus diambil dari cache untuk attempt kedua")
+
+        # Hanya id baris & nomor urut yang berbeda; jawaban tersimpan dikirim terpisah
+        for line in second.answer_line_ids:
+            self.assertIn(f'name="question_{line.id}"', html_second)
+            self.assertNotIn(f'name="question_{line.id}"', html_first)
+        self.assertNotIn(QUESTION_LINE_PLACEHOLDER, html_second)
+        self.assertEqual(saved_first, {})
+        self.assertEqual(saved_second, {second.answer_line_ids[0].id: 'B'})
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestQuizQuestionCacheBenchmark(QuestionCacheMixin, CertificationCase):
+    """200 peserta memulai ujian 100 soal (start + render kartu). --test-tags cert_benchmark"""
+
+    CANDIDATES = 200
+    QUESTIONS = 100
+
+    def test_start_200_candidates(self):
+        self.env.registry.clear_cache('templates')
+        quiz = self._create_quiz(self.QUESTIONS)
+        candidates = []
+        for index in range(self.CANDIDATES):
+            user = new_test_user(self.env, login=f'cert_start_{index}', groups='base.group_portal')
+            application = self.env['certification.application'].create({
+                'partner_id': user.partner_id.id, 'scheme': 'level1',
+            })
+            candidates.append((user, application))
+
+        latencies = []
+        with self._count_card_renders() as renders:
+            for user, application in candidates:
+                started = time.monotonic()
+                attempt = self._start_attempt(quiz, application, user_id=user.id)
+                self.env['cert.page.cache']._render_attempt_questions(attempt)
+                latencies.append(time.monotonic() - started)
+
+        self.assertEqual(len(renders), self.QUESTIONS)
+        first, rest = latencies[0], sorted(latencies[1:])
+        _logger.info(
+            f"Quiz start + render ({self.CANDIDATES} candidates x {self.QUESTIONS} questions): "
+            f"first (cold cache) {first * 1000:.0f} ms, warm p50 {statistics.median(rest) * 1000:.0f} ms, "
+            f"p95 {rest[int(len(rest) * 0.95)] * 1000:.0f} ms, {len(renders)} card renders in total"
+        )
@@ -0,0 +1,96 @@
+import logging
+import time
+
+from odoo.exceptions import AccessError
+from odoo.tests import tagged, new_test_user
+
+from .common import CertificationCase
+
+_logger = logging.getLogger(__name__)
+
+
+class QuizRegradeMixin:
+
+    @classmethod
+    def _finished_attempt(cls, quiz, application, choice='A'):
+        attempt = cls._start_attempt(quiz, application)
+        attempt._save_answers({line.id: choice for line in attempt.answer_line_ids})
+        attempt.action_finish()
+        return attempt
+
+
+@tagged('post_install', '-at_install')
+class TestQuizRegrade(QuizRegradeMixin, CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.quiz = cls._create_quiz(10)
+        cls.application = cls._create_application()
+
+    def test_question_edit_needs_explicit_regrade(self):
+        attempt = self._finished_attempt(self.quiz, self.application)
+        self.assertEqual((attempt.score_total, attempt.max_score), (10, 10))
+
+        # Bobot soal diubah setelah ujian: nilai & snapshot baris jawaban tetap
+        self.quiz.question_ids.write({'weight': 3})
+        self.env.invalidate_all()
+        self.assertEqual((attempt.score_total, attempt.max_score), (10, 10))
+        self.assertEqual(set(attempt.answer_line_ids.mapped('weight')), {1})
+
+        attempt.action_regrade()
+        self.assertEqual((attempt.score_total, attempt.max_score), (30, 30))
+        self.assertEqual(set(attempt.answer_line_ids.mapped('weight')), {3})
+
+    def test_regrade_updates_exam_result(self):
+        attempt = self._finished_attempt(self.quiz, self.application)
+        self.assertTrue(attempt.is_passed)
+
+        self.quiz.question_ids.write({'correct_choice': 'B'})
+        action = attempt.action_regrade()
+
+        self.assertFalse(attempt.is_passed)
+        self.assertEqual(attempt.score_total, 0)
+        self.assertEqual(self.application.exam_result, 'failed')
+        self.assertIn('1 status lulus berubah', action['params']['message'])
+
+    def test_regrade_requires_admin(self):
+        attempt = self._finished_attempt(self.quiz, self.application)
+        staff = new_test_user(self.env, login='cert_staff_regrade', groups='base.group_user')
+        with self.assertRaises(AccessError):
+            attempt.with_user(staff).action_regrade()
+
+        action = self.env.ref('iso17024_portall.action_server_regrade_quiz_attempt')
+        self.assertEqual(action.groups_id, self.env.ref('base.group_system'))
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestQuizRegradeBenchmark(QuizRegradeMixin, CertificationCase):
+    """Regrade massal setelah bobot soal diubah. Jalankan dengan --test-tags cert_benchmark"""
+
+    ATTEMPTS = 1000
+    QUESTIONS = 50
+
+    def test_regrade_batches(self):
+        quiz = self._create_quiz(self.QUESTIONS)
+        application = self._create_application()
+        attempts = self.env['cert.quiz.attempt'].browse([
+            self._finished_attempt(quiz, application, choice='ABCD'[index % 4]).id
+            for index in range(self.ATTEMPTS)
+        ])
+        quiz.question_ids.write({'weight': 2})
+        self.env.flush_all()
+        self.env.invalidate_all()
+
+        queries = self.cr.sql_log_count
+        started = time.monotonic()
+        attempts.action_regrade()
+        self.env.flush_all()
+        elapsed = time.monotonic() - started
+        queries = self.cr.sql_log_count - queries
+
+        self.assertEqual(set(attempts.mapped('max_score')), {2 * self.QUESTIONS})
+        _logger.info(
+            f"Regrade ({self.ATTEMPTS} attempts x {self.QUESTIONS} questions): {elapsed:.1f}s "
+            f"({self.ATTEMPTS / elapsed:.0f} attempts/s), {queries} queries"
+        )
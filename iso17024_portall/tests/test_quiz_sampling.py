@@ -0,0 +1,63 @@
+from collections import Counter
+
+from odoo.tests import tagged
+
+from .common import CertificationCase, QUESTION_TOPICS, QUESTION_DIFFICULTIES
+
+
+@tagged('post_install', '-at_install')
+class TestQuizSampling(CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # 90 soal: topik & kesulitan bergilir bersama -> 3 kombinasi, masing-masing 30 soal
+        cls.quiz = cls._create_quiz(90, stratum_ids=[
+            (0, 0, {'topic': QUESTION_TOPICS[0], 'difficulty': QUESTION_DIFFICULTIES[0], 'count': 4}),
+            (0, 0, {'topic': QUESTION_TOPICS[1], 'difficulty': QUESTION_DIFFICULTIES[1], 'count': 3}),
+            # Melebihi isi bank soal -> dibatasi 30
+            (0, 0, {'topic': QUESTION_TOPICS[2], 'difficulty': QUESTION_DIFFICULTIES[2], 'count': 40}),
+        ])
+        cls.application = cls._create_application()
+
+    def _strata(self, question_ids):
+        questions = self.env['cert.question'].browse(question_ids)
+        return Counter((question.topic, question.difficulty) for question in questions)
+
+    def test_same_seed_same_draw(self):
+        first = self._start_attempt(self.quiz, self.application, question_seed=1234)
+        second = self._start_attempt(self.quiz, self.application, question_seed=1234)
+        other = self._start_attempt(self.quiz, self.application, question_seed=4321)
+
+        self.assertEqual(first.answer_line_ids.mapped('question_id'), second.answer_line_ids.mapped('question_id'))
+        self.assertEqual(self.quiz._draw_question_ids(1234), first.answer_line_ids.question_id.ids)
+        self.assertNotEqual(self.quiz._draw_question_ids(1234), self.quiz._draw_question_ids(4321))
+        self.assertEqual(len(other.answer_line_ids), 37)
+
+    def test_stratum_counts_respected(self):
+        self.assertEqual(self.quiz.stratum_ids.mapped('available_count'), [4, 3, 30])
+        self.assertEqual(self.quiz.exam_question_count, 37)
+        for seed in range(1, 21):
+            question_ids = self.quiz._draw_question_ids(seed)
+            self.assertEqual(len(question_ids), len(set(question_ids)))
+            self.assertEqual(self._strata(question_ids), Counter({
+                (QUESTION_TOPICS[0], QUESTION_DIFFICULTIES[0]): 4,
+                (QUESTION_TOPICS[1], QUESTION_DIFFICULTIES[1]): 3,
+                (QUESTION_TOPICS[2], QUESTION_DIFFICULTIES[2]): 30,
+            }))
+
+    def test_question_change_refreshes_pool_only(self):
+        self.quiz._draw_question_ids(1)
+        self.env['cert.scheme']._get_scheme_data('level1')
+
+        # Soal pindah ke strata pertama langsung ikut diundi (tanpa cache basi)...
+        self.quiz.question_ids.filtered(lambda q: q.topic == QUESTION_TOPICS[1])[:1].write({
+            'topic': QUESTION_TOPICS[0], 'difficulty': QUESTION_DIFFICULTIES[0],
+        })
+        self.assertEqual(self.quiz.stratum_ids.mapped('available_count'), [4, 3, 30])
+        pools = self.quiz._get_stratum_question_ids(self.quiz.id, self.quiz.question_bank_version)
+        self.assertEqual(len(pools[(QUESTION_TOPICS[0], QUESTION_DIFFICULTIES[0])]), 31)
+
+        # ...tanpa mengosongkan cache lain (data skema tetap dari cache)
+        with self.assertQueryCount(0):
+            self.env['cert.scheme']._get_scheme_data('level1')
@@ -0,0 +1,78 @@
+import logging
+import statistics
+import time
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from .common import CertificationCase
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('post_install', '-at_install')
+class TestQuizStart(CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.application = cls._create_application()
+
+    def _start_query_count(self, quiz):
+        """Jumlah query satu start attempt (cache id per strata sudah hangat)"""
+        quiz._draw_question_ids(1)
+        self.env.flush_all()
+        count = self.cr.sql_log_count
+        self._start_attempt(quiz, self.application)
+        self.env.flush_all()
+        return self.cr.sql_log_count - count
+
+    def test_one_answer_line_create_per_attempt(self):
+        quiz = self._create_quiz(50)
+        Line = type(self.env['cert.answer.line'])
+        create = Line.create
+        calls = []
+
+        def counting_create(records, vals_list):
+            calls.append(len(vals_list))
+            return create(records, vals_list)
+
+        with patch.object(Line, 'create', counting_create):
+            attempts = self._start_attempt(quiz, self.application) | self._start_attempt(quiz, self.application)
+
+        self.assertEqual(calls, [50, 50])
+        self.assertEqual([len(attempt.answer_line_ids) for attempt in attempts], [50, 50])
+
+    def test_start_queries_independent_of_question_count(self):
+        queries = self._start_query_count(self._create_quiz(50))
+        quiz = self._create_quiz(200)
+        quiz._draw_question_ids(1)
+        with self.assertQueryCount(queries):
+            attempt = self._start_attempt(quiz, self.application)
+        self.assertEqual(len(attempt.answer_line_ids), 200)
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestQuizStartBenchmark(CertificationCase):
+    """Latency start ujian (create attempt + baris jawaban) per ukuran kuis. --test-tags cert_benchmark"""
+
+    ATTEMPTS = 50
+
+    def test_start_latency(self):
+        application = self._create_application()
+        results = []
+        for question_count in (50, 100, 200):
+            quiz = self._create_quiz(question_count)
+            quiz._draw_question_ids(1)
+            latencies = []
+            for _index in range(self.ATTEMPTS):
+                started = time.monotonic()
+                self._start_attempt(quiz, application)
+                self.env.flush_all()
+                latencies.append(time.monotonic() - started)
+            latencies.sort()
+            results.append(
+                f"{question_count} questions p50 {statistics.median(latencies) * 1000:.1f} ms "
+                f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms"
+            )
+        _logger.info(f"Quiz start latency ({self.ATTEMPTS} attempts each): " + ", ".join(results))
@@ -0,0 +1,76 @@
+from odoo.tests import tagged
+
+from .common import CertificationCase
+
+
+@tagged('post_install', '-at_install')
+class TestSchemeCache(CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Scheme = cls.env['cert.scheme']
+        cls.Product = cls.env['product.product']
+        cls.scheme = cls.Scheme.create({
+            'code': 'test_cache',
+            'name': 'Skema Uji Cache',
+            'base_price': 1000,
+            'admin_fee': 250,
+        })
+
+    def test_no_queries_after_warmup(self):
+        self.Scheme._get_scheme_data('test_cache')
+        with self.assertQueryCount(0):
+            for _ in range(10):
+                data = self.Scheme._get_scheme_data('test_cache')
+        self.assertEqual(data['total_price'], 1250)
+
+    def test_scheme_write_invalidates(self):
+        self.Scheme._get_scheme_data('test_cache')
+        self.scheme.admin_fee = 500
+        self.assertEqual(self.Scheme._get_scheme_data('test_cache')['total_price'], 1500)
+
+    def test_fallback_product_resolved_once(self):
+        self.assertFalse(self.Scheme._get_scheme_product('test_cache'))
+        self.assertFalse(self.Scheme._get_scheme_data('test_cache')['product_id'])
+
+        # Produk dibuat setelah cache terisi tetap ditemukan, lalu disimpan ke skema
+        first = self.Product.create({'name': 'Skema Uji Cache'})
+        self.assertEqual(self.Scheme._get_scheme_product('test_cache'), first)
+        self.assertEqual(self.scheme.product_id, first)
+
+        # Produk yang diarsipkan tidak dipakai lagi
+        first.active = False
+        second = self.Product.create({'name': 'Skema Uji Cache (baru)'})
+        self.assertEqual(self.Scheme._get_scheme_product('test_cache'), second)
+        self.assertEqual(self.scheme.product_id, second)
+
+    def test_invoice_product_lookup_without_queries(self):
+        level1 = self.env.ref('iso17024_portall.scheme_level1')
+        level1.product_id = False
+        product = self.Product.create({'name': level1.name})
+        application = self._create_application()
+        self.assertEqual(application._get_product_by_scheme(), product)
+        self.env.flush_all()
+
+        # Jalur invoice: tidak ada query skema / pencarian produk setelah pemanggilan pertama
+        with self.assertQueryCount(0):
+            for _ in range(10):
+                self.assertEqual(application._get_product_by_scheme().id, product.id)
+
+    def test_deleted_product_clears_cache(self):
+        product = self.Product.create({'name': 'Produk Sementara'})
+        self.scheme.product_id = product
+        self.assertEqual(self.Scheme._get_scheme_product('test_cache'), product)
+        product.unlink()
+        self.assertFalse(self.Scheme._get_scheme_data('test_cache')['product_id'])
+
+    def test_explicit_product(self):
+        fallback = self.Product.create({'name': 'Skema Uji Cache'})
+        explicit = self.Product.create({'name': 'Produk Invoice Khusus'})
+        self.scheme.product_id = explicit
+        self.assertEqual(self.Scheme._get_scheme_product('test_cache'), explicit)
+
+        # Produk pilihan diarsipkan -> kembali ke produk dengan nama skema
+        explicit.active = False
+        self.assertEqual(self.Scheme._get_scheme_product('test_cache'), fallback)
@@ -0,0 +1,58 @@
+import hashlib
+import hmac
+import re
+
+from odoo import http
+from odoo.tests import tagged
+
+from .common import CertificationHttpCase
+
+STATUS_URL_RE = re.compile(r'partner_id=(\d+)&(?:amp;)?token=([0-9a-f]{64})')
+
+
+@tagged('post_install', '-at_install')
+class TestStatusToken(CertificationHttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env['ir.config_parameter'].sudo().set_param('auth_signup.invitation_scope', 'b2c')
+        cls.secret = cls.env['ir.config_parameter'].sudo().get_param('database.secret')
+
+    def _legacy_email_token(self, email):
+        return hmac.new(self.secret.encode(), f'cert-status:{email}'.encode(), hashlib.sha256).hexdigest()
+
+    def test_pending_page_does_not_mint_token_from_email(self):
+        response = self.url_open('/certification/pending?email=cert_candidate@example.com')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('/certification/status/json', response.text)
+        self.assertNotIn('Kandidat Uji', response.text)
+
+    def test_status_json_rejects_email_token(self):
+        email = self.candidate.email
+        response = self.url_open(
+            f'/certification/status/json?email={email}&token={self._legacy_email_token(email)}')
+        self.assertEqual(response.status_code, 404)
+
+    def test_signup_session_can_poll_own_status(self):
+        response = self.url_open('/certification/signup/submit', data={
+            'email': 'pendaftar_baru@example.com',
+            'name': 'Pendaftar Baru',
+            'password': 'Rahasia-123',
+            'confirm_password': 'Rahasia-123',
+            'cert_type': 'new',
+            'cert_level': 'level1',
+            'csrf_token': http.Request.csrf_token(self),
+        })
+        self.assertEqual(response.status_code, 200)
+        match = STATUS_URL_RE.search(response.text)
+        self.assertTrue(match, "Halaman pending harus memuat URL polling untuk pendaftar sendiri")
+        partner_id, token = match.groups()
+
+        status = self.url_open(f'/certification/status/json?partner_id={partner_id}&token={token}')
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.json()['registration_state'], 'pending')
+
+        # Token tidak bisa dipakai untuk partner lain
+        other = self.url_open(f'/certification/status/json?partner_id={self.candidate.id}&token={token}')
+        self.assertEqual(other.status_code, 404)
@@ -0,0 +1,91 @@
+import hashlib
+import io
+
+from odoo.tests import tagged
+
+from .common import CertificationCase, make_pdf
+
+
+@tagged('post_install', '-at_install')
+class TestChunkedUpload(CertificationCase):
+
+    def _upload(self, data, chunk_size, filename='ijazah.pdf', field_name='ijazah_file'):
+        Upload = self.env['certification.upload']
+        upload = Upload._start_or_resume(self.candidate, field_name, filename, len(data))
+        for offset in range(0, len(data), chunk_size):
+            upload._append_chunk(offset, io.BytesIO(data[offset:offset + chunk_size]))
+        return upload
+
+    def test_finalize_assembles_file_in_filestore(self):
+        data = make_pdf(pages=3) + b'%' + b'x' * 5000
+        upload = self._upload(data, chunk_size=1000)
+        attachment = upload._finalize()
+
+        self.assertEqual(upload.state, 'done')
+        self.assertEqual(attachment.checksum, hashlib.sha1(data).hexdigest())
+        self.assertEqual(attachment.file_size, len(data))
+        self.assertEqual(attachment.mimetype, 'application/pdf')
+        self.assertTrue(attachment.store_fname)
+        self.assertFalse(attachment.db_datas)
+
+        # Dibaca ulang dari filestore (bukan dari cache ORM)
+        attachment.invalidate_recordset()
+        self.assertEqual(attachment.raw, data)
+        with open(attachment._full_path(attachment.store_fname), 'rb') as fp:
+            self.assertEqual(fp.read(), data)
+
+    def test_attach_to_application(self):
+        data = make_pdf(pages=2)
+        upload = self._upload(data, chunk_size=100)
+        upload._finalize()
+        application = self._create_application()
+
+        application._attach_uploads(upload)
+
+        self.assertEqual(upload.state, 'committed')
+        self.assertEqual(application.ijazah_filename, 'ijazah.pdf')
+        doc = application._document_meta()['ijazah_file']
+        self.assertEqual(doc.file_size, len(data))
+        self.assertEqual(doc.checksum, hashlib.sha1(data).hexdigest())
+        application.invalidate_recordset()
+        stream = application._get_document_stream('ijazah_file')
+        with open(stream.path, 'rb') as fp:
+            self.assertEqual(fp.read(), data)
+
+    def test_resume_and_offset_check(self):
+        data = b'%PDF-1.4\n' + b'y' * 3000
+        Upload = self.env['certification.upload']
+        upload = Upload._start_or_resume(self.candidate, 'cv_file', 'cv.pdf', len(data))
+        upload._append_chunk(0, io.BytesIO(data[:1000]))
+
+        resumed = Upload._start_or_resume(self.candidate, 'cv_file', 'cv.pdf', len(data))
+        self.assertEqual(resumed, upload)
+        self.assertEqual(resumed.received_size, 1000)
+        with self.assertRaises(ValueError):
+            resumed._append_chunk(500, io.BytesIO(data[500:1000]))
+        with self.assertRaises(ValueError):
+            resumed._finalize()
+
+        resumed._append_chunk(1000, io.BytesIO(data[1000:]))
+        self.assertEqual(resumed._finalize().raw, data)
+
+    def test_finalize_identical_content_twice(self):
+        data = make_pdf(pages=2)
+        first = self._upload(data, chunk_size=500)._finalize()
+        # Re-upload file yang sama (mis. sertifikasi ulang): file filestore dipakai bersama
+        second = self._upload(data, chunk_size=500, filename='ijazah-ulang.pdf')._finalize()
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(second.store_fname, first.store_fname)
+        self.assertEqual(second.checksum, first.checksum)
+        second.invalidate_recordset()
+        self.assertEqual(second.raw, data)
+
+    def test_reject_unsupported_content(self):
+        data = b'GIF89a' + b'\x00' * 200
+        upload = self._upload(data, chunk_size=100, filename='foto.png', field_name='pas_foto')
+        with self.assertRaises(ValueError):
+            upload._finalize()
+        self.assertEqual(upload.state, 'uploading')
+        self.assertEqual(upload.received_size, 0)
+        self.assertFalse(upload.attachment_id)
@@ -0,0 +1,129 @@
+import logging
+import time
+
+from odoo.exceptions import AccessError
+from odoo.tests import tagged, new_test_user
+
+from .common import CertificationCase
+
+_logger = logging.getLogger(__name__)
+
+
+class XenditEventMixin:
+
+    @classmethod
+    def _create_payment_application(cls, invoice_id):
+        return cls._create_application(
+            state='payment',
+            xendit_invoice_id=invoice_id,
+            xendit_status='pending',
+        )
+
+    @staticmethod
+    def _payload(application, status='PAID', **extra):
+        return dict({
+            'id': application.xendit_invoice_id,
+            'external_id': f'CERT-{application.id}',
+            'status': status,
+            'payment_method': 'BANK_TRANSFER',
+        }, **extra)
+
+
+@tagged('post_install', '-at_install')
+class TestXenditEvent(XenditEventMixin, CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Event = cls.env['certification.xendit.event']
+        cls.application = cls._create_payment_application('inv-uji-1')
+
+    def test_ingest_and_process_exactly_once(self):
+        payload = self._payload(self.application)
+        event = self.Event._ingest(payload)
+        self.assertTrue(event)
+        self.assertEqual(event.application_id, self.application)
+        # Pengiriman ulang webhook yang sama tidak membuat event baru
+        self.assertFalse(self.Event._ingest(payload))
+
+        self.Event._cron_process_events()
+        self.assertEqual(event.state, 'done')
+        self.assertEqual(self.application.payment_status, 'paid')
+        self.assertEqual(self.application.state, 'verified')
+        messages = len(self.application.message_ids)
+
+        # Replay tidak mengulang efek samping (transisi idempoten)
+        event.action_replay()
+        self.Event._cron_process_events()
+        self.assertEqual(event.state, 'ignored')
+        self.assertEqual(len(self.application.message_ids), messages)
+
+    def test_dedup_key_without_invoice_id(self):
+        first = self.Event._ingest(self._payload(self.application, id=None))
+        self.assertEqual(first.dedup_key, f'ext:CERT-{self.application.id}:PAID')
+
+        # Event lain tanpa id tidak saling menelan
+        other = self._create_payment_application('inv-uji-2')
+        second = self.Event._ingest(self._payload(other, id=None))
+        self.assertTrue(second)
+        self.assertTrue(self.Event._ingest(self._payload(other, id=None, status='EXPIRED')))
+        self.assertFalse(self.Event._ingest(self._payload(other, id=None)))
+
+    def test_reject_unidentifiable_payload(self):
+        with self.assertRaises(ValueError):
+            self.Event._ingest({'status': 'PAID'})
+        with self.assertRaises(ValueError):
+            self.Event._ingest({'id': 'inv-tanpa-status'})
+
+    def test_event_log_read_only_for_users(self):
+        event = self.Event._ingest(self._payload(self.application))
+        user = new_test_user(self.env, login='cert_staff', groups='base.group_user')
+        event_as_user = event.with_user(user)
+        event_as_user.read(['state'])
+        with self.assertRaises(AccessError):
+            event_as_user.write({'state': 'ignored'})
+        with self.assertRaises(AccessError):
+            event_as_user.action_replay()
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestXenditEventBenchmark(XenditEventMixin, CertificationCase):
+    """Replay 10k event webhook (termasuk duplikat). Jalankan dengan --test-tags cert_benchmark"""
+
+    EVENTS = 10000
+    APPLICATIONS = 500
+
+    def test_replay_10k_events(self):
+        Event = self.env['certification.xendit.event']
+        applications = [self._create_payment_application(f'inv-bench-{index}')
+                        for index in range(self.APPLICATIONS)]
+        # Per aplikasi berulang: PAID, EXPIRED, lalu PAID yang sama dikirim ulang (duplikat)
+        statuses = ['PAID', 'EXPIRED', 'PAID']
+        payloads = []
+        for index in range(self.EVENTS):
+            application = applications[index % self.APPLICATIONS]
+            round_index = index // self.APPLICATIONS
+            payloads.append(self._payload(
+                application,
+                status=statuses[round_index % len(statuses)],
+                id=f'{application.xendit_invoice_id}-{round_index // len(statuses)}',
+            ))
+
+        started = time.monotonic()
+        created = sum(bool(Event._ingest(payload)) for payload in payloads)
+        ingest_elapsed = time.monotonic() - started
+
+        started = time.monotonic()
+        while Event.search_count([('state', '=', 'pending')]):
+            Event._cron_process_events(limit=1000)
+        process_elapsed = time.monotonic() - started
+
+        self.assertLess(created, self.EVENTS)
+        self.assertFalse(Event.search_count([('state', 'in', ('pending', 'failed'))]))
+        self.assertEqual(
+            sum(app.payment_status == 'paid' for app in applications), self.APPLICATIONS)
+        _logger.info(
+            f"Xendit event replay: {self.EVENTS} payloads -> {created} events; "
+            f"ingest {ingest_elapsed:.1f}s ({self.EVENTS / ingest_elapsed:.0f}/s), "
+            f"process {process_elapsed:.1f}s ({created / process_elapsed:.0f}/s)"
+        )
@@ -0,0 +1,198 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import urlsplit, parse_qs
+
+from odoo.tests import tagged
+
+from .common import CertificationCase
+
+
+class FakeXenditHandler(BaseHTTPRequestHandler):
+    """Tiruan minimal API invoice Xendit (POST /v2/invoices, GET ?external_id=, GET /v2/invoices/<id>)"""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        if url.path.startswith('/v2/invoices/'):
+            return self._get_invoice(url.path.rsplit('/', 1)[1])
+        external_id = parse_qs(url.query).get('external_id', [None])[0]
+        server.requests.append(('GET', url.path, dict(self.headers), None))
+        found = [inv for inv in server.invoices.values() if inv['external_id'] == external_id]
+        if not found:
+            return self._reply(404, {'error_code': 'INVOICE_NOT_FOUND_ERROR'})
+        return self._reply(200, found)
+
+    def _get_invoice(self, invoice_id):
+        server = self.server
+        server.requests.append(('GET', self.path, dict(self.headers), None))
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            # Latency jaringan/API tiruan
+            time.sleep(server.get_delay)
+        finally:
+            with server.lock:
+                server.active -= 1
+        if invoice_id in server.fail_ids:
+            return self._reply(500, {'error_code': 'SERVER_ERROR'})
+        found = [inv for inv in server.invoices.values() if inv['id'] == invoice_id]
+        if not found:
+            return self._reply(404, {'error_code': 'INVOICE_NOT_FOUND_ERROR'})
+        return self._reply(200, found[0])
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server.requests.append(('POST', self.path, dict(self.headers), body))
+
+        if server.fail_next:
+            return self._reply(server.fail_next.pop(0), {'error_code': 'SERVER_ERROR'})
+
+        key = self.headers.get('X-IDEMPOTENCY-KEY')
+        invoice = server.invoices.get(key) if key else None
+        if invoice is None:
+            invoice_id = uuid.uuid4().hex
+            invoice = {
+                'id': invoice_id,
+                'external_id': body['external_id'],
+                'status': 'PENDING',
+                'amount': body['amount'],
+                'invoice_url': f'https://checkout.xendit.test/{invoice_id}',
+            }
+            server.invoices[key or invoice_id] = invoice
+
+        if server.delay_next:
+            # Invoice sudah dibuat, tapi respons terlambat -> klien timeout
+            time.sleep(server.delay_next.pop(0))
+        return self._reply(200, invoice)
+
+
+class FakeXenditServerMixin:
+    """Server Xendit tiruan di 127.0.0.1 + parameter sistem yang mengarah ke sana"""
+
+    @classmethod
+    def _start_fake_xendit(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeXenditHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+        ICP = cls.env['ir.config_parameter'].sudo()
+        ICP.set_param('xendit.api_url', f'http://127.0.0.1:{cls.server.server_port}')
+        ICP.set_param('xendit.api_key', 'xnd_development_test')
+
+    def _reset_fake_xendit(self):
+        self.server.requests = []
+        self.server.invoices = {}
+        self.server.fail_next = []
+        self.server.delay_next = []
+        self.server.fail_ids = set()
+        self.server.get_delay = 0
+        self.server.active = self.server.max_active = 0
+
+
+@tagged('post_install', '-at_install')
+class TestXenditJob(FakeXenditServerMixin, CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._start_fake_xendit()
+        cls.Job = cls.env['certification.xendit.job']
+
+    def setUp(self):
+        super().setUp()
+        self._reset_fake_xendit()
+
+    def _due(self, jobs):
+        jobs.next_attempt_at = '2000-01-01 00:00:00'
+
+    def _posts(self):
+        return [r for r in self.server.requests if r[0] == 'POST']
+
+    def test_invoice_created(self):
+        app = self._create_application()
+        job = self.Job._enqueue(app)
+        self.Job._cron_process_jobs()
+
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(app.xendit_status, 'pending')
+        self.assertTrue(app.xendit_payment_url.startswith('https://checkout.xendit.test/'))
+        [(_, path, headers, body)] = self._posts()
+        self.assertEqual(path, '/v2/invoices')
+        self.assertEqual(body['external_id'], f'CERT-{app.id}')
+        self.assertEqual(headers['X-IDEMPOTENCY-KEY'], job._idempotency_key())
+
+    def test_retry_after_server_error(self):
+        app = self._create_application()
+        job = self.Job._enqueue(app)
+        self.server.fail_next = [503]
+        self.Job._cron_process_jobs()
+
+        self.assertEqual(job.state, 'queued')
+        self.assertEqual(job.attempts, 1)
+        self.assertFalse(app.xendit_payment_url)
+
+        self._due(job)
+        self.Job._cron_process_jobs()
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(len(self.server.invoices), 1)
+        keys = {headers['X-IDEMPOTENCY-KEY'] for _, _, headers, _ in self._posts()}
+        self.assertEqual(len(keys), 1, "Retry harus memakai idempotency key yang sama")
+
+    def test_timeout_does_not_duplicate_invoice(self):
+        app = self._create_application()
+        job = self.Job._enqueue(app)
+        self.server.delay_next = [1.5]
+        with patch('odoo.addons.iso17024_portall.models.application.XENDIT_TIMEOUT', (5, 0.5)):
+            self.Job._cron_process_jobs()
+
+        # Xendit sudah membuat invoice, tapi respons tidak pernah sampai
+        self.assertEqual(job.state, 'queued')
+        self.assertFalse(app.xendit_payment_url)
+        self.assertEqual(len(self.server.invoices), 1)
+
+        self._due(job)
+        self.Job._cron_process_jobs()
+        self.assertEqual(job.state, 'done')
+        self.assertEqual(len(self._posts()), 1, "Retry harus memakai invoice yang sudah ada")
+        [invoice] = self.server.invoices.values()
+        self.assertEqual(app.xendit_invoice_id, invoice['id'])
+
+    def test_db_error_isolated_per_job(self):
+        broken, healthy = self._create_application(), self._create_application()
+        jobs = self.Job._enqueue(broken | healthy)
+        Application = type(broken)
+        create_invoice = Application._create_xendit_invoice
+
+        def flaky_create(app, **kwargs):
+            if app == broken:
+                app.env.cr.execute("SELECT 1 / 0")
+            return create_invoice(app, **kwargs)
+
+        with patch.object(Application, '_create_xendit_invoice', flaky_create):
+            self.Job._cron_process_jobs()
+
+        broken_job, healthy_job = jobs.sorted(lambda j: j.application_id != broken)
+        self.assertEqual(broken_job.state, 'failed')
+        self.assertEqual(healthy_job.state, 'done')
+        self.assertTrue(healthy.xendit_payment_url)
@@ -0,0 +1,111 @@
+import logging
+import time
+
+from odoo.tests import tagged
+
+from .common import CertificationCase
+from .test_xendit_job import FakeXenditServerMixin
+
+_logger = logging.getLogger(__name__)
+
+
+class XenditReconcileCase(FakeXenditServerMixin, CertificationCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._start_fake_xendit()
+        cls.Application = cls.env['certification.application']
+
+    def setUp(self):
+        super().setUp()
+        self._reset_fake_xendit()
+
+    def _pending_applications(self, statuses, prefix='inv-rekon'):
+        """Satu aplikasi menunggu pembayaran per status; status None = invoice tidak ada di Xendit"""
+        applications = self.Application.create([{
+            'partner_id': self.candidate.id,
+            'scheme': 'level1',
+            'state': 'payment',
+            'xendit_status': 'pending',
+            'xendit_invoice_id': f'{prefix}-{index}',
+        } for index in range(len(statuses))])
+        for application, status in zip(applications, statuses):
+            if status:
+                self.server.invoices[application.xendit_invoice_id] = {
+                    'id': application.xendit_invoice_id,
+                    'external_id': f'CERT-{application.id}',
+                    'status': status,
+                    'payment_method': 'BANK_TRANSFER',
+                }
+        return applications
+
+    def _invoice_gets(self):
+        return [path for method, path, _headers, _body in self.server.requests if method == 'GET']
+
+
+@tagged('post_install', '-at_install')
+class TestXenditReconcile(XenditReconcileCase):
+
+    def test_reconcile_pages_and_fetches_in_parallel(self):
+        statuses = ['PAID', 'PENDING', 'SETTLED', 'EXPIRED', 'PENDING', 'PAID', None, 'PENDING', 'PAID', 'PENDING']
+        applications = self._pending_applications(statuses)
+        by_status = dict(zip(applications, statuses))
+        self.server.fail_ids = {applications[4].xendit_invoice_id}
+        self.server.get_delay = 0.2
+
+        fixed = self.Application._cron_reconcile_xendit(batch_size=3, max_workers=4)
+
+        # Keyset paging: setiap invoice dicek tepat sekali walau record berubah status di tengah jalan
+        self.assertEqual(sorted(self._invoice_gets()),
+                         sorted(f'/v2/invoices/{app.xendit_invoice_id}' for app in applications))
+        # Satu halaman (3 invoice) diambil bersamaan, dibatasi max_workers
+        self.assertEqual(self.server.max_active, 3)
+
+        self.assertEqual(fixed, 5)
+        for application, status in by_status.items():
+            expected = {'PAID': 'paid', 'SETTLED': 'paid', 'EXPIRED': 'expired'}.get(status, 'pending')
+            self.assertEqual(application.xendit_status, expected, f"Status Xendit {status}")
+        events = self.env['certification.xendit.event'].search([('application_id', 'in', applications.ids)])
+        self.assertEqual(set(events.mapped('source')), {'reconcile'})
+        self.assertEqual(set(events.mapped('state')), {'done'})
+
+        # Jalan kedua: hanya yang masih pending yang dicek, tidak ada event baru
+        self.server.requests = []
+        self.assertEqual(self.Application._cron_reconcile_xendit(batch_size=3, max_workers=4), 0)
+        self.assertEqual(len(self._invoice_gets()), 5)
+
+    def test_worker_limit(self):
+        self._pending_applications(['PENDING'] * 6)
+        self.server.get_delay = 0.1
+        self.Application._cron_reconcile_xendit(batch_size=100, max_workers=2)
+        self.assertEqual(self.server.max_active, 2)
+
+
+@tagged('-standard', '-at_install', 'post_install', 'cert_benchmark')
+class TestXenditReconcileBenchmark(XenditReconcileCase):
+    """Rekonsiliasi 500 invoice dengan latency API 50 ms, per jumlah worker. --test-tags cert_benchmark"""
+
+    APPLICATIONS = 500
+    LATENCY = 0.05
+
+    def test_reconcile_latency(self):
+        self.server.get_delay = self.LATENCY
+        results = []
+        for workers in (1, 4, 8, 16):
+            applications = self._pending_applications(
+                ['PAID' if index % 10 == 0 else 'PENDING' for index in range(self.APPLICATIONS)],
+                prefix=f'inv-bench-{workers}',
+            )
+            started = time.monotonic()
+            fixed = self.Application._cron_reconcile_xendit(batch_size=100, max_workers=workers)
+            results.append(f"{workers} workers {time.monotonic() - started:.1f}s")
+
+            self.assertEqual(fixed, self.APPLICATIONS // 10)
+            # Keluarkan dari putaran berikutnya
+            applications.filtered(lambda a: a.xendit_status == 'pending').xendit_status = 'expired'
+
+        _logger.info(
+            f"Xendit reconcile ({self.APPLICATIONS} invoices, {self.LATENCY * 1000:.0f} ms API latency): "
+            + ", ".join(results)
+        )